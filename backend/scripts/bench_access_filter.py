@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-row and batched newsletter access filters.
+
+Seeds an in-memory SQLite database with catalogs of increasing size and
+counts the SQL statements each path issues for the same caller. The per-row
+path looks up the caller's entitlement for every private or premium row,
+with the entitlement cache bypassed, so its query count grows with the
+catalog. The batched path must return exactly the same output, with a
+query count that stays constant as the catalog grows.
+
+Usage:
+    python scripts/bench_access_filter.py [--sizes 100,1000,5000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+from src.models.user import db, User
+from src.models.newsletter import Newsletter
+from src.models.subscription import Subscription
+from src.services.content_manager import ContentVisibilityManager
+from src.services.entitlements import entitlement_cache
+
+VISIBILITIES = ['public', 'private', 'premium']
+
+def create_bench_app():
+    """Create a minimal app bound to an in-memory database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def seed(size):
+    """Reset the schema and seed one free user, one premium user and `size` newsletters"""
+    db.drop_all()
+    db.create_all()
+
+    free_user = User(username='free', email='free@example.com')
+    premium_user = User(username='premium', email='premium@example.com')
+    db.session.add_all([free_user, premium_user])
+    db.session.flush()
+
+    db.session.add(Subscription(user_id=premium_user.id, tier='premium', status='active'))
+    db.session.add_all([
+        Newsletter(
+            title=f'Newsletter {i}',
+            content='Lorem ipsum dolor sit amet. ' * 20,
+            summary=None if i % 2 else f'Summary {i}',
+            visibility=VISIBILITIES[i % len(VISIBILITIES)],
+            creator_id=free_user.id
+        )
+        for i in range(size)
+    ])
+    db.session.commit()
+    return free_user.id, premium_user.id
+
+def per_row_filter(manager, user_id):
+    """The original per-row path: one can_access_newsletter call per newsletter
+
+    The entitlement cache is cleared before each row so every check looks
+    the caller up again, as the per-row path did before entitlements were
+    cached; otherwise the cache would hide the per-row queries.
+    """
+    newsletters = Newsletter.query.all()
+    accessible = []
+    for newsletter in newsletters:
+        entitlement_cache.clear()
+        access_result = manager.can_access_newsletter(newsletter.id, user_id)
+        if access_result['can_access'] or access_result['content_type'] == 'summary':
+            accessible.append(access_result.get('newsletter', newsletter.to_dict()))
+    return accessible
+
+def batched_filter(manager, user_id):
+    """The batched path used by GET /api/newsletters"""
+    return manager.filter_newsletters_by_access(Newsletter.query.all(), user_id)
+
+def measure(func, *args):
+    """Run func against a fresh session and return (result, statement count, elapsed ms)"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        db.session.expunge_all()
+        entitlement_cache.clear()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    return result, len(statements), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,5000', help='Comma-separated catalog sizes')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    manager = ContentVisibilityManager()
+    app = create_bench_app()
+
+    print(f"{'rows':>6} {'caller':>8} {'per-row q':>10} {'batched q':>10} {'per-row ms':>11} {'batched ms':>11}  same")
+
+    ok = True
+    with app.app_context():
+        for size in sizes:
+            free_id, premium_id = seed(size)
+
+            for label, user_id in [('anon', None), ('free', free_id), ('premium', premium_id)]:
+                expected, row_queries, row_ms = measure(per_row_filter, manager, user_id)
+                actual, batch_queries, batch_ms = measure(batched_filter, manager, user_id)
+
+                same = expected == actual
+                ok = ok and same
+                print(f"{size:>6} {label:>8} {row_queries:>10} {batch_queries:>10} {row_ms:>11.1f} {batch_ms:>11.1f}  {'✅' if same else '❌'}")
+
+    if not ok:
+        print("\n❌ Batched output differs from the per-row path")
+        sys.exit(1)
+
+    print("\n✅ Batched output matches the per-row path")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Measure per-task AI client setup and handshake cost, fresh vs shared client.
+
+Starts a local OpenAI-compatible stub (HTTP/1.1 with keep-alive, optionally
+TLS with a throwaway self-signed certificate) and runs the same AI task
+body, AIWriter.enhance_content with the completion cache off, many times:
+
+  fresh   a new openai.OpenAI() per task, as every task in ai_tasks.py
+          used to build: client setup plus a new TCP (and TLS) connection
+  shared  the process-wide client from get_ai_client(), warmed up the way
+          Celery's worker_process_init does
+
+Usage:
+    python scripts/bench_ai_client.py [--tasks 200] [--tls] [--latency-ms 0]
+"""
+
+import os
+import sys
+import ssl
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_email_http import self_signed_cert
+
+COMPLETION = json.dumps({
+    'id': 'chatcmpl-stub',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'gpt-3.5-turbo',
+    'choices': [{
+        'index': 0,
+        'finish_reason': 'stop',
+        'message': {'role': 'assistant', 'content': 'Enhanced newsletter content.'}
+    }],
+    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+}).encode()
+
+class CompletionStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per reply
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def _reply(self, body=b''):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        self._reply(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub(latency, tls):
+    """Start the completion stub in a background thread and return (base_url, certfile)"""
+    handler = type('Handler', (CompletionStubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    certfile = None
+
+    if tls:
+        certfile, keyfile = self_signed_cert(tempfile.mkdtemp())
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = 'https' if tls else 'http'
+    return f'{scheme}://127.0.0.1:{server.server_address[1]}/v1', certfile
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def run(make_writer, tasks):
+    """Run the task body tasks times and return the per-task latencies in ms"""
+    latencies = []
+    for _ in range(tasks):
+        start = time.perf_counter()
+        make_writer().enhance_content('Newsletter content', 'improve', use_cache=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=200, help='Tasks per mode')
+    parser.add_argument('--tls', action='store_true', help='Serve the stub over TLS (needs the openssl CLI)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated completion time')
+    args = parser.parse_args()
+
+    base_url, certfile = start_stub(args.latency_ms / 1000, args.tls)
+    if certfile:
+        # httpx trusts SSL_CERT_FILE when building its SSL context; keep the full
+        # public CA bundle in it so each fresh client loads as much as in production
+        import certifi
+        bundle = os.path.join(os.path.dirname(certfile), 'bundle.pem')
+        with open(bundle, 'w') as out:
+            out.write(open(certifi.where()).read() + open(certfile).read())
+        os.environ['SSL_CERT_FILE'] = bundle
+
+    os.environ.update({'OPENAI_BASE_URL': base_url, 'OPENAI_API_KEY': 'sk-bench', 'AI_CACHE_BACKEND': 'off'})
+
+    import openai
+    from src.services.ai_client import warm_ai_client
+    from src.services.ai_writer import AIWriter
+
+    def fresh_writer():
+        return AIWriter(openai.OpenAI())
+
+    setup_ms = statistics.median(timed(openai.OpenAI) for _ in range(20))
+    warmup_ms = timed(warm_ai_client)
+
+    modes = {'fresh': fresh_writer, 'shared': AIWriter}
+
+    print(f"{args.tasks} tasks per mode against the completion stub at {base_url}\n")
+    print(f"{'mode':<8} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'tasks/s':>9}")
+
+    results = {}
+    for name, make_writer in modes.items():
+        run(make_writer, min(10, args.tasks))  # warm up imports
+        latencies = run(make_writer, args.tasks)
+        results[name] = statistics.mean(latencies)
+        p99 = sorted(latencies)[max(0, int(len(latencies) * 0.99) - 1)]
+        print(f"{name:<8} {results[name]:>9.2f} {statistics.median(latencies):>8.2f} {p99:>8.2f} "
+              f"{1000 / results[name]:>9.0f}")
+
+    saved = results['fresh'] - results['shared']
+    print(f"\nClient construction alone: {setup_ms:.2f} ms (median); one-off worker warm-up: {warmup_ms:.2f} ms")
+    print(f"Sharing the client saves {saved:.2f} ms per task ({saved / results['fresh']:.0%})")
+
+if __name__ == '__main__':
+    main()
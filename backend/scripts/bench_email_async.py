@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure messages per second for one worker at several send concurrencies.
+
+Starts the local provider stub from bench_email_http.py with a simulated
+processing time and sends the same bulk email through EmailService:
+
+  sync      send_bulk, one provider request at a time
+  async N   send_bulk_async with N requests in flight on one httpx client
+
+Every provider request carries --batch-size recipients, so messages/s is
+requests/s times the batch size. The rate limiter is set far above what
+the stub can take so it never throttles here.
+
+Usage:
+    python scripts/bench_email_async.py [--messages 400] [--batch-size 1] [--latency-ms 50]
+                                        [--concurrency 1,2,4,8,16,32] [--provider sendgrid|mailgun]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_email_http import start_stub
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=400, help='Recipients per mode')
+    parser.add_argument('--batch-size', type=int, default=1, help='Recipients per provider request')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Simulated provider processing time')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32')
+    parser.add_argument('--provider', choices=['sendgrid', 'mailgun'], default='sendgrid')
+    args = parser.parse_args()
+
+    base_url, _ = start_stub(args.latency_ms / 1000, tls=False)
+    os.environ.update({
+        'EMAIL_PROVIDER': args.provider,
+        'SENDGRID_API_KEY': 'SG.stub', 'SENDGRID_API_URL': base_url,
+        'MAILGUN_API_KEY': 'key-stub', 'MAILGUN_DOMAIN': 'stub.example.com', 'MAILGUN_API_URL': base_url,
+        'EMAIL_BATCH_SIZE': str(args.batch_size),
+        'EMAIL_RATE_LIMIT': '1000000',
+    })
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-bench')
+    warnings.simplefilter('ignore')
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    from src.tasks.email_tasks import EmailService
+
+    service = EmailService()
+    recipients = [{'email': f'user{i}@example.com', 'substitutions': {'username': f'user{i}'}}
+                  for i in range(args.messages)]
+
+    def sync_send():
+        return service.send_bulk(recipients, 'Benchmark', '<p>Hello -username-</p>', 'Hello -username-')
+
+    def async_send(concurrency):
+        return lambda: asyncio.run(service.send_bulk_async(
+            recipients, 'Benchmark', '<p>Hello -username-</p>', 'Hello -username-', concurrency=concurrency
+        ))
+
+    modes = [('sync', sync_send)] + [
+        (f'async {n}', async_send(n)) for n in map(int, args.concurrency.split(','))
+    ]
+
+    print(f"{args.messages} messages per mode, {args.batch_size} per request, "
+          f"{args.latency_ms:g} ms stub latency via {args.provider}\n")
+    print(f"{'mode':<10} {'seconds':>8} {'messages/s':>11}")
+
+    baseline = None
+    for name, send in modes:
+        start = time.perf_counter()
+        result = send()
+        elapsed = time.perf_counter() - start
+        if not result['success']:
+            raise RuntimeError(result['batches'])
+
+        rate = args.messages / elapsed
+        baseline = baseline or rate
+        print(f"{name:<10} {elapsed:>8.2f} {rate:>11.0f}   ({rate / baseline:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Load-test the newsletter fan-out end to end against the local email sink.
+
+Starts scripts/email_sink.py in a subprocess, boots the app against a
+throwaway SQLite database seeded with --users users (every --premium-every'th
+one on an active premium plan) and a fresh public and premium newsletter,
+points EmailService at the sink (EMAIL_PROVIDER=local) and runs, with
+Celery eager:
+
+  notification   send_new_newsletter_notification for the public newsletter (all users)
+  digest         send_newsletter_digest (premium subscribers)
+
+For each it reports the recipients the sink accepted, the requests it
+answered 500 and 429 (throttled recipients are re-sent), emails/s, p50/p99
+latency of one provider request as the worker sees it (rate limiter wait
+included) and the process's peak RSS. Eager Celery runs a retry at once,
+so the benchmark makes each retry wait out its countdown first, as a
+worker would. Without --error-rate every recipient must be accepted.
+
+Usage:
+    python scripts/bench_email_fanout.py [--users 20000] [--premium-every 4] [--api sendgrid|mailgun]
+                                         [--latency-ms 50] [--jitter-ms 0] [--error-rate 0]
+                                         [--throttle-rate 0] [--rate-limit 0]
+                                         [--batch-size N] [--concurrency N]
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import logging
+import argparse
+import resource
+import tempfile
+import warnings
+import functools
+import subprocess
+import urllib.request
+from datetime import datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+
+def start_sink_process(args):
+    """Run the sink in its own process so it does not compete with the app for the GIL"""
+    command = [
+        sys.executable, os.path.join(SCRIPTS_DIR, 'email_sink.py'), '--port', '0',
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--error-rate', str(args.error_rate), '--throttle-rate', str(args.throttle_rate),
+        '--rate-limit', str(args.rate_limit),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+def sink_stats(base_url):
+    with urllib.request.urlopen(f'{base_url}/stats') as response:
+        return json.loads(response.read())
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def timed(latencies, method):
+    """Wrap a sync or async per-batch send method to record its duration"""
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+    return wrapper
+
+def eager_retry_waits(retry):
+    """Wrap Task.retry so an eager retry sleeps through its countdown before running"""
+    @functools.wraps(retry)
+    def wrapper(self, *args, **kwargs):
+        if self.request.is_eager and kwargs.get('countdown'):
+            time.sleep(kwargs['countdown'])
+        return retry(self, *args, **kwargs)
+    return wrapper
+
+def seed(db, User, Newsletter, Subscription, users, premium_every):
+    """Bulk-insert users, premium subscriptions and yesterday's newsletters"""
+    now = datetime.utcnow()
+    # The digest covers the last complete UTC day
+    yesterday = now - timedelta(days=1)
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'created_at': now}
+        for i in range(users)
+    ])
+    db.session.execute(Subscription.__table__.insert(), [
+        {'user_id': user_id, 'tier': 'premium', 'status': 'active',
+         'created_at': now, 'expires_at': now + timedelta(days=30)}
+        for user_id in range(1, users + 1, premium_every)
+    ])
+    public = Newsletter(title='Fan-out benchmark', content='Benchmark content. ' * 50,
+                        summary='Benchmark summary', visibility='public', creator_id=1, created_at=yesterday)
+    premium = Newsletter(title='Fan-out benchmark (premium)', content='Premium content. ' * 50,
+                         summary='Premium summary', visibility='premium', creator_id=1, created_at=yesterday)
+    db.session.add_all([public, premium])
+    db.session.commit()
+    return public.id
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--premium-every', type=int, default=4, help='Every Nth user is a premium subscriber')
+    parser.add_argument('--api', choices=['sendgrid', 'mailgun'], default='sendgrid', help='Wire format to use')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Sink processing time per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0, help='Sink requests per second, 0 for none')
+    parser.add_argument('--batch-size', type=int, help='EMAIL_BATCH_SIZE (defaults to the provider limit)')
+    parser.add_argument('--concurrency', type=int, help='EMAIL_SEND_CONCURRENCY')
+    args = parser.parse_args()
+
+    sink, base_url = start_sink_process(args)
+
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_fanout.db')}",
+        'EMAIL_PROVIDER': 'local',
+        'LOCAL_EMAIL_URL': base_url,
+        'LOCAL_EMAIL_API': args.api,
+        # The sink's --rate-limit is the ceiling under test; keep the app's own limiter out of the way otherwise
+        'EMAIL_RATE_LIMIT': str(args.rate_limit or 1000000),
+    })
+    if args.batch_size:
+        os.environ['EMAIL_BATCH_SIZE'] = str(args.batch_size)
+    if args.concurrency:
+        os.environ['EMAIL_SEND_CONCURRENCY'] = str(args.concurrency)
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-bench')
+    os.environ.pop('REDIS_URL', None)
+    warnings.simplefilter('ignore')
+    logging.disable(logging.ERROR)
+
+    from src.main import app
+    from src.celery_app import celery_app
+    from src.models.user import db, User
+    from src.models.newsletter import Newsletter
+    from src.models.subscription import Subscription
+    from src.tasks.email_tasks import EmailService
+    from src.tasks.newsletter_tasks import send_new_newsletter_notification, send_newsletter_digest
+    from celery.app.task import Task
+
+    celery_app.conf.update(task_always_eager=True, result_backend='cache+memory://')
+    Task.retry = eager_retry_waits(Task.retry)
+
+    latencies = []
+    for name in ('send_bulk_sendgrid', 'send_bulk_mailgun', '_send_batch_async'):
+        setattr(EmailService, name, timed(latencies, getattr(EmailService, name)))
+
+    try:
+        with app.app_context():
+            db.create_all()
+            public_id = seed(db, User, Newsletter, Subscription, args.users, args.premium_every)
+
+        premium_users = len(range(1, args.users + 1, args.premium_every))
+        runs = [
+            ('notification', args.users, lambda: send_new_newsletter_notification.apply(args=[public_id])),
+            ('digest', premium_users, lambda: send_newsletter_digest.apply()),
+        ]
+
+        print(f"{args.users} users, 1 in {args.premium_every} premium, {args.api} API via {base_url}, "
+              f"{args.latency_ms:g} ms sink latency\n")
+        print(f"{'run':<13} {'emails':>7} {'requests':>8} {'500s':>5} {'429s':>5} {'seconds':>8} {'emails/s':>9} "
+              f"{'p50 ms':>7} {'p99 ms':>7} {'peak RSS MB':>12}")
+
+        for name, recipients, run in runs:
+            latencies.clear()
+            before = sink_stats(base_url)
+            start = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - start
+            if result.failed():
+                raise RuntimeError(f'{name} failed: {result.result!r}')
+
+            after = sink_stats(base_url)
+            accepted = after.get('recipients', 0) - before.get('recipients', 0)
+            requests, errors, throttled = (after.get(key, 0) - before.get(key, 0)
+                                           for key in ('requests', 'errors', 'throttled'))
+            print(f"{name:<13} {accepted:>7} {requests:>8} {errors:>5} {throttled:>5} {elapsed:>8.2f} {accepted / elapsed:>9.0f} "
+                  f"{percentile(latencies, 0.50) * 1000:>7.1f} {percentile(latencies, 0.99) * 1000:>7.1f} "
+                  f"{peak_rss_mb():>12.1f}")
+            if not args.error_rate and accepted != recipients:
+                raise RuntimeError(f'{name}: the sink accepted {accepted} of {recipients} recipients')
+    finally:
+        sink.terminate()
+        sink.wait()
+
+if __name__ == '__main__':
+    main()
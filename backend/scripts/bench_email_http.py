@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Measure per-email latency with and without the pooled HTTP session.
+
+Starts the local email sink (scripts/email_sink.py: HTTP/1.1 with
+keep-alive, optionally TLS with a throwaway self-signed certificate) and
+sends the same fan-out through EmailService twice:
+
+  fresh   a new connection per email, as with bare requests.post or a new
+          SendGridAPIClient per call
+  pooled  the process-wide keep-alive session from get_http_session()
+
+Usage:
+    python scripts/bench_email_http.py [--emails 500] [--provider sendgrid|mailgun] [--tls] [--latency-ms 0]
+"""
+
+import os
+import sys
+import ssl
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_sink import create_sink
+
+def self_signed_cert(directory):
+    """Create a certificate for 127.0.0.1 with the openssl CLI"""
+    certfile = os.path.join(directory, 'stub.pem')
+    keyfile = os.path.join(directory, 'stub.key')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-keyout', keyfile, '-out', certfile,
+        '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1'
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+def start_stub(latency, tls):
+    """Start the email sink in a background thread and return (base_url, certfile)"""
+    server = create_sink(latency=latency)
+    certfile = None
+
+    if tls:
+        certfile, keyfile = self_signed_cert(tempfile.mkdtemp())
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = 'https' if tls else 'http'
+    return f'{scheme}://127.0.0.1:{server.server_address[1]}', certfile
+
+class FreshConnectionSession:
+    """Opens and closes a connection for every request, like the old send path"""
+
+    def post(self, *args, **kwargs):
+        import requests
+        with requests.Session() as session:
+            return session.post(*args, **kwargs)
+
+def run(service, emails):
+    """Send one email per recipient and return the per-email latencies in ms"""
+    latencies = []
+    for i in range(emails):
+        start = time.perf_counter()
+        result = service.send_email(f'user{i}@example.com', 'Benchmark', '<p>Hello</p>', 'Hello')
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=500, help='Emails per mode')
+    parser.add_argument('--provider', choices=['sendgrid', 'mailgun'], default='sendgrid')
+    parser.add_argument('--tls', action='store_true', help='Serve the stub over TLS (needs the openssl CLI)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated provider processing time')
+    args = parser.parse_args()
+
+    base_url, certfile = start_stub(args.latency_ms / 1000, args.tls)
+    if certfile:
+        # requests lets REQUESTS_CA_BUNDLE override session.verify, so trust the stub there
+        os.environ['REQUESTS_CA_BUNDLE'] = certfile
+
+    os.environ.update({
+        'EMAIL_PROVIDER': args.provider,
+        'SENDGRID_API_KEY': 'SG.stub', 'SENDGRID_API_URL': base_url,
+        'MAILGUN_API_KEY': 'key-stub', 'MAILGUN_DOMAIN': 'stub.example.com', 'MAILGUN_API_URL': base_url,
+        'EMAIL_RATE_LIMIT': '1000000',
+    })
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-bench')
+    warnings.simplefilter('ignore')
+
+    from src.tasks.email_tasks import EmailService
+
+    modes = {
+        'fresh': EmailService(session=FreshConnectionSession()),
+        'pooled': EmailService(),
+    }
+
+    print(f"{args.emails} emails per mode via {args.provider} stub at {base_url}\n")
+    print(f"{'mode':<8} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'emails/s':>9}")
+
+    results = {}
+    for name, service in modes.items():
+        run(service, min(20, args.emails))  # warm up imports and the pool
+        latencies = run(service, args.emails)
+        results[name] = statistics.mean(latencies)
+        p99 = sorted(latencies)[max(0, int(len(latencies) * 0.99) - 1)]
+        print(f"{name:<8} {results[name]:>9.2f} {statistics.median(latencies):>8.2f} {p99:>8.2f} "
+              f"{1000 / results[name]:>9.0f}")
+
+    saved = results['fresh'] - results['pooled']
+    print(f"\nPooling saves {saved:.2f} ms per email ({saved / results['fresh']:.0%})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measure email render time per N recipients.
+
+Renders the daily digest (5 newsletters) for N recipients three ways:
+
+  per-recipient  render the whole template for every recipient, like the
+                 old f-string loop
+  personalize    render once per send run, then fill the username slot
+                 for every recipient with personalize()
+  provider       render once per send run and hand the slot to the
+                 provider bulk API (SendGrid substitutions / Mailgun
+                 recipient-variables), which is what the digest does
+
+Usage:
+    python scripts/bench_email_render.py [--recipients 10000]
+"""
+
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.email_templates import _environment, render_email, render_shared, personalize
+from src.services.digest import digest_sections
+
+def sample_newsletters():
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f'Newsletter {i}: what changed this week',
+            summary=None if i % 2 else f'Summary of newsletter {i}. ' * 5,
+            content='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 40
+        )
+        for i in range(5)
+    ]
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    args = parser.parse_args()
+
+    sections = digest_sections(sample_newsletters())
+    usernames = [f'user{i}' for i in range(args.recipients)]
+
+    compile_ms = timed(lambda: _environment.get_template('digest.html'))
+
+    def per_recipient():
+        for username in usernames:
+            render_email('digest', username=username, sections=sections)
+
+    def render_once_personalize():
+        content = render_shared('digest', slots=['username'], sections=sections)
+        for username in usernames:
+            personalize(content['html'], {'username': username})
+
+    def render_once_provider():
+        render_shared('digest', slots=['username'], sections=sections)
+        [{'email': f'{username}@example.com', 'substitutions': {'username': username}} for username in usernames]
+
+    print(f"Digest render for {args.recipients} recipients (template compiled once in {compile_ms:.1f} ms)\n")
+    print(f"{'mode':<15} {'total ms':>10} {'µs/recipient':>13}")
+
+    baseline = None
+    for name, func in (('per-recipient', per_recipient),
+                       ('personalize', render_once_personalize),
+                       ('provider', render_once_provider)):
+        elapsed = timed(func)
+        baseline = baseline or elapsed
+        print(f"{name:<15} {elapsed:>10.1f} {elapsed * 1000 / args.recipients:>13.2f}   ({baseline / elapsed:.0f}x)")
+
+if __name__ == '__main__':
+    main()
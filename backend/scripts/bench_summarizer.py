@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compare the extractive and LLM newsletter summarizers.
+
+Summarizes one newsletter with each summarizer and prints the latency and
+the summary written:
+
+  extractive  sentence scoring over the markdown, in process (the default
+              AI_SUMMARIZER)
+  llm         a second chat completion asking for a 2-sentence summary,
+              like write_newsletter used to make for every newsletter
+
+The LLM runs bypass the completion cache and need OPENAI_API_KEY; without
+it only the extractive summarizer is measured.
+
+Usage:
+    python scripts/bench_summarizer.py [--file newsletter.md] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import textwrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.summarizer import extractive_summary
+
+EXTRACTIVE_RUNS = 1000
+
+SAMPLE = """# Pricing Your First Digital Product Without Guesswork
+
+Most indie creators underprice their first digital product. They pick a number that feels safe, launch, and then wonder why the revenue never covers the hours they put in. This week we walk through a simple way to price with evidence instead of nerves.
+
+## Start from the outcome, not the effort
+
+Buyers do not pay for the hours you spent building a course or template. They pay for the outcome it gets them, whether that is a landing page that converts or a week of planning saved. Write down the outcome in one sentence and estimate what it is worth to your customer.
+
+- A template that saves a freelancer five hours a month is worth far more than $9.
+- A course that lands someone their first client pays for itself many times over.
+
+## Test three price points with real buyers
+
+Pricing is a hypothesis you can test. Offer the product to a small segment of your audience at three price points and watch the conversion rate and the revenue per visitor, not just the number of sales. The highest conversion rate rarely produces the most revenue, so let the revenue per visitor decide.
+
+## Anchor with a premium tier
+
+A premium tier with extras such as a community, office hours or done-for-you assets makes the core product look like the sensible choice. Even if few people buy the premium tier, its presence lifts the price buyers consider reasonable for the core product.
+
+## Your next step
+
+Pick one product this week, write its outcome sentence, and set up a three-price test for your next launch. Reply and tell me what you learned about your pricing, because the best insights from readers go into next month's issue.
+"""
+
+def timed(func, runs):
+    times = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, times
+
+def report(name, summary, times):
+    print(f"{name:<11} median {statistics.median(times):>9.2f} ms   max {max(times):>9.2f} ms   "
+          f"({len(times)} run(s), {len(summary.split())} words)")
+    print(textwrap.indent(textwrap.fill(summary, 88), '    '))
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', help='Markdown newsletter to summarize (default: a built-in sample)')
+    parser.add_argument('--runs', type=int, default=3, help='LLM summaries to request')
+    args = parser.parse_args()
+
+    content = open(args.file).read() if args.file else SAMPLE
+    print(f"Newsletter: {len(content.split())} words\n")
+
+    summary, times = timed(lambda: extractive_summary(content), EXTRACTIVE_RUNS)
+    report('extractive', summary, times)
+
+    if not os.getenv('OPENAI_API_KEY'):
+        print("llm         skipped: set OPENAI_API_KEY to measure the LLM summarizer")
+        return
+
+    from src.services.ai_writer import AIWriter
+    writer = AIWriter()
+    summary, times = timed(lambda: writer.summarize(content, 'llm', use_cache=False), args.runs)
+    report('llm', summary, times)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check that conditional newsletter requests never confirm a stale response.
+
+Boots the app against a throwaway SQLite database and replays the
+revalidation a client or proxy does after a reader's access changes:
+
+  - a free reader fetches a premium newsletter (summary), upgrades, and
+    asks again with If-Modified-Since and with the old If-None-Match
+  - a public newsletter still answers If-Modified-Since with 304
+  - the newsletter list ignores If-Modified-Since
+
+A check fails when the server answers 304 where the body has changed, or
+stops answering 304 where it has not.
+
+Usage:
+    python scripts/check_conditional_requests.py
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'conditional_requests.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('OPENAI_API_KEY', 'sk-conditional-check')
+os.environ.pop('REDIS_URL', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app
+from src.models.user import db, User
+from src.models.newsletter import Newsletter
+
+def seed():
+    """A creator, a free reader and one public and one premium newsletter, last edited yesterday"""
+    creator = User(username='creator', email='creator@example.com')
+    reader = User(username='reader', email='reader@example.com')
+    db.session.add_all([creator, reader])
+    db.session.flush()
+
+    edited = datetime.utcnow() - timedelta(days=1)
+    public = Newsletter(title='Public issue', content='Public content. ' * 20, visibility='public',
+                        creator_id=creator.id, updated_at=edited)
+    premium = Newsletter(title='Premium issue', content='Premium content. ' * 20, visibility='premium',
+                         creator_id=creator.id, updated_at=edited)
+    db.session.add_all([public, premium])
+    db.session.commit()
+    return reader.id, public.id, premium.id
+
+def run_checks(reader_id, public_id, premium_id):
+    """Return (description, passed) for each scenario"""
+    client = app.test_client()
+    since = {'If-Modified-Since': datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')}
+    checks = []
+
+    # Premium newsletter: summary before the upgrade, full body after it
+    before = client.get(f'/api/newsletters/{premium_id}?user_id={reader_id}')
+    checks.append(('free reader gets the premium summary', before.status_code == 200
+                   and before.get_json()['access_type'] == 'summary'))
+    checks.append(('premium newsletter carries no Last-Modified', 'Last-Modified' not in before.headers))
+
+    with mock.patch('src.routes.payments.process_new_subscription'):
+        upgraded = client.post('/api/upgrade-to-premium', json={'user_id': reader_id})
+    checks.append(('reader upgrades to premium', upgraded.status_code == 200))
+
+    after = client.get(f'/api/newsletters/{premium_id}?user_id={reader_id}', headers=since)
+    checks.append(('If-Modified-Since after the upgrade returns the full body', after.status_code == 200
+                   and after.get_json().get('access_type') == 'full'))
+
+    after = client.get(f'/api/newsletters/{premium_id}?user_id={reader_id}',
+                       headers={'If-None-Match': before.headers['ETag']})
+    checks.append(('the pre-upgrade ETag no longer matches', after.status_code == 200))
+
+    revalidated = client.get(f'/api/newsletters/{premium_id}?user_id={reader_id}',
+                             headers={'If-None-Match': after.headers['ETag']})
+    checks.append(('the post-upgrade ETag revalidates with 304', revalidated.status_code == 304))
+
+    # Public newsletter: the same body for every reader, so Last-Modified is safe
+    public = client.get(f'/api/newsletters/{public_id}?user_id={reader_id}')
+    checks.append(('public newsletter carries Last-Modified', 'Last-Modified' in public.headers))
+    public = client.get(f'/api/newsletters/{public_id}?user_id={reader_id}', headers=since)
+    checks.append(('public newsletter answers If-Modified-Since with 304', public.status_code == 304))
+
+    # List: deletes and access changes do not move a timestamp
+    listing = client.get(f'/api/newsletters?user_id={reader_id}', headers=since)
+    checks.append(('newsletter list ignores If-Modified-Since', listing.status_code == 200
+                   and 'Last-Modified' not in listing.headers))
+
+    return checks
+
+def main():
+    logging.disable(logging.CRITICAL)
+
+    with app.app_context():
+        ids = seed()
+        checks = run_checks(*ids)
+
+    failures = 0
+    for description, passed in checks:
+        print(f"{'✅' if passed else '❌'} {description}")
+        failures += not passed
+
+    if failures:
+        print(f"\n❌ {failures} of {len(checks)} check(s) failed")
+        sys.exit(1)
+
+    print(f"\n✅ All {len(checks)} conditional request checks passed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Check that the queries issued by the routes and tasks use an index.
+
+Boots the app against a throwaway SQLite database, drives the hot paths
+(newsletter listing, search and detail, access checks, user stats, webhooks and
+upgrades, digest build and preview, notifications, subscription maintenance tasks and the email
+outbox drain),
+captures every SQL statement they issue and runs EXPLAIN QUERY PLAN on
+each. A statement fails the check when it scans a table without an index,
+unless it is a known full read listed in EXPECTED_SCANS.
+
+Usage:
+    python scripts/check_query_plans.py [--verbose]
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('OPENAI_API_KEY', 'sk-query-plan-check')
+os.environ.pop('REDIS_URL', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+from src.main import app
+from src.celery_app import celery_app
+from src.models.user import db, User
+from src.models.newsletter import Newsletter
+from src.models.subscription import Subscription
+from src.models.payment import Payment
+from src.services.stripe_service import StripeService
+from src.services.entitlements import entitlement_cache
+
+# Statements that read a whole table on purpose, as regexes over the SQL text
+EXPECTED_SCANS = {
+    r'GROUP BY newsletter\.visibility': 'visibility aggregate (counters fallback/rebuild)',
+    r'GROUP BY newsletter\.creator_id': 'per-creator counter rebuild',
+}
+
+# SCAN lines that are fine: walking an index in order, an FTS5 MATCH, or tiny temp structures
+INDEXED_SCAN = re.compile(r'SCAN \S+ USING (COVERING )?INDEX|SCAN \S+ VIRTUAL TABLE INDEX|SCAN CONSTANT ROW|USE TEMP B-TREE')
+
+def seed():
+    """Seed enough rows that the planner's choices are realistic"""
+    now = datetime.utcnow()
+    users = [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(200)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    db.session.add_all([
+        Newsletter(
+            title=f'Newsletter {i}',
+            content='Lorem ipsum dolor sit amet. ' * 20,
+            summary=f'Summary {i}' if i % 2 else None,
+            visibility=['public', 'private', 'premium'][i % 3],
+            creator_id=users[i % 20].id,
+            created_at=now - timedelta(hours=i)
+        )
+        for i in range(600)
+    ])
+    db.session.add_all([
+        Subscription(
+            user_id=user.id,
+            tier='premium' if i % 4 == 0 else 'free',
+            status='active' if i % 5 else 'cancelled',
+            stripe_subscription_id=f'sub_{i}',
+            expires_at=now + timedelta(days=i % 40 - 5)
+        )
+        for i, user in enumerate(users)
+    ])
+    db.session.add_all([
+        Payment(user_id=user.id, stripe_session_id=f'cs_{i}', amount=0, status='pending')
+        for i, user in enumerate(users)
+    ])
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+def exercise():
+    """Drive the routes and tasks whose queries should be indexed"""
+    client = app.test_client()
+    stripe_service = StripeService()
+
+    # Newsletter reads, for anonymous, free and premium callers
+    for user_id in ('', '&user_id=2', '&user_id=1'):
+        first = client.get(f'/api/newsletters?limit=10{user_id}').get_json()
+        client.get(f"/api/newsletters?limit=10&cursor={first['next_cursor']}{user_id}")
+        client.get(f'/api/newsletters?limit=10&visibility=premium&fields=id,title,content{user_id}')
+        client.get(f'/api/newsletters/3?x=1{user_id}')
+        client.get(f'/api/check-access/3?x=1{user_id}')
+        client.get(f'/api/newsletters/search?q=lorem+ipsum&limit=10{user_id}')
+        entitlement_cache.clear()
+
+    client.get('/api/user-stats/5')
+    client.get('/api/subscription-status/5')
+
+    # Creator and subscription writes
+    client.put('/api/set-visibility/7', json={'visibility': 'premium', 'user_id': 8})
+    client.put('/api/newsletters/7', json={'summary': 'Updated summary'})
+    client.put('/api/newsletters/bulk', json={'newsletter_ids': [22, 42, 62], 'changes': {'visibility': 'premium'}, 'user_id': 2})
+
+    with mock.patch('src.routes.payments.process_new_subscription'):
+        client.post('/api/upgrade-to-premium', json={'user_id': 9})
+
+    with app.app_context():
+        stripe_service._handle_successful_payment({
+            'id': 'cs_3', 'client_reference_id': '3', 'mode': 'subscription',
+            'subscription': 'sub_3', 'amount_total': 900
+        })
+        stripe_service._handle_subscription_payment({'subscription': 'sub_4'})
+        stripe_service._handle_subscription_cancelled({'id': 'sub_5'})
+
+    # Background tasks, run in-process
+    from src.tasks.newsletter_tasks import send_newsletter_digest, send_new_newsletter_notification
+    from src.tasks.subscription_tasks import (
+        cleanup_expired_subscriptions, process_subscription_renewal, process_subscription_cancellation
+    )
+
+    send_newsletter_digest.apply()
+    client.get('/api/newsletters/digest?period=2000-01-01')  # cache miss: stored-artifact lookup
+    send_new_newsletter_notification.apply(args=[1])  # public: walks every user in keyset batches
+    cleanup_expired_subscriptions.apply()
+    process_subscription_renewal.apply(args=[11, 'sub_10'])
+    process_subscription_cancellation.apply(args=[12, 'sub_11'])
+
+    # Outbox drain: claims, marks and stale-claim recovery (no provider key, so sends are refused)
+    from src.tasks.email_tasks import drain_email_outbox
+    drain_email_outbox.apply()
+
+def capture(func):
+    """Run func and return the distinct (statement, parameters) pairs it issued"""
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.setdefault(statement, parameters)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    return statements
+
+def unindexed_scans(connection, statement, parameters):
+    """Return the plan lines that scan a table without an index"""
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    details = [row[-1] for row in plan]
+    return details, [detail for detail in details if detail.startswith('SCAN') and not INDEXED_SCAN.search(detail)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='Print the plan of every statement')
+    args = parser.parse_args()
+
+    # Run tasks in-process with an in-memory result backend for update_state
+    celery_app.conf.update(task_always_eager=True, result_backend='cache+memory://')
+    logging.disable(logging.CRITICAL)
+
+    with app.app_context():
+        seed()
+        statements = capture(exercise)
+
+        failures = 0
+        connection = db.session.connection()
+        for statement, parameters in statements.items():
+            details, scans = unindexed_scans(connection, statement, parameters)
+            expected = next((reason for pattern, reason in EXPECTED_SCANS.items() if re.search(pattern, statement.strip())), None)
+            summary = re.sub(r'^SELECT .*? FROM ', 'SELECT … FROM ', ' '.join(statement.split()))[:140]
+
+            if scans and not expected:
+                failures += 1
+                print(f"❌ {summary}")
+                for detail in details:
+                    print(f"      {detail}")
+            elif args.verbose or (scans and expected):
+                print(f"{'⚠️ ' if scans else '✅'} {summary}" + (f"  [{expected}]" if scans else ''))
+                if args.verbose:
+                    for detail in details:
+                        print(f"      {detail}")
+
+    print(f"\nChecked {len(statements)} distinct statement(s)")
+    if failures:
+        print(f"❌ {failures} statement(s) scan a table without an index")
+        sys.exit(1)
+
+    print("✅ Every statement uses an index (or is an expected full read)")
+
+if __name__ == '__main__':
+    main()
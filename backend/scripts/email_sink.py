@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SendGrid and Mailgun send APIs.
+
+Accepts POST /v3/mail/send (SendGrid, answers 202) and
+POST /v3/<domain>/messages (Mailgun, answers 200 with a message id), counts
+requests and recipients, and can misbehave on purpose:
+
+  --latency-ms     processing time per accepted request (plus --jitter-ms)
+  --error-rate     fraction of requests answered 500
+  --throttle-rate  fraction of requests answered 429
+  --rate-limit     requests per second allowed in any one-second window;
+                   beyond that, 429 with Retry-After
+
+GET /stats returns the counters as JSON. Point the app at it with
+EMAIL_PROVIDER=local (LOCAL_EMAIL_URL defaults to http://127.0.0.1:8025).
+
+Usage:
+    python scripts/email_sink.py [--port 8025] [--latency-ms 0] [--jitter-ms 0]
+                                 [--error-rate 0] [--throttle-rate 0] [--rate-limit 0]
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import collections
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAILGUN_PATH = re.compile(r'^/v3/[^/]+/messages$')
+
+class SinkConfig:
+    """How the sink behaves; shared by every handler thread"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 rate_limit=0, retry_after=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+
+        self.lock = threading.Lock()
+        self.window = collections.deque()
+        self.counters = collections.Counter()
+
+    def count(self, **increments):
+        with self.lock:
+            self.counters.update(increments)
+
+    def over_rate_limit(self):
+        """Record a request in the one-second window; True when it exceeds rate_limit"""
+        if not self.rate_limit:
+            return False
+
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0] >= 1:
+                self.window.popleft()
+            if len(self.window) >= self.rate_limit:
+                return True
+            self.window.append(now)
+            return False
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+def count_recipients(path, content_type, body):
+    """Recipients in a SendGrid JSON payload or a Mailgun form"""
+    if path == '/v3/mail/send':
+        payload = json.loads(body or b'{}')
+        return sum(len(personalization.get('to', [])) for personalization in payload.get('personalizations', []))
+
+    if content_type.startswith('application/x-www-form-urlencoded'):
+        return len(parse_qs(body.decode()).get('to', []))
+
+    # multipart/form-data: one "to" part per recipient
+    return body.count(b'name="to"')
+
+class EmailSinkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, a reused
+    # connection would stall on the client's delayed ACK
+    disable_nagle_algorithm = True
+    config = SinkConfig()
+
+    def _respond(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._respond(200, json.dumps(self.config.stats()).encode())
+        else:
+            self._respond(404)
+
+    def do_POST(self):
+        config = self.config
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        sendgrid = self.path == '/v3/mail/send'
+        if not sendgrid and not MAILGUN_PATH.match(self.path):
+            self._respond(404)
+            return
+
+        recipients = count_recipients(self.path, self.headers.get('Content-Type', ''), body)
+        config.count(requests=1)
+
+        if config.over_rate_limit() or random.random() < config.throttle_rate:
+            config.count(throttled=1, throttled_recipients=recipients)
+            self._respond(429, headers={'Retry-After': str(config.retry_after)})
+            return
+
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+
+        if random.random() < config.error_rate:
+            config.count(errors=1, error_recipients=recipients)
+            self._respond(500, b'{"message": "Injected failure"}')
+            return
+
+        config.count(accepted=1, recipients=recipients)
+        if sendgrid:
+            self._respond(202)
+        else:
+            self._respond(200, b'{"id": "<sink@localhost>", "message": "Queued. Thank you."}')
+
+    def log_message(self, *args):
+        pass
+
+class EmailSinkServer(ThreadingHTTPServer):
+    # Room for many clients connecting at once (the default backlog is 5)
+    request_queue_size = 256
+    daemon_threads = True
+
+def create_sink(port=0, host='127.0.0.1', **config):
+    """Create a sink server with its own config; serve_forever() it yourself"""
+    handler = type('EmailSinkHandler', (EmailSinkHandler,), {'config': SinkConfig(**config)})
+    return EmailSinkServer((host, port), handler)
+
+def start_sink(port=0, host='127.0.0.1', **config):
+    """Start a sink in a background thread and return (server, base_url)"""
+    server = create_sink(port, host, **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025, help='0 picks a free port')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0, help='Requests per second, 0 for none')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds on 429s')
+    args = parser.parse_args()
+
+    server = create_sink(
+        args.port, args.host,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit, retry_after=args.retry_after
+    )
+    # First line is machine-readable so a parent process can find the port
+    print(f'http://{args.host}:{server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,11 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from kombu import Queue
 
+# Queue of the tasks that call the OpenAI API
+AI_QUEUE = 'ai'
+
 # Create Celery instance
 celery_app = Celery('manus_ai_newsletter')
 
@@ -21,14 +25,14 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
     task_routes={
         'src.tasks.email_tasks.*': {'queue': 'email'},
-        'src.tasks.ai_tasks.*': {'queue': 'ai'},
+        'src.tasks.ai_tasks.*': {'queue': AI_QUEUE},
         'src.tasks.newsletter_tasks.*': {'queue': 'newsletter'},
     },
     task_default_queue='default',
     task_queues=(
         Queue('default'),
         Queue('email'),
-        Queue('ai'),
+        Queue(AI_QUEUE),
         Queue('newsletter'),
     ),
     beat_schedule={
@@ -36,6 +40,12 @@ celery_app.conf.update(
             'task': 'src.tasks.newsletter_tasks.send_newsletter_digest',
             'schedule': 86400.0,  # Run daily
         },
+        'drain-email-outbox': {
+            'task': 'src.tasks.email_tasks.drain_email_outbox',
+            'schedule': float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5)),
+            # Any run drains everything due, so stale queued runs are dropped
+            'options': {'expires': float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5))},
+        },
         'cleanup-expired-subscriptions': {
             'task': 'src.tasks.subscription_tasks.cleanup_expired_subscriptions',
             'schedule': 3600.0,  # Run hourly
@@ -51,6 +61,25 @@ celery_app.autodiscover_tasks([
     'src.tasks.subscription_tasks',
 ])
 
+@worker_process_init.connect
+def warm_worker_process(**kwargs):
+    """Set up this worker process's shared AI client before its first task
+    
+    Only workers consuming the AI queue (all queues, or -Q including it)
+    warm up; email and newsletter workers never call the API, so they
+    would hold an idle connection for nothing.
+    """
+    if AI_QUEUE not in celery_app.amqp.queues.consume_from:
+        return
+    
+    from src.services.ai_client import warm_ai_client
+    warm_ai_client(connect=os.getenv('AI_CLIENT_PRECONNECT', 'true').lower() == 'true')
+
+@worker_process_shutdown.connect
+def close_worker_process(**kwargs):
+    from src.services.ai_client import close_ai_client
+    close_ai_client()
+
 if __name__ == '__main__':
     celery_app.start()
 
@@ -0,0 +1,91 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam
+from src.models.user import db
+from src.models.newsletter import Newsletter, build_preview
+from src.migrations import upgrade_schema
+from src.services.content_stats import rebuild_counters
+from src.services.search import rebuild_search_index
+from src.services.digest import build_digest
+
+BATCH_SIZE = 500
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Add tables, columns and indexes missing from an existing database"""
+    db.create_all()
+    changes = upgrade_schema()
+    click.echo(f"Schema up to date ({len(changes)} change(s) applied)")
+
+@click.command('backfill-previews')
+@click.option('--all', 'refresh_all', is_flag=True, help='Recompute every preview, not just missing ones')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+@with_appcontext
+def backfill_previews_command(refresh_all, batch_size):
+    """Compute the stored premium teaser for existing newsletters"""
+    last_id = 0
+    updated = 0
+
+    while True:
+        query = db.session.query(Newsletter.id, Newsletter.content, Newsletter.summary).filter(
+            Newsletter.id > last_id
+        )
+        if not refresh_all:
+            query = query.filter(Newsletter.preview.is_(None))
+
+        rows = query.order_by(Newsletter.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        # Keep updated_at as is: a backfill is not an edit
+        table = Newsletter.__table__
+        db.session.execute(
+            table.update().where(
+                table.c.id == bindparam('row_id')
+            ).values(preview=bindparam('row_preview'), updated_at=table.c.updated_at),
+            [{'row_id': row.id, 'row_preview': build_preview(row.content, row.summary)} for row in rows]
+        )
+        db.session.commit()
+
+        updated += len(rows)
+        last_id = rows[-1].id
+
+    click.echo(f"Backfilled previews for {updated} newsletter(s)")
+
+@click.command('rebuild-counters')
+@with_appcontext
+def rebuild_counters_command():
+    """Recompute the materialized newsletter counters from the newsletter table"""
+    rows = rebuild_counters()
+    click.echo(f"Rebuilt {rows} counter row(s)")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Re-index every newsletter for full-text search"""
+    rebuild_search_index()
+    click.echo("Rebuilt the newsletter search index")
+
+@click.command('build-digest')
+@click.option('--period', help='UTC date (YYYY-MM-DD) that has ended, defaults to yesterday')
+@click.option('--force', is_flag=True, help='Store a new version even if the period has one')
+@with_appcontext
+def build_digest_command(period, force):
+    """Build the stored newsletter digest for a period"""
+    try:
+        digest = build_digest(period, force=force)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if digest is None:
+        click.echo(f"No newsletters for {period or 'yesterday'}, no digest built")
+    else:
+        click.echo(f"Digest {digest['period']} v{digest['version']}: {len(digest['newsletter_ids'])} newsletter(s)")
+
+def register_commands(app):
+    """Register the maintenance CLI commands on the Flask app"""
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(backfill_previews_command)
+    app.cli.add_command(rebuild_counters_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(build_digest_command)
@@ -9,12 +9,17 @@ from src.models.user import db
 from src.models.newsletter import Newsletter
 from src.models.subscription import Subscription
 from src.models.payment import Payment
+from src.models.content_counter import ContentCounter
+from src.models.email_outbox import EmailOutbox
+from src.models.digest_artifact import DigestArtifact
 from src.routes.user import user_bp
 from src.routes.newsletter import newsletter_bp
 from src.routes.ai_content import ai_content_bp
 from src.routes.payments import payments_bp
 from src.routes.content_access import content_access_bp
 from src.routes.tasks import tasks_bp
+from src.migrations import upgrade_schema
+from src.commands import register_commands
 
 # Initialize Celery
 from src.celery_app import celery_app
@@ -41,6 +46,9 @@ def create_app():
     
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+
+    register_commands(app)
 
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
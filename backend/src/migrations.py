@@ -0,0 +1,102 @@
+import logging
+from sqlalchemy import inspect, text
+from src.models.user import db
+from src.models.content_counter import ContentCounter
+from src.services.content_stats import seed_counters
+from src.services.search import create_search_index
+
+logger = logging.getLogger(__name__)
+
+# Columns added to existing tables after their first release, as (table, column).
+# db.create_all() only creates missing tables, so these are added in place.
+ADDED_COLUMNS = [
+    ('newsletter', 'preview'),
+]
+
+def add_missing_columns():
+    """Add columns declared on the models but missing from existing tables"""
+    inspector = inspect(db.engine)
+    added = []
+
+    for table_name, column_name in ADDED_COLUMNS:
+        if not inspector.has_table(table_name):
+            continue
+
+        existing = {column['name'] for column in inspector.get_columns(table_name)}
+        if column_name in existing:
+            continue
+
+        column = db.metadata.tables[table_name].c[column_name]
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'))
+        added.append(f'added column {table_name}.{column_name}')
+
+    db.session.commit()
+    return added
+
+def backfill_newsletter_created_at():
+    """Give undated newsletters a created_at, which keyset pagination needs on every row
+
+    Tables created before the column was NOT NULL may hold NULLs; they get
+    their updated_at (or now). SQLite cannot add the constraint in place,
+    other databases get it once the column is filled.
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('newsletter'):
+        return []
+
+    changes = []
+    result = db.session.execute(text(
+        'UPDATE newsletter SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL'
+    ))
+    if result.rowcount:
+        changes.append(f'backfilled newsletter.created_at on {result.rowcount} row(s)')
+
+    column = next(column for column in inspector.get_columns('newsletter') if column['name'] == 'created_at')
+    if column['nullable'] and db.engine.dialect.name != 'sqlite':
+        db.session.execute(text('ALTER TABLE newsletter ALTER COLUMN created_at SET NOT NULL'))
+        changes.append('newsletter.created_at set NOT NULL')
+
+    db.session.commit()
+    return changes
+
+def create_missing_indexes():
+    """Create indexes declared on the models but missing from existing tables"""
+    inspector = inspect(db.engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(f'created index {index.name}')
+
+    return created
+
+def seed_content_counters():
+    """Populate the newsletter counters table the first time it exists
+
+    Runs at every process start; processes booting together may all find
+    the table empty, so seeding only inserts counters that are missing.
+    """
+    if db.session.query(ContentCounter.scope).first() is not None:
+        return []
+
+    if not seed_counters():
+        return []
+    return ['content_counter (seeded)']
+
+def upgrade_schema():
+    """Bring an existing database up to the current models (safe to run repeatedly)"""
+    changes = add_missing_columns()
+    changes += backfill_newsletter_created_at()
+    changes += create_missing_indexes()
+    changes += seed_content_counters()
+    changes += create_search_index()
+    for change in changes:
+        logger.info(f"Schema upgrade: {change}")
+    return changes
@@ -0,0 +1,21 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class ContentCounter(db.Model):
+    """Materialized newsletter counts, kept in step with every newsletter write"""
+    scope = db.Column(db.String(20), primary_key=True)  # visibility, creator
+    key = db.Column(db.String(50), primary_key=True)  # visibility value or creator id
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ContentCounter {self.scope}:{self.key}={self.count}>'
+
+    def to_dict(self):
+        return {
+            'scope': self.scope,
+            'key': self.key,
+            'count': self.count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
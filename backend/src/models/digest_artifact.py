@@ -0,0 +1,43 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+import json
+from src.models.user import db
+
+class DigestArtifact(db.Model):
+    """A newsletter digest built once for a period and read by every send, retry and preview
+
+    Rebuilding a period adds a new version rather than changing the stored
+    one, so a send in progress keeps the content it started with.
+    """
+    __tablename__ = 'digest_artifact'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)  # UTC date, YYYY-MM-DD
+    version = db.Column(db.Integer, nullable=False, default=1)
+    newsletter_ids = db.Column(db.Text, nullable=False)  # JSON list, in digest order
+    sections = db.Column(db.Text, nullable=False)  # JSON list of {newsletter_id, title, excerpt}
+    subject = db.Column(db.String(200), nullable=False)
+    html = db.Column(db.Text, nullable=False)  # shared rendering, per-recipient slots left open
+    text = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Latest version of a period; also stops two builders writing the same version
+        db.UniqueConstraint('period', 'version', name='uq_digest_artifact_period_version'),
+    )
+
+    def __repr__(self):
+        return f'<DigestArtifact {self.period} v{self.version}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'period': self.period,
+            'version': self.version,
+            'newsletter_ids': json.loads(self.newsletter_ids),
+            'sections': json.loads(self.sections),
+            'subject': self.subject,
+            'html': self.html,
+            'text': self.text,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,61 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+import json
+from src.models.user import db
+
+# Lifecycle of an outbox row:
+#   pending -> claimed (taken by a drainer) -> sending (provider request about to go out) -> sent
+# A claimed row that was never sent goes back to pending; a row left in sending
+# may or may not have reached the provider, so it is failed instead of resent.
+OUTBOX_STATUSES = ['pending', 'claimed', 'sending', 'sent', 'failed']
+
+class EmailOutbox(db.Model):
+    """A transactional email recorded with the event that caused it, sent later in bulk"""
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # email template name
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    context = db.Column(db.Text, nullable=True)  # JSON template context shared by the kind
+    substitutions = db.Column(db.Text, nullable=True)  # JSON per-recipient values
+    dedupe_key = db.Column(db.String(200), nullable=True, unique=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claim_token = db.Column(db.String(36), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Drainer claims (status = 'pending' ORDER BY id) and stale-claim recovery
+        db.Index('ix_email_outbox_status_id', 'status', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.kind} to {self.to_email} - {self.status}>'
+
+    @property
+    def context_dict(self):
+        return json.loads(self.context) if self.context else {}
+
+    @property
+    def substitutions_dict(self):
+        return json.loads(self.substitutions) if self.substitutions else {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'user_id': self.user_id,
+            'to_email': self.to_email,
+            'context': self.context_dict,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -1,24 +1,61 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import case, event, func, inspect, literal
 from src.models.user import db
 
+UPGRADE_BANNER = "\n\n**Upgrade to Premium to read the full newsletter!**"
+PREVIEW_LENGTH = 200
+
+def build_preview(content, summary):
+    """Build the teaser shown to readers without premium access"""
+    if summary:
+        return summary + UPGRADE_BANNER
+    
+    # Generate a teaser from the first 200 characters
+    content = content or ''
+    content_preview = content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+    return content_preview + UPGRADE_BANNER
+
+def preview_expression(content_column, summary):
+    """SQL counterpart of build_preview, for set-based updates that bypass the ORM"""
+    if summary:
+        return literal(build_preview(None, summary))
+    
+    teaser = case(
+        (func.length(content_column) > PREVIEW_LENGTH, func.substr(content_column, 1, PREVIEW_LENGTH) + '...'),
+        else_=func.coalesce(content_column, '')
+    )
+    return teaser + UPGRADE_BANNER
+
 class Newsletter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.Text, nullable=True)
+    preview = db.Column(db.Text, nullable=True)  # premium teaser, computed on write
     visibility = db.Column(db.String(20), default='public')  # public, private, premium
-    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination position
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationship
     creator = db.relationship('User', backref=db.backref('newsletters', lazy=True))
+    
+    __table_args__ = (
+        # Keyset pages over the whole catalog: ORDER BY created_at DESC, id DESC
+        db.Index('ix_newsletter_created_at_id', 'created_at', 'id'),
+        # Pages filtered to one visibility, and the digest's recent public/premium scan
+        db.Index('ix_newsletter_visibility_created_at', 'visibility', 'created_at', 'id'),
+    )
 
     def __repr__(self):
         return f'<Newsletter {self.title}>'
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
+        if fields is not None:
+            # Only touch the requested attributes so deferred columns stay unloaded
+            return {field: self._serialize_field(field) for field in fields}
+        
         return {
             'id': self.id,
             'title': self.title,
@@ -29,4 +66,26 @@ class Newsletter(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+    
+    def refresh_preview(self):
+        self.preview = build_preview(self.content, self.summary)
+    
+    def _serialize_field(self, field):
+        value = getattr(self, field)
+        if field in ('created_at', 'updated_at'):
+            return value.isoformat() if value else None
+        return value
+
+# Fields that can be requested through the `fields=` projection
+NEWSLETTER_FIELDS = ['id', 'title', 'content', 'summary', 'preview', 'visibility', 'creator_id', 'created_at', 'updated_at']
+
+@event.listens_for(Newsletter, 'before_insert')
+def _preview_on_insert(mapper, connection, target):
+    target.refresh_preview()
+
+@event.listens_for(Newsletter, 'before_update')
+def _preview_on_update(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.content.history.has_changes() or state.attrs.summary.history.has_changes():
+        target.refresh_preview()
 
@@ -5,7 +5,7 @@ from src.models.user import db
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    stripe_session_id = db.Column(db.String(100), nullable=False)
+    stripe_session_id = db.Column(db.String(100), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     currency = db.Column(db.String(3), default='USD')
     status = db.Column(db.String(20), default='pending')  # pending, completed, failed, refunded
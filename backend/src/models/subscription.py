@@ -4,9 +4,9 @@ from src.models.user import db
 
 class Subscription(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     tier = db.Column(db.String(20), default='free')  # free, premium
-    stripe_subscription_id = db.Column(db.String(100), nullable=True)
+    stripe_subscription_id = db.Column(db.String(100), nullable=True, index=True)
     status = db.Column(db.String(20), default='active')  # active, cancelled, expired
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=True)
@@ -14,6 +14,11 @@ class Subscription(db.Model):
     # Relationship
     user = db.relationship('User', backref=db.backref('subscription', uselist=False))
 
+    __table_args__ = (
+        # Expiry cleanup (status = 'active' AND expires_at < now) and active-subscriber fan-outs
+        db.Index('ix_subscription_status_expires_at', 'status', 'expires_at'),
+    )
+
     def __repr__(self):
         return f'<Subscription {self.user_id} - {self.tier}>'
 
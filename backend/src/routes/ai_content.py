@@ -1,11 +1,51 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from src.services.ai_writer import AIWriter
+from src.services.summarizer import SUMMARIZERS
 from src.models.user import db
 from src.models.newsletter import Newsletter
 
 ai_content_bp = Blueprint('ai_content', __name__)
 ai_writer = AIWriter()
 
+def _sse(event: str, data: dict) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _event_stream(events) -> Response:
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        # Stop proxies (nginx) from buffering the stream into one late response
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _invalid_summarizer(data: dict):
+    """400 response for an unknown summarizer in the request, or None"""
+    summarizer = data.get('summarizer')
+    if summarizer is not None and summarizer not in SUMMARIZERS:
+        return jsonify({
+            'success': False,
+            'error': f"summarizer must be one of: {', '.join(SUMMARIZERS)}"
+        }), 400
+    return None
+
+def _save_newsletter(newsletter_data: dict, creator_id: int):
+    """Store generated newsletter content as a public newsletter"""
+    newsletter = Newsletter(
+        title=newsletter_data['title'],
+        content=newsletter_data['content'],
+        summary=newsletter_data['summary'],
+        visibility='public',  # Default to public
+        creator_id=creator_id
+    )
+    
+    db.session.add(newsletter)
+    db.session.commit()
+    
+    newsletter_data['id'] = newsletter.id
+    newsletter_data['saved'] = True
+
 @ai_content_bp.route('/generate-ideas', methods=['POST'])
 def generate_newsletter_ideas():
     """Generate newsletter ideas based on niche"""
@@ -13,6 +53,7 @@ def generate_newsletter_ideas():
         data = request.get_json() or {}
         niche = data.get('niche')
         count = data.get('count', 5)
+        use_cache = data.get('use_cache', True)
         
         # Validate count
         if count > 10:
@@ -20,7 +61,7 @@ def generate_newsletter_ideas():
         elif count < 1:
             count = 1
         
-        ideas = ai_writer.generate_newsletter_ideas(niche, count)
+        ideas = ai_writer.generate_newsletter_ideas(niche, count, use_cache=use_cache)
         
         return jsonify({
             'success': True,
@@ -47,29 +88,23 @@ def write_newsletter():
                 'error': 'Topic is required'
             }), 400
         
+        invalid = _invalid_summarizer(data)
+        if invalid:
+            return invalid
+        
         topic = data['topic']
         target_audience = data.get('target_audience')
         auto_save = data.get('auto_save', False)
         creator_id = data.get('creator_id', 1)  # Default creator for demo
+        use_cache = data.get('use_cache', True)  # False forces a fresh completion
+        summarizer = data.get('summarizer')  # extractive (default) or llm
         
         # Generate newsletter content
-        newsletter_data = ai_writer.write_newsletter(topic, target_audience)
+        newsletter_data = ai_writer.write_newsletter(topic, target_audience, use_cache=use_cache, summarizer=summarizer)
         
         # Auto-save if requested
         if auto_save:
-            newsletter = Newsletter(
-                title=newsletter_data['title'],
-                content=newsletter_data['content'],
-                summary=newsletter_data['summary'],
-                visibility='public',  # Default to public
-                creator_id=creator_id
-            )
-            
-            db.session.add(newsletter)
-            db.session.commit()
-            
-            newsletter_data['id'] = newsletter.id
-            newsletter_data['saved'] = True
+            _save_newsletter(newsletter_data, creator_id)
         else:
             newsletter_data['saved'] = False
         
@@ -86,6 +121,55 @@ def write_newsletter():
             'error': str(e)
         }), 500
 
+@ai_content_bp.route('/write-newsletter/stream', methods=['POST'])
+def stream_newsletter():
+    """Generate a complete newsletter, streaming it as Server-Sent Events
+    
+    Sends a 'token' event per piece of content as it is generated, then
+    'done' with the same newsletter object as /write-newsletter (saved
+    first when auto_save is set), or 'error' if generation fails.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not data.get('topic'):
+        return jsonify({
+            'success': False,
+            'error': 'Topic is required'
+        }), 400
+    
+    invalid = _invalid_summarizer(data)
+    if invalid:
+        return invalid
+    
+    topic = data['topic']
+    target_audience = data.get('target_audience')
+    auto_save = data.get('auto_save', False)
+    creator_id = data.get('creator_id', 1)  # Default creator for demo
+    use_cache = data.get('use_cache', True)
+    summarizer = data.get('summarizer')
+    
+    def events():
+        try:
+            for event in ai_writer.stream_newsletter(topic, target_audience, use_cache=use_cache, summarizer=summarizer):
+                if event['type'] == 'token':
+                    yield _sse('token', {'text': event['text']})
+                    continue
+                
+                newsletter_data = event['newsletter']
+                if auto_save:
+                    _save_newsletter(newsletter_data, creator_id)
+                else:
+                    newsletter_data['saved'] = False
+                
+                yield _sse('done', {'success': True, 'newsletter': newsletter_data})
+                
+        except Exception as e:
+            if auto_save:
+                db.session.rollback()
+            yield _sse('error', {'success': False, 'error': str(e)})
+    
+    return _event_stream(events())
+
 @ai_content_bp.route('/enhance-content', methods=['POST'])
 def enhance_content():
     """Enhance existing newsletter content"""
@@ -101,24 +185,7 @@ def enhance_content():
         content = data['content']
         enhancement_type = data.get('type', 'improve')  # improve, shorten, expand
         
-        # Create enhancement prompt based on type
-        if enhancement_type == 'shorten':
-            prompt = f"Make this newsletter content more concise while keeping the key points:\n\n{content}"
-        elif enhancement_type == 'expand':
-            prompt = f"Expand this newsletter content with more details and examples:\n\n{content}"
-        else:  # improve
-            prompt = f"Improve this newsletter content to make it more engaging and valuable:\n\n{content}"
-        
-        response = ai_writer.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert content editor for newsletters. Enhance content while maintaining the original voice and message."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.6
-        )
-        
-        enhanced_content = response.choices[0].message.content
+        enhanced_content = ai_writer.enhance_content(content, enhancement_type, use_cache=data.get('use_cache', True))
         
         return jsonify({
             'success': True,
@@ -133,3 +200,40 @@ def enhance_content():
             'error': str(e)
         }), 500
 
+@ai_content_bp.route('/enhance-content/stream', methods=['POST'])
+def stream_enhanced_content():
+    """Enhance existing newsletter content, streaming it as Server-Sent Events
+    
+    Sends a 'token' event per piece of enhanced content, then 'done' with
+    the same fields as /enhance-content, or 'error' if enhancement fails.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not data.get('content'):
+        return jsonify({
+            'success': False,
+            'error': 'Content is required'
+        }), 400
+    
+    content = data['content']
+    enhancement_type = data.get('type', 'improve')  # improve, shorten, expand
+    use_cache = data.get('use_cache', True)
+    
+    def events():
+        try:
+            parts = []
+            for text in ai_writer.stream_enhancement(content, enhancement_type, use_cache=use_cache):
+                parts.append(text)
+                yield _sse('token', {'text': text})
+            
+            yield _sse('done', {
+                'success': True,
+                'original_content': content,
+                'enhanced_content': ''.join(parts),
+                'enhancement_type': enhancement_type
+            })
+            
+        except Exception as e:
+            yield _sse('error', {'success': False, 'error': str(e)})
+    
+    return _event_stream(events())
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from src.services.content_manager import ContentVisibilityManager
+from src.services.entitlements import entitlement_cache
+from src.services.response_cache import response_cache
+from src.services.completion_cache import completion_cache
 
 content_access_bp = Blueprint('content_access', __name__)
 content_manager = ContentVisibilityManager()
@@ -108,3 +111,21 @@ def get_access_summary():
             'error': str(e)
         }), 500
 
+@content_access_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss counters for the content caches in this process"""
+    try:
+        return jsonify({
+            'success': True,
+            'caches': {
+                'newsletter_responses': response_cache.stats(),
+                'entitlements': entitlement_cache.stats(),
+                'ai_completions': completion_cache.stats()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -1,56 +1,315 @@
-from flask import Blueprint, request, jsonify
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer, load_only
 from src.models.user import db, User
-from src.models.newsletter import Newsletter
+from src.models.newsletter import Newsletter, NEWSLETTER_FIELDS
 from src.models.subscription import Subscription
 from src.services.content_manager import ContentVisibilityManager
+from src.services.content_stats import catalog_version
+from src.services.response_cache import response_cache, is_cacheable
+from src.services import search as search_index
+from src.services.digest import (
+    digest_period, draft_digest, get_digest, last_complete_period, period_ended
+)
+from src.services.email_templates import personalize
 
 newsletter_bp = Blueprint('newsletter', __name__)
 content_manager = ContentVisibilityManager()
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def _encode_cursor(newsletter):
+    """Encode the (created_at, id) keyset position of the last row on a page"""
+    payload = json.dumps([newsletter.created_at.isoformat(), newsletter.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Decode a cursor from _encode_cursor, raising ValueError if it is malformed"""
+    try:
+        created_at, newsletter_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(newsletter_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _parse_fields(fields_param):
+    """Parse the comma-separated `fields=` projection, or None for every field"""
+    if not fields_param:
+        return None
+    
+    fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in NEWSLETTER_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {unknown}. Must be among: {NEWSLETTER_FIELDS}')
+    return fields
+
+def _apply_projection(query, fields):
+    """Load only the columns a page needs for the requested fields
+    
+    Bodies are never part of the page query: previews use the stored teaser
+    and full rows get their content in one follow-up query.
+    """
+    if fields is None:
+        return query.options(defer(Newsletter.content))
+    
+    # Always load what access control and the cursor need
+    columns = (set(fields) - {'content'}) | {'id', 'visibility', 'created_at'}
+    if 'content' in fields:
+        columns.add('preview')
+    return query.options(load_only(*[getattr(Newsletter, column) for column in columns]))
+
+def _make_etag(*parts):
+    """Hash the parts that identify a representation into an ETag value"""
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+def _set_validators(response, etag, last_modified, weak=False):
+    """Attach ETag/Last-Modified and make clients revalidate before reuse"""
+    response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _not_modified(etag, last_modified, weak=False):
+    """Return a 304 response when the request's validators still match, else None
+    
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        matched = last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= request.if_modified_since
+    else:
+        return None
+    
+    if not matched:
+        return None
+    
+    return _set_validators(Response(status=304), etag, last_modified, weak)
+
+def _detail_last_modified(visibility, updated_at):
+    """Last-Modified for a newsletter, only where the body does not depend on the reader's access"""
+    return updated_at if visibility == 'public' else None
+
 @newsletter_bp.route('/newsletters', methods=['GET'])
 def get_newsletters():
-    """Get newsletters with proper access control"""
+    """Get a page of newsletters with proper access control
+    
+    Pages are keyset-paginated on (created_at, id), newest first. Pass the
+    returned next_cursor as `cursor` to fetch the following page.
+    """
     try:
         user_id = request.args.get('user_id', type=int)
         visibility_filter = request.args.get('visibility', 'all')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        try:
+            fields = _parse_fields(request.args.get('fields'))
+            cursor = request.args.get('cursor')
+            position = _decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Weak validator: any newsletter write moves the catalog version. No
+        # Last-Modified: deletes and access changes do not move max(updated_at),
+        # so If-Modified-Since alone would keep confirming stale pages
+        access_profile = content_manager.get_access_profile(user_id)
+        last_updated, total_newsletters = catalog_version()
+        etag = _make_etag(
+            'list', last_updated, total_newsletters, access_profile,
+            user_id, visibility_filter, limit, cursor, fields
+        )
+        not_modified = _not_modified(etag, None, weak=True)
+        if not_modified:
+            return not_modified
+        
+        # Rows the caller could never see are dropped in SQL so pages stay full
+        visibilities = [v for v, access in access_profile.items() if access != 'hidden']
+        if visibility_filter in ('public', 'private', 'premium'):
+            visibilities = [v for v in visibilities if v == visibility_filter]
+        
+        query = Newsletter.query.filter(Newsletter.visibility.in_(visibilities))
+        
+        if position:
+            query = query.filter(tuple_(Newsletter.created_at, Newsletter.id) < position)
         
-        # Build query based on visibility filter
-        if visibility_filter == 'public':
-            newsletters = Newsletter.query.filter_by(visibility='public').all()
-        elif visibility_filter == 'private':
-            newsletters = Newsletter.query.filter_by(visibility='private').all()
-        elif visibility_filter == 'premium':
-            newsletters = Newsletter.query.filter_by(visibility='premium').all()
-        else:  # all
-            newsletters = Newsletter.query.all()
+        query = _apply_projection(query, fields)
+        
+        newsletters = query.order_by(
+            Newsletter.created_at.desc(),
+            Newsletter.id.desc()
+        ).limit(limit + 1).all()
+        
+        has_more = len(newsletters) > limit
+        newsletters = newsletters[:limit]
         
         # Filter newsletters based on user access
-        accessible_newsletters = content_manager.filter_newsletters_by_access(newsletters, user_id)
+        accessible_newsletters = content_manager.filter_newsletters_by_access(newsletters, user_id, fields)
         
-        return jsonify({
+        response = jsonify({
             'newsletters': accessible_newsletters,
             'total': len(accessible_newsletters),
-            'user_id': user_id
+            'user_id': user_id,
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': _encode_cursor(newsletters[-1]) if has_more else None
         })
+        return _set_validators(response, etag, None, weak=True)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@newsletter_bp.route('/newsletters/search', methods=['GET'])
+def search_newsletters():
+    """Full-text search over newsletter titles, summaries and content
+    
+    Results are ranked best match first and paginated with limit/offset.
+    Access rules match the list endpoint: hidden newsletters never match
+    and premium hits come back as previews for non-premium readers.
+    """
+    try:
+        query_text = request.args.get('q', '').strip()
+        user_id = request.args.get('user_id', type=int)
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        if not query_text:
+            return jsonify({'error': 'Search query (q) is required'}), 400
+        
+        try:
+            fields = _parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        visibilities = content_manager.visible_visibilities(user_id)
+        query = search_index.search_newsletters(query_text, visibilities)
+        if query is None:
+            return jsonify({'error': 'Search query has no searchable terms'}), 400
+        
+        rows = _apply_projection(query, fields).limit(limit + 1).offset(offset).all()
+        
+        has_more = len(rows) > limit
+        newsletters = [newsletter for newsletter, rank in rows[:limit]]
+        
+        results = content_manager.filter_newsletters_by_access(newsletters, user_id, fields)
+        
+        return jsonify({
+            'newsletters': results,
+            'query': query_text,
+            'total': len(results),
+            'user_id': user_id,
+            'limit': limit,
+            'offset': offset,
+            'has_more': has_more,
+            'next_offset': offset + limit if has_more else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@newsletter_bp.route('/newsletters/digest', methods=['GET'])
+def preview_digest():
+    """Preview the newsletter digest for a period (default today, UTC)
+    
+    A period that has ended serves the same artifact the digest send uses,
+    from the digest cache, as JSON or with format=html as the email body;
+    only the last ended period is built on demand, earlier ones must
+    already exist. The day in progress is rendered as it stands, without
+    storing an artifact that would leave out its later newsletters.
+    """
+    try:
+        period = request.args.get('period', digest_period())
+        try:
+            datetime.strptime(period, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'period must be a date (YYYY-MM-DD)'}), 400
+        
+        if period_ended(period):
+            digest = get_digest(period, build=period == last_complete_period())
+        else:
+            digest = draft_digest(period)
+        if digest is None:
+            return jsonify({'error': f'No digest for {period}'}), 404
+        
+        # An artifact never changes; a rebuild is a new version with a new id.
+        # A draft has no id, its sections are what it renders from. The HTML
+        # body also depends on the username filled into it.
+        as_html = request.args.get('format') == 'html'
+        username = request.args.get('username', 'there') if as_html else None
+        version = digest['id'] or digest['sections']
+        etag = _make_etag('digest', period, version, 'html' if as_html else 'json', username)
+        not_modified = _not_modified(etag, None)
+        if not_modified:
+            return not_modified
+        
+        if as_html:
+            # username comes from the query string: escape it like any recipient value
+            html = personalize(digest['html'], {'username': username}, html=True)
+            response = Response(html, mimetype='text/html')
+        else:
+            response = jsonify({'success': True, 'digest': digest})
+        return _set_validators(response, etag, None)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @newsletter_bp.route('/newsletters/<int:newsletter_id>', methods=['GET'])
 def get_newsletter(newsletter_id):
-    """Get a specific newsletter with access control"""
+    """Get a specific newsletter with access control
+    
+    Full and summary responses carry a strong ETag over (id, updated_at,
+    access tier) and answer a matching If-None-Match with 304 before the
+    body is loaded. Only public newsletters, served the same to everyone,
+    also carry Last-Modified: an upgrade or a lapsed subscription changes
+    what a reader is served without moving updated_at. Public newsletters and
+    premium previews are the same for every reader of a tier, so their
+    rendered payloads are served from the shared response cache.
+    """
     try:
         user_id = request.args.get('user_id', type=int)
         
+        # Validators come from a metadata-only lookup, so a 304 never loads the body
+        metadata = db.session.query(Newsletter.visibility, Newsletter.updated_at).filter(
+            Newsletter.id == newsletter_id
+        ).first()
+        if metadata:
+            tier = content_manager.get_access_tier(metadata.visibility, user_id)
+            if tier != 'hidden':
+                etag = _make_etag(newsletter_id, metadata.updated_at, tier)
+                last_modified = _detail_last_modified(metadata.visibility, metadata.updated_at)
+                not_modified = _not_modified(etag, last_modified)
+                if not_modified:
+                    return not_modified
+            
+            if is_cacheable(metadata.visibility, tier):
+                updated_at = metadata.updated_at.isoformat() if metadata.updated_at else None
+                cached = response_cache.get(newsletter_id, tier, updated_at)
+                if cached:
+                    response = Response(cached['body'], status=cached['status'], mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return _set_validators(response, etag, last_modified)
+        
         access_result = content_manager.can_access_newsletter(newsletter_id, user_id)
         
+        if access_result['can_access'] or access_result['content_type'] == 'summary':
+            # Recompute from what was served in case the row changed in between
+            newsletter = access_result['newsletter']
+            updated_at = datetime.fromisoformat(newsletter['updated_at']) if newsletter.get('updated_at') else None
+            tier = content_manager.get_access_tier(newsletter['visibility'], user_id)
+            etag = _make_etag(newsletter_id, updated_at, tier)
+            last_modified = _detail_last_modified(newsletter['visibility'], updated_at)
+        
         if access_result['can_access']:
-            return jsonify({
+            response = jsonify({
                 'success': True,
                 'newsletter': access_result['newsletter'],
                 'access_type': access_result['content_type']
             })
         elif access_result['content_type'] == 'summary':
-            return jsonify({
+            response = jsonify({
                 'success': False,
                 'newsletter': access_result['newsletter'],
                 'access_type': 'summary',
@@ -63,6 +322,12 @@ def get_newsletter(newsletter_id):
                 'reason': access_result['reason'],
                 'upgrade_required': access_result.get('upgrade_required', False)
             }), 403
+        
+        if is_cacheable(newsletter['visibility'], tier):
+            response_cache.set(newsletter_id, tier, newsletter.get('updated_at'), response.get_data(as_text=True))
+            response.headers['X-Cache'] = 'MISS'
+        
+        return _set_validators(response, etag, last_modified)
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -119,6 +384,32 @@ def update_newsletter(newsletter_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@newsletter_bp.route('/newsletters/bulk', methods=['PUT'])
+def bulk_update_newsletters():
+    """Apply the same title/summary/visibility changes to many newsletters (creator only)"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('newsletter_ids'), list) or \
+                not isinstance(data.get('changes'), dict) or 'user_id' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'newsletter_ids (list), changes (object) and user_id are required'
+            }), 400
+        
+        result = content_manager.bulk_update_newsletters(data['newsletter_ids'], data['changes'], data['user_id'])
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @newsletter_bp.route('/newsletters/<int:newsletter_id>', methods=['DELETE'])
 def delete_newsletter(newsletter_id):
     """Delete a newsletter"""
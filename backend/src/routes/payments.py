@@ -3,7 +3,7 @@ from src.services.stripe_service import StripeService
 from src.models.user import db, User
 from src.models.subscription import Subscription
 from src.tasks.subscription_tasks import process_new_subscription, process_subscription_renewal, process_subscription_cancellation
-from src.tasks.email_tasks import send_payment_failed_notification
+from src.services.outbox import enqueue_email
 import logging
 
 logger = logging.getLogger(__name__)
@@ -173,8 +173,10 @@ def stripe_webhook():
                 ).first()
                 
                 if subscription:
-                    # Send payment failed notification asynchronously
-                    send_payment_failed_notification.delay(subscription.user_id)
+                    # Queue the payment failed notification; Stripe redelivers
+                    # events, so the event id keeps it to one email
+                    enqueue_email('payment_failed', subscription.user, dedupe_key=f"stripe:{event['id']}")
+                    db.session.commit()
                 
         elif event['type'] == 'customer.subscription.deleted':
             stripe_subscription = event['data']['object']
@@ -292,8 +294,10 @@ def test_webhook():
             
         elif event_type == 'invoice.payment_failed':
             # Simulate failed payment
-            user_id = data.get('user_id', 1)
-            send_payment_failed_notification.delay(user_id)
+            user = User.query.get(data.get('user_id', 1))
+            if user:
+                enqueue_email('payment_failed', user)
+                db.session.commit()
         
         return jsonify({
             'success': True,
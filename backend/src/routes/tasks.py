@@ -1,12 +1,18 @@
+import os
 from flask import Blueprint, request, jsonify
 from src.celery_app import celery_app
-from src.tasks.ai_tasks import generate_newsletter_content, generate_newsletter_ideas, enhance_newsletter_content
-from src.tasks.email_tasks import send_welcome_email, send_subscription_confirmation
+from src.services.summarizer import SUMMARIZERS
+from src.tasks.ai_tasks import (
+    generate_newsletter_content, generate_newsletters_bulk, generate_newsletter_ideas, enhance_newsletter_content
+)
+from src.tasks.email_tasks import send_welcome_email, send_subscription_confirmation, email_service
 from src.tasks.newsletter_tasks import send_newsletter_digest, send_new_newsletter_notification
 from src.tasks.subscription_tasks import process_new_subscription
 
 tasks_bp = Blueprint('tasks', __name__)
 
+BULK_MAX_TOPICS = int(os.getenv('AI_BULK_MAX_TOPICS', 20))
+
 @tasks_bp.route('/tasks/generate-content', methods=['POST'])
 def async_generate_content():
     """
@@ -21,17 +27,26 @@ def async_generate_content():
                 'error': 'Topic is required'
             }), 400
         
+        if data.get('summarizer') not in (None,) + SUMMARIZERS:
+            return jsonify({
+                'success': False,
+                'error': f"summarizer must be one of: {', '.join(SUMMARIZERS)}"
+            }), 400
+        
         topic = data['topic']
         target_audience = data.get('target_audience')
         creator_id = data.get('creator_id', 1)
         auto_save = data.get('auto_save', True)
+        use_cache = data.get('use_cache', True)
         
         # Start async task
         task = generate_newsletter_content.delay(
             topic=topic,
             target_audience=target_audience,
             creator_id=creator_id,
-            auto_save=auto_save
+            auto_save=auto_save,
+            use_cache=use_cache,
+            summarizer=data.get('summarizer')
         )
         
         return jsonify({
@@ -47,6 +62,69 @@ def async_generate_content():
             'error': str(e)
         }), 500
 
+@tasks_bp.route('/tasks/generate-content/bulk', methods=['POST'])
+def async_generate_content_bulk():
+    """
+    Generate a newsletter per topic asynchronously, up to AI_BULK_MAX_TOPICS
+    
+    Topics are generated concurrently (at most `concurrency`, default
+    AI_BULK_CONCURRENCY, at a time); /tasks/status reports each topic's
+    progress.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        topics = data.get('topics')
+        
+        if not isinstance(topics, list) or not topics or not all(isinstance(topic, str) and topic.strip() for topic in topics):
+            return jsonify({
+                'success': False,
+                'error': 'topics must be a non-empty list of topics'
+            }), 400
+        
+        if len(topics) > BULK_MAX_TOPICS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {BULK_MAX_TOPICS} topics per request'
+            }), 400
+        
+        if data.get('summarizer') not in (None,) + SUMMARIZERS:
+            return jsonify({
+                'success': False,
+                'error': f"summarizer must be one of: {', '.join(SUMMARIZERS)}"
+            }), 400
+        
+        concurrency = data.get('concurrency')
+        if concurrency is not None and (not isinstance(concurrency, int) or concurrency < 1):
+            return jsonify({
+                'success': False,
+                'error': 'concurrency must be a positive integer'
+            }), 400
+        
+        # Start async task
+        task = generate_newsletters_bulk.delay(
+            topics=topics,
+            target_audience=data.get('target_audience'),
+            creator_id=data.get('creator_id', 1),
+            auto_save=data.get('auto_save', True),
+            use_cache=data.get('use_cache', True),
+            summarizer=data.get('summarizer'),
+            concurrency=concurrency
+        )
+        
+        return jsonify({
+            'success': True,
+            'task_id': task.id,
+            'status': 'PENDING',
+            'topics': len(topics),
+            'message': 'Bulk content generation started'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @tasks_bp.route('/tasks/generate-ideas', methods=['POST'])
 def async_generate_ideas():
     """
@@ -64,7 +142,7 @@ def async_generate_ideas():
             count = 1
         
         # Start async task
-        task = generate_newsletter_ideas.delay(niche=niche, count=count)
+        task = generate_newsletter_ideas.delay(niche=niche, count=count, use_cache=data.get('use_cache', True))
         
         return jsonify({
             'success': True,
@@ -99,7 +177,8 @@ def async_enhance_content():
         # Start async task
         task = enhance_newsletter_content.delay(
             content=content,
-            enhancement_type=enhancement_type
+            enhancement_type=enhancement_type,
+            use_cache=data.get('use_cache', True)
         )
         
         return jsonify({
@@ -151,10 +230,15 @@ def async_send_welcome_email():
 def async_send_newsletter_digest():
     """
     Send newsletter digest asynchronously
+    
+    Sends the stored digest for the period (default today), building it
+    first if the period has none.
     """
     try:
+        data = request.get_json(silent=True) or {}
+        
         # Start async task
-        task = send_newsletter_digest.delay()
+        task = send_newsletter_digest.delay(period=data.get('period'))
         
         return jsonify({
             'success': True,
@@ -252,6 +336,8 @@ def get_task_status(task_id):
             }
         elif task.state == 'PROGRESS':
             response = {
+                # Task-specific detail first, e.g. per-topic progress of a bulk generation
+                **task.info,
                 'state': task.state,
                 'status': task.info.get('status', 'Processing...'),
                 'progress': task.info.get('progress', 0)
@@ -340,3 +426,22 @@ def get_task_stats():
             'error': str(e)
         }), 500
 
+@tasks_bp.route('/tasks/email-providers', methods=['GET'])
+def get_email_provider_stats():
+    """
+    Get health, throughput and error counters for each email provider
+    
+    State and counters are this process's view; totals cover every process
+    when Redis is available.
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'providers': email_service.provider_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
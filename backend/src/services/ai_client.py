@@ -0,0 +1,112 @@
+import os
+import logging
+import threading
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Celery gives worker_process_init handlers 4 seconds before it kills the child
+WARMUP_TIMEOUT = 2.0
+
+_client = None
+_http_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+def ai_client_settings() -> Dict:
+    """Connection pool, timeout and retry settings for OpenAI API requests"""
+    return {
+        'base_url': os.getenv('OPENAI_BASE_URL') or os.getenv('OPENAI_API_BASE') or None,
+        'pool_size': int(os.getenv('AI_HTTP_POOL_SIZE', 10)),
+        'connect_timeout': float(os.getenv('AI_HTTP_CONNECT_TIMEOUT', 5)),
+        # Completions of a full newsletter take tens of seconds; this bounds a stalled one
+        'read_timeout': float(os.getenv('AI_HTTP_READ_TIMEOUT', 120)),
+        'max_retries': int(os.getenv('AI_MAX_RETRIES', 2))
+    }
+
+def _http_options(settings: Dict) -> Dict:
+    import httpx
+
+    return {
+        'timeout': httpx.Timeout(settings['read_timeout'], connect=settings['connect_timeout']),
+        'limits': httpx.Limits(max_connections=settings['pool_size'], max_keepalive_connections=settings['pool_size'])
+    }
+
+def create_ai_client(http_client=None):
+    """Create an openai.OpenAI client on http_client, or on its own keep-alive connection pool"""
+    import httpx
+    import openai
+
+    settings = ai_client_settings()
+    return openai.OpenAI(
+        base_url=settings['base_url'],
+        max_retries=settings['max_retries'],
+        http_client=http_client or httpx.Client(**_http_options(settings))
+    )
+
+def create_async_ai_client():
+    """Create an openai.AsyncOpenAI client with the same settings
+
+    Async clients belong to the event loop they are used on, so callers
+    create them per asyncio.run() instead of sharing one process-wide.
+    """
+    import httpx
+    import openai
+
+    settings = ai_client_settings()
+    return openai.AsyncOpenAI(
+        base_url=settings['base_url'],
+        max_retries=settings['max_retries'],
+        http_client=httpx.AsyncClient(**_http_options(settings))
+    )
+
+def get_ai_client():
+    """Get this process's shared OpenAI client, creating it on first use
+
+    Connections to the API are reused across requests and tasks, so only
+    the first completion pays the TCP and TLS handshake. A forked child
+    (e.g. a Celery prefork worker) gets its own client instead of sharing
+    the parent's sockets.
+    """
+    global _client, _http_client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            import httpx
+
+            _http_client = httpx.Client(**_http_options(ai_client_settings()))
+            _client = create_ai_client(_http_client)
+            _client_pid = pid
+
+    return _client
+
+def warm_ai_client(connect: bool = True):
+    """Create the shared client and, with connect, open its first API connection
+
+    Any HTTP answer leaves a kept-alive connection in the pool; failures
+    are logged and left for the first real request to surface.
+    """
+    client = get_ai_client()
+    if not connect:
+        return client
+
+    try:
+        _http_client.head(str(client.base_url), timeout=min(ai_client_settings()['connect_timeout'], WARMUP_TIMEOUT))
+    except Exception as e:
+        logger.warning(f"AI client warm-up connection failed: {str(e)}")
+    return client
+
+def close_ai_client():
+    """Close the shared client's pooled connections"""
+    global _client, _http_client, _client_pid
+
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _http_client = None
+        _client_pid = None
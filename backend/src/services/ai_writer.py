@@ -1,13 +1,104 @@
 import openai
 import os
-from typing import Dict, List
+import asyncio
+from typing import Callable, Dict, Iterator, List, Optional
+from src.services.ai_client import create_async_ai_client, get_ai_client
+from src.services.completion_cache import completion_cache, completion_key
+from src.services.summarizer import DEFAULT_SUMMARIZER, SUMMARIZERS, extractive_summary
+
+MODEL = "gpt-3.5-turbo"
+BULK_CONCURRENCY = int(os.getenv('AI_BULK_CONCURRENCY', 5))
+
+ENHANCEMENT_PROMPTS = {
+    'shorten': "Make this newsletter content more concise while keeping the key points:\n\n{content}",
+    'expand': "Expand this newsletter content with more details and examples:\n\n{content}",
+    'improve': "Improve this newsletter content to make it more engaging and valuable:\n\n{content}",
+}
 
 class AIWriter:
-    def __init__(self):
+    def __init__(self, client: openai.OpenAI = None):
         # OpenAI API key is already set in environment
-        self.client = openai.OpenAI()
+        self._client = client
+    
+    @property
+    def client(self) -> openai.OpenAI:
+        """OpenAI client: this process's shared one, created on first use, by default"""
+        return self._client or get_ai_client()
+    
+    def _complete(self, messages: List[Dict], temperature: float, use_cache: bool = True) -> str:
+        """Run a chat completion, answering byte-identical requests from the completion cache
+        
+        With use_cache=False the API is always called, and its answer
+        replaces the cached one.
+        """
+        key = completion_key(MODEL, messages, temperature)
+        if use_cache:
+            cached = completion_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature
+        )
+        content = response.choices[0].message.content
+        
+        if content:
+            completion_cache.set(key, content)
+        return content
     
-    def generate_newsletter_ideas(self, niche: str = None, count: int = 5) -> List[Dict]:
+    async def _complete_async(self, client: openai.AsyncOpenAI, messages: List[Dict], temperature: float,
+                              use_cache: bool = True) -> str:
+        """Async counterpart of _complete on an openai.AsyncOpenAI client"""
+        key = completion_key(MODEL, messages, temperature)
+        if use_cache:
+            cached = completion_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature
+        )
+        content = response.choices[0].message.content
+        
+        if content:
+            completion_cache.set(key, content)
+        return content
+    
+    def _stream(self, messages: List[Dict], temperature: float, use_cache: bool = True) -> Iterator[str]:
+        """Like _complete, but yield the completion in pieces as the API produces them
+        
+        A cached completion is yielded whole. The assembled text is cached
+        only once the stream has finished.
+        """
+        key = completion_key(MODEL, messages, temperature)
+        if use_cache:
+            cached = completion_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        stream = self.client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            stream=True
+        )
+        parts = []
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        
+        content = ''.join(parts)
+        if content:
+            completion_cache.set(key, content)
+    
+    def generate_newsletter_ideas(self, niche: str = None, count: int = 5, use_cache: bool = True) -> List[Dict]:
         """Generate newsletter ideas based on niche"""
         try:
             prompt = f"""
@@ -21,17 +112,16 @@ class AIWriter:
             Make them energetic and idea-forward. Format as JSON array.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            content = self._complete(
+                [
                     {"role": "system", "content": "You are a creative newsletter idea generator for Manus AI platform. Generate engaging, actionable newsletter concepts."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.8
+                temperature=0.8,
+                use_cache=use_cache
             )
             
             # Parse the response (in a real app, you'd want better JSON parsing)
-            content = response.choices[0].message.content
             
             # For now, return a structured response
             ideas = []
@@ -53,12 +143,101 @@ class AIWriter:
             print(f"Error generating ideas: {e}")
             return []
     
-    def write_newsletter(self, topic: str, target_audience: str = None) -> Dict:
-        """Generate a complete newsletter based on topic"""
+    def write_newsletter(self, topic: str, target_audience: str = None, use_cache: bool = True,
+                         summarizer: str = None) -> Dict:
+        """Generate a complete newsletter based on topic
+        
+        The summary comes from the summarizer named (default AI_SUMMARIZER):
+        'extractive' picks sentences from the content locally, 'llm' asks
+        the model for one in a second completion.
+        """
         try:
             audience = target_audience or "indie creators and entrepreneurs"
+            content = self._complete(self._newsletter_messages(topic, audience), temperature=0.7, use_cache=use_cache)
+            return self._newsletter(topic, audience, content, use_cache, summarizer)
             
-            prompt = f"""
+        except Exception as e:
+            print(f"Error writing newsletter: {e}")
+            return {
+                "title": f"Newsletter: {topic}",
+                "content": f"# {topic}\n\nContent generation failed. Please try again.",
+                "summary": "Newsletter content could not be generated.",
+                "topic": topic,
+                "target_audience": target_audience or "General audience"
+            }
+    
+    def stream_newsletter(self, topic: str, target_audience: str = None, use_cache: bool = True,
+                          summarizer: str = None) -> Iterator[Dict]:
+        """Write a newsletter, yielding its content as it is generated
+        
+        Yields {'type': 'token', 'text': ...} events, then one
+        {'type': 'done', 'newsletter': ...} with the same fields as
+        write_newsletter. Errors propagate to the caller.
+        """
+        audience = target_audience or "indie creators and entrepreneurs"
+        parts = []
+        for text in self._stream(self._newsletter_messages(topic, audience), temperature=0.7, use_cache=use_cache):
+            parts.append(text)
+            yield {'type': 'token', 'text': text}
+        
+        yield {'type': 'done', 'newsletter': self._newsletter(topic, audience, ''.join(parts), use_cache, summarizer)}
+    
+    async def write_newsletter_async(self, client: openai.AsyncOpenAI, topic: str, target_audience: str = None,
+                                     use_cache: bool = True, summarizer: str = None) -> Dict:
+        """Like write_newsletter, on an async client; errors propagate instead of returning a placeholder"""
+        audience = target_audience or "indie creators and entrepreneurs"
+        content = await self._complete_async(client, self._newsletter_messages(topic, audience), temperature=0.7,
+                                             use_cache=use_cache)
+        
+        if (summarizer or DEFAULT_SUMMARIZER) == 'llm':
+            summary = await self._complete_async(client, self._summary_messages(content), temperature=0.5,
+                                                 use_cache=use_cache)
+        else:
+            summary = self.summarize(content, summarizer)
+        
+        return self._newsletter_result(topic, audience, content, summary)
+    
+    async def write_newsletters(self, topics: List[str], target_audience: str = None, concurrency: int = None,
+                                use_cache: bool = True, summarizer: str = None,
+                                on_result: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+        """Write a newsletter per topic, with up to concurrency (default AI_BULK_CONCURRENCY) in flight
+        
+        Returns one entry per topic, in order: {'topic', 'success': True,
+        'newsletter'} or {'topic', 'success': False, 'error'}; one topic
+        failing does not stop the others. on_result(index, entry) is called
+        as each topic finishes.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or BULK_CONCURRENCY))
+        results = [None] * len(topics)
+        
+        async def write(client, index, topic):
+            async with semaphore:
+                try:
+                    newsletter = await self.write_newsletter_async(client, topic, target_audience, use_cache, summarizer)
+                    entry = {'topic': topic, 'success': True, 'newsletter': newsletter}
+                except Exception as e:
+                    entry = {'topic': topic, 'success': False, 'error': str(e)}
+            
+            results[index] = entry
+            if on_result:
+                on_result(index, entry)
+        
+        # Async clients belong to the event loop they are used on, so one per run
+        async with create_async_ai_client() as client:
+            await asyncio.gather(*(write(client, index, topic) for index, topic in enumerate(topics)))
+        
+        return results
+    
+    def enhance_content(self, content: str, enhancement_type: str = 'improve', use_cache: bool = True) -> str:
+        """Rewrite newsletter content: improve (default), shorten or expand"""
+        return self._complete(self._enhance_messages(content, enhancement_type), temperature=0.6, use_cache=use_cache)
+    
+    def stream_enhancement(self, content: str, enhancement_type: str = 'improve', use_cache: bool = True) -> Iterator[str]:
+        """Like enhance_content, but yield the rewritten content as it is generated"""
+        return self._stream(self._enhance_messages(content, enhancement_type), temperature=0.6, use_cache=use_cache)
+    
+    def _newsletter_messages(self, topic: str, audience: str) -> List[Dict]:
+        prompt = f"""
             Write a complete newsletter about "{topic}" for {audience}.
             
             Structure:
@@ -73,49 +252,51 @@ class AIWriter:
             
             Make it valuable and actionable.
             """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert newsletter writer for Manus AI platform. Write engaging, valuable content that readers love."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Extract title from content (simple approach)
-            lines = content.split('\n')
-            title = lines[0].replace('#', '').strip() if lines else f"Newsletter: {topic}"
-            
-            # Generate summary
-            summary_prompt = f"Write a 2-sentence summary of this newsletter content:\n\n{content}"
-            summary_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "user", "content": summary_prompt}
-                ],
-                temperature=0.5
-            )
-            
-            summary = summary_response.choices[0].message.content
-            
-            return {
-                "title": title,
-                "content": content,
-                "summary": summary,
-                "topic": topic,
-                "target_audience": audience
-            }
-            
-        except Exception as e:
-            print(f"Error writing newsletter: {e}")
-            return {
-                "title": f"Newsletter: {topic}",
-                "content": f"# {topic}\n\nContent generation failed. Please try again.",
-                "summary": "Newsletter content could not be generated.",
-                "topic": topic,
-                "target_audience": target_audience or "General audience"
-            }
-
+        
+        return [
+            {"role": "system", "content": "You are an expert newsletter writer for Manus AI platform. Write engaging, valuable content that readers love."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def summarize(self, content: str, summarizer: str = None, use_cache: bool = True) -> str:
+        """Write a 2-sentence summary of newsletter content with the named summarizer"""
+        summarizer = summarizer or DEFAULT_SUMMARIZER
+        if summarizer not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer: {summarizer} (expected one of {', '.join(SUMMARIZERS)})")
+        
+        if summarizer == 'extractive':
+            return extractive_summary(content)
+        
+        return self._complete(self._summary_messages(content), temperature=0.5, use_cache=use_cache)
+    
+    def _summary_messages(self, content: str) -> List[Dict]:
+        summary_prompt = f"Write a 2-sentence summary of this newsletter content:\n\n{content}"
+        return [
+            {"role": "user", "content": summary_prompt}
+        ]
+    
+    def _newsletter(self, topic: str, audience: str, content: str, use_cache: bool = True,
+                    summarizer: str = None) -> Dict:
+        """Title, summary and metadata of generated newsletter content"""
+        return self._newsletter_result(topic, audience, content, self.summarize(content, summarizer, use_cache))
+    
+    def _newsletter_result(self, topic: str, audience: str, content: str, summary: str) -> Dict:
+        # Extract title from content (simple approach)
+        lines = content.split('\n')
+        title = lines[0].replace('#', '').strip() if lines else f"Newsletter: {topic}"
+        
+        return {
+            "title": title,
+            "content": content,
+            "summary": summary,
+            "topic": topic,
+            "target_audience": audience
+        }
+    
+    def _enhance_messages(self, content: str, enhancement_type: str) -> List[Dict]:
+        prompt = ENHANCEMENT_PROMPTS.get(enhancement_type, ENHANCEMENT_PROMPTS['improve']).format(content=content)
+        
+        return [
+            {"role": "system", "content": "You are an expert content editor for newsletters. Enhance content while maintaining the original voice and message."},
+            {"role": "user", "content": prompt}
+        ]
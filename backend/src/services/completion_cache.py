@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from src.services.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ai-completion'
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'ai_cache.db')
+
+def completion_key(model: str, messages: List[Dict], temperature: float) -> str:
+    """Content address of a chat completion request"""
+    request = json.dumps({'model': model, 'messages': messages, 'temperature': temperature}, sort_keys=True)
+    return hashlib.sha256(request.encode()).hexdigest()
+
+class RedisCompletionStore:
+    """Completions in Redis, shared by every process
+
+    Entries expire with their TTL; a sorted set of keys by last use keeps
+    at most maxsize of them, evicting the least recently used.
+    """
+    name = 'redis'
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.index = f'{KEY_PREFIX}:lru'
+
+    def _client(self):
+        redis_client = get_redis()
+        if redis_client is None:
+            raise RuntimeError('Redis unavailable')
+        return redis_client
+
+    def get(self, key: str) -> Optional[str]:
+        redis_client = self._client()
+        value = redis_client.get(f'{KEY_PREFIX}:{key}')
+        if value is None:
+            return None
+        redis_client.zadd(self.index, {key: time.time()})
+        return value.decode()
+
+    def set(self, key: str, value: str, ttl: float):
+        redis_client = self._client()
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.set(f'{KEY_PREFIX}:{key}', value, ex=max(int(ttl), 1))
+        pipeline.zadd(self.index, {key: time.time()})
+        pipeline.zcard(self.index)
+        size = pipeline.execute()[-1]
+
+        if size > self.maxsize:
+            evicted = [member for member, _ in redis_client.zpopmin(self.index, size - self.maxsize)]
+            redis_client.delete(*[f'{KEY_PREFIX}:{member.decode()}' for member in evicted])
+
+class DiskCompletionStore:
+    """Completions in a local SQLite file, shared by the processes on one host
+
+    Expired entries are dropped when read; past maxsize entries the least
+    recently used are deleted.
+    """
+    name = 'disk'
+
+    def __init__(self, path: str, maxsize: int):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, never carried across a fork (Celery prefork)
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS completion '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_completion_used_at ON completion (used_at)')
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute('SELECT value, expires_at FROM completion WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            connection.execute('DELETE FROM completion WHERE key = ?', (key,))
+            return None
+        connection.execute('UPDATE completion SET used_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            'INSERT OR REPLACE INTO completion (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now)
+        )
+        overflow = connection.execute('SELECT COUNT(*) FROM completion').fetchone()[0] - self.maxsize
+        if overflow > 0:
+            connection.execute(
+                'DELETE FROM completion WHERE key IN (SELECT key FROM completion ORDER BY used_at LIMIT ?)',
+                (overflow,)
+            )
+
+class CompletionCache:
+    """Content-addressed cache of AI chat completions
+
+    Keyed on a hash of (model, messages, temperature), so byte-identical
+    requests are answered without calling the API. AI_CACHE_BACKEND picks
+    the store: redis, disk, off, or auto (the default: Redis when available,
+    otherwise the SQLite file at AI_CACHE_PATH). A failing store is logged
+    and treated as a miss; it never fails the request.
+    """
+
+    def __init__(self, backend: str = 'auto', path: str = DEFAULT_PATH, maxsize: int = 5000, ttl: float = 86400.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._redis = RedisCompletionStore(maxsize)
+        self._disk = DiskCompletionStore(path, maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self):
+        """The active store, or None when caching is off or its backend is down"""
+        if self.backend == 'off':
+            return None
+        if self.backend in ('auto', 'redis'):
+            if get_redis() is not None:
+                return self._redis
+            if self.backend == 'redis':
+                return None
+        return self._disk
+
+    def _failed(self, store, action: str, error: Exception):
+        logger.warning(f"AI completion cache {action} failed: {str(error)}")
+        if store is self._redis:
+            reset_redis()
+
+    def get(self, key: str) -> Optional[str]:
+        store = self._store()
+        value = None
+        if store is not None:
+            try:
+                value = store.get(key)
+            except Exception as e:
+                self._failed(store, 'read', e)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        store = self._store()
+        if store is None:
+            return
+        try:
+            store.set(key, value, self.ttl)
+        except Exception as e:
+            self._failed(store, 'write', e)
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for this process and the active store"""
+        store = self._store()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'backend': store.name if store else 'off',
+                'maxsize': self._disk.maxsize,
+                'ttl': self.ttl
+            }
+
+completion_cache = CompletionCache(
+    backend=os.getenv('AI_CACHE_BACKEND', 'auto').lower(),
+    path=os.getenv('AI_CACHE_PATH', DEFAULT_PATH),
+    maxsize=int(os.getenv('AI_CACHE_SIZE', 5000)),
+    ttl=float(os.getenv('AI_CACHE_TTL', 86400))
+)
@@ -1,7 +1,20 @@
-from typing import Dict, Optional
-from src.models.newsletter import Newsletter
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+from src.models.newsletter import Newsletter, NEWSLETTER_FIELDS, build_preview, preview_expression
 from src.models.subscription import Subscription
-from src.models.user import User
+from src.models.user import db, User
+from src.services.entitlements import get_entitlement
+from src.services.content_stats import read_counts, apply_deltas, CREATOR_SCOPE, VISIBILITY_SCOPE
+from src.services.response_cache import invalidate_on_commit
+
+VISIBILITIES = ['public', 'private', 'premium']
+
+# Fields a creator can change across many newsletters at once
+BULK_UPDATE_FIELDS = ['title', 'summary', 'visibility']
+MAX_BULK_UPDATE = 1000
 
 class ContentVisibilityManager:
     """Manages content access based on user subscription and newsletter visibility"""
@@ -40,8 +53,7 @@ class ContentVisibilityManager:
                     }
                 
                 # Check if user exists
-                user = User.query.get(user_id)
-                if not user:
+                if not get_entitlement(user_id)['user_exists']:
                     return {
                         'can_access': False,
                         'reason': 'Invalid user',
@@ -67,9 +79,7 @@ class ContentVisibilityManager:
                     }
                 
                 # Check user subscription
-                subscription = Subscription.query.filter_by(user_id=user_id).first()
-                
-                if not subscription or subscription.tier != 'premium' or subscription.status != 'active':
+                if not get_entitlement(user_id)['has_premium']:
                     return {
                         'can_access': False,
                         'reason': 'Premium subscription required',
@@ -99,56 +109,151 @@ class ContentVisibilityManager:
                 'content_type': 'none'
             }
     
-    def _get_summary_version(self, newsletter: Newsletter) -> Dict:
-        """Get summary version of newsletter for non-premium users"""
-        newsletter_dict = newsletter.to_dict()
-        
-        # Replace content with summary or teaser
-        if newsletter.summary:
-            newsletter_dict['content'] = newsletter.summary + "\n\n**Upgrade to Premium to read the full newsletter!**"
-        else:
-            # Generate a teaser from the first 200 characters
-            content_preview = newsletter.content[:200] + "..." if len(newsletter.content) > 200 else newsletter.content
-            newsletter_dict['content'] = content_preview + "\n\n**Upgrade to Premium to read the full newsletter!**"
+    def _get_summary_version(self, newsletter: Newsletter, fields: Optional[List[str]] = None) -> Dict:
+        """Get summary version of newsletter for non-premium users
+        
+        Uses the teaser stored at write time, so the full body is never loaded.
+        """
+        if fields is None:
+            fields = [field for field in NEWSLETTER_FIELDS if field != 'preview']
+        newsletter_dict = newsletter.to_dict([field for field in fields if field != 'content'])
+        
+        # Replace content with the precomputed teaser, unless content was projected out
+        if 'content' in fields:
+            newsletter_dict['content'] = newsletter.preview or build_preview(newsletter.content, newsletter.summary)
         
         newsletter_dict['is_preview'] = True
         return newsletter_dict
     
-    def filter_newsletters_by_access(self, newsletters: list, user_id: Optional[int] = None) -> list:
-        """Filter a list of newsletters based on user access rights"""
+    def _get_entitlement(self, user_id: Optional[int], visibilities: set) -> Dict:
+        """Look up the caller's entitlement once for a whole batch of newsletters"""
+        entitlement = {'user_exists': False, 'has_premium': False, 'error': False}
+        if not user_id or not visibilities & {'private', 'premium'}:
+            return entitlement
+        
+        try:
+            cached = get_entitlement(user_id)
+            entitlement['user_exists'] = cached['user_exists']
+            entitlement['has_premium'] = cached['has_premium']
+        except Exception:
+            entitlement['error'] = True
+        
+        return entitlement
+    
+    def _classify(self, visibility: str, user_id: Optional[int], entitlement: Dict) -> str:
+        """Classify a single newsletter as full, summary or hidden for a resolved entitlement"""
+        if visibility == 'public':
+            return 'full'
+        
+        # A failed entitlement lookup hides gated rows, matching can_access_newsletter
+        if entitlement['error']:
+            return 'hidden'
+        
+        if visibility == 'private':
+            return 'full' if user_id and entitlement['user_exists'] else 'hidden'
+        
+        if visibility == 'premium':
+            return 'full' if user_id and entitlement['has_premium'] else 'summary'
+        
+        return 'hidden'
+    
+    def classify_newsletters(self, newsletters: list, user_id: Optional[int] = None) -> list:
+        """Classify newsletters in one pass, returning (newsletter, access) pairs
+        
+        The caller's entitlement is resolved once for the whole result set, so
+        the query count stays constant no matter how many rows are classified.
+        Access is one of 'full', 'summary' or 'hidden'.
+        """
+        entitlement = self._get_entitlement(user_id, {newsletter.visibility for newsletter in newsletters})
+        
+        return [
+            (newsletter, self._classify(newsletter.visibility, user_id, entitlement))
+            for newsletter in newsletters
+        ]
+    
+    def get_access_profile(self, user_id: Optional[int] = None) -> Dict[str, str]:
+        """Map each visibility to what this user is served: full, summary or hidden"""
+        entitlement = self._get_entitlement(user_id, set(VISIBILITIES))
+        return {
+            visibility: self._classify(visibility, user_id, entitlement)
+            for visibility in VISIBILITIES
+        }
+    
+    def visible_visibilities(self, user_id: Optional[int] = None) -> List[str]:
+        """Get the visibility values that are not hidden from this user
+        
+        Lets list queries drop hidden rows in SQL so a page is never short.
+        """
+        return [
+            visibility for visibility, access in self.get_access_profile(user_id).items()
+            if access != 'hidden'
+        ]
+    
+    def get_access_tier(self, visibility: str, user_id: Optional[int] = None) -> str:
+        """Get which variant of a newsletter this user is served, for cache keys
+        
+        Summaries differ between anonymous and logged-in readers (the reason
+        text), so they are separate tiers.
+        """
+        entitlement = self._get_entitlement(user_id, {visibility})
+        access = self._classify(visibility, user_id, entitlement)
+        if access == 'summary' and not user_id:
+            return 'summary-anonymous'
+        return access
+    
+    def filter_newsletters_by_access(self, newsletters: list, user_id: Optional[int] = None,
+                                     fields: Optional[List[str]] = None) -> list:
+        """Filter a list of newsletters based on user access rights
+        
+        When fields is given only those keys are serialized (plus is_preview
+        on previews), so columns left out of the query are never loaded.
+        """
         accessible_newsletters = []
+        classified = self.classify_newsletters(newsletters, user_id)
         
-        for newsletter in newsletters:
-            access_result = self.can_access_newsletter(newsletter.id, user_id)
-            
-            if access_result['can_access'] or access_result['content_type'] == 'summary':
-                if 'newsletter' in access_result:
-                    accessible_newsletters.append(access_result['newsletter'])
-                else:
-                    accessible_newsletters.append(newsletter.to_dict())
+        if fields is None or 'content' in fields:
+            self._load_deferred_content([newsletter for newsletter, access in classified if access == 'full'])
+        
+        for newsletter, access in classified:
+            if access == 'full':
+                accessible_newsletters.append(newsletter.to_dict(fields))
+            elif access == 'summary':
+                accessible_newsletters.append(self._get_summary_version(newsletter, fields))
         
         return accessible_newsletters
     
+    def _load_deferred_content(self, newsletters: list):
+        """Load the bodies of newsletters queried with content deferred in one query"""
+        pending = {
+            newsletter.id: newsletter for newsletter in newsletters
+            if 'content' in inspect(newsletter).unloaded
+        }
+        if not pending:
+            return
+        
+        rows = db.session.query(Newsletter.id, Newsletter.content).filter(
+            Newsletter.id.in_(list(pending))
+        ).all()
+        for newsletter_id, content in rows:
+            set_committed_value(pending[newsletter_id], 'content', content)
+    
     def get_user_content_stats(self, user_id: int) -> Dict:
         """Get statistics about user's content access"""
         try:
-            user = User.query.get(user_id)
-            if not user:
+            entitlement = get_entitlement(user_id)
+            if not entitlement['user_exists']:
                 return {'error': 'User not found'}
             
-            subscription = Subscription.query.filter_by(user_id=user_id).first()
-            
-            # Count newsletters by visibility
-            public_count = Newsletter.query.filter_by(visibility='public').count()
-            private_count = Newsletter.query.filter_by(visibility='private').count()
-            premium_count = Newsletter.query.filter_by(visibility='premium').count()
+            subscription = entitlement['subscription']
             
-            # Count user's own newsletters
-            user_newsletters = Newsletter.query.filter_by(creator_id=user_id).count()
+            # Count newsletters by visibility and the user's own, from the maintained counters
+            counts = read_counts(user_id)
+            public_count = counts['by_visibility']['public']
+            private_count = counts['by_visibility']['private']
+            premium_count = counts['by_visibility']['premium']
+            user_newsletters = counts['created_by_user']
             
-            has_premium = (subscription and 
-                          subscription.tier == 'premium' and 
-                          subscription.status == 'active')
+            has_premium = entitlement['has_premium']
             
             accessible_count = public_count + private_count
             if has_premium:
@@ -156,8 +261,8 @@ class ContentVisibilityManager:
             
             return {
                 'user_id': user_id,
-                'subscription_tier': subscription.tier if subscription else 'free',
-                'subscription_status': subscription.status if subscription else 'none',
+                'subscription_tier': subscription['tier'] if subscription else 'free',
+                'subscription_status': subscription['status'] if subscription else 'none',
                 'has_premium_access': has_premium,
                 'total_newsletters': public_count + private_count + premium_count,
                 'accessible_newsletters': accessible_count,
@@ -200,4 +305,113 @@ class ContentVisibilityManager:
             from src.models.user import db
             db.session.rollback()
             return {'success': False, 'error': str(e)}
-
+    
+    def bulk_update_newsletters(self, newsletter_ids: List[int], changes: Dict, user_id: int) -> Dict:
+        """Apply the same field changes to many newsletters (only their creator can change them)
+        
+        Ownership is checked with one query and every row is changed by one
+        set-based UPDATE in a single transaction; either all newsletters are
+        updated or none are. The UPDATE bypasses the ORM, so the stored
+        preview, the visibility counters and the response cache are
+        maintained here.
+        """
+        try:
+            newsletter_ids = sorted({int(newsletter_id) for newsletter_id in newsletter_ids})
+            if not newsletter_ids:
+                return {'success': False, 'error': 'newsletter_ids must not be empty'}
+            if len(newsletter_ids) > MAX_BULK_UPDATE:
+                return {'success': False, 'error': f'At most {MAX_BULK_UPDATE} newsletters can be updated at once'}
+            
+            unknown = [field for field in changes if field not in BULK_UPDATE_FIELDS]
+            if not changes or unknown:
+                return {'success': False, 'error': f'Changes must be among: {BULK_UPDATE_FIELDS}'}
+            if 'visibility' in changes and changes['visibility'] not in VISIBILITIES:
+                return {'success': False, 'error': f'Invalid visibility. Must be one of: {VISIBILITIES}'}
+            if 'title' in changes and not changes['title']:
+                return {'success': False, 'error': 'Title must not be empty'}
+            
+            # One ownership query, which also gives the old visibilities for the counters
+            rows = db.session.query(Newsletter.id, Newsletter.creator_id, Newsletter.visibility).filter(
+                Newsletter.id.in_(newsletter_ids)
+            ).all()
+            
+            found = {row.id for row in rows}
+            not_found = [newsletter_id for newsletter_id in newsletter_ids if newsletter_id not in found]
+            if not_found:
+                return {'success': False, 'error': 'Newsletter not found', 'not_found': not_found}
+            
+            not_owned = sorted(row.id for row in rows if row.creator_id != user_id)
+            if not_owned:
+                return {'success': False, 'error': 'Only the creator can change these newsletters', 'not_owned': not_owned}
+            
+            table = Newsletter.__table__
+            values = dict(changes, updated_at=datetime.utcnow())
+            if 'summary' in changes:
+                values['preview'] = preview_expression(table.c.content, changes['summary'])
+            
+            result = db.session.execute(
+                table.update().where(
+                    table.c.id.in_(newsletter_ids),
+                    table.c.creator_id == user_id
+                ).values(**values)
+            )
+            
+            if 'visibility' in changes:
+                deltas = Counter()
+                for row in rows:
+                    if row.visibility != changes['visibility']:
+                        deltas[(VISIBILITY_SCOPE, row.visibility)] -= 1
+                        deltas[(VISIBILITY_SCOPE, changes['visibility'])] += 1
+                apply_deltas(db.session.connection(), deltas)
+            
+            invalidate_on_commit(db.session(), newsletter_ids)
+            db.session.commit()
+            
+            return {
+                'success': True,
+                'message': f'Updated {result.rowcount} newsletter(s)',
+                'rows_affected': result.rowcount,
+                'newsletter_ids': newsletter_ids,
+                'changes': changes
+            }
+            
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'error': str(e)}
+    
+    def bulk_create_newsletters(self, newsletters: List[Dict], creator_id: int, visibility: str = 'public') -> List[int]:
+        """Store many newsletters ({title, content, summary}) with one multi-row INSERT
+        
+        Returns the new ids in input order. The INSERT bypasses the ORM, so
+        the stored previews and the visibility counters are maintained here;
+        the search index follows through its triggers. The caller commits.
+        """
+        if not newsletters:
+            return []
+        
+        now = datetime.utcnow()
+        table = Newsletter.__table__
+        rows = [
+            {
+                'title': newsletter['title'],
+                'content': newsletter['content'],
+                'summary': newsletter.get('summary'),
+                'preview': build_preview(newsletter['content'], newsletter.get('summary')),
+                'visibility': visibility,
+                'creator_id': creator_id,
+                'created_at': now,
+                'updated_at': now
+            }
+            for newsletter in newsletters
+        ]
+        
+        # A single statement assigns ascending ids in VALUES order, but RETURNING
+        # does not promise to list them in that order
+        result = db.session.execute(table.insert().values(rows).returning(table.c.id))
+        newsletter_ids = sorted(row.id for row in result)
+        
+        apply_deltas(db.session.connection(), Counter({
+            (VISIBILITY_SCOPE, visibility): len(rows),
+            (CREATOR_SCOPE, creator_id): len(rows)
+        }))
+        return newsletter_ids
@@ -0,0 +1,177 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, event, func, inspect, or_
+from src.models.user import db
+from src.models.newsletter import Newsletter
+from src.models.content_counter import ContentCounter
+
+VISIBILITY_SCOPE = 'visibility'
+CREATOR_SCOPE = 'creator'
+VISIBILITIES = ['public', 'private', 'premium']
+
+def read_counts(user_id: int) -> Dict:
+    """Read visibility counts and one creator's count from the counters table
+
+    A single indexed read on the counters primary key. Falls back to the
+    GROUP BY aggregate when the table has not been populated yet.
+    """
+    # Spelled as two primary-key lookups: SQLite cannot index a row-value IN
+    rows = db.session.query(ContentCounter.scope, ContentCounter.key, ContentCounter.count).filter(
+        or_(
+            and_(ContentCounter.scope == VISIBILITY_SCOPE, ContentCounter.key.in_(VISIBILITIES)),
+            and_(ContentCounter.scope == CREATOR_SCOPE, ContentCounter.key == str(user_id))
+        )
+    ).all()
+
+    if not any(scope == VISIBILITY_SCOPE for scope, key, count in rows):
+        return aggregate_counts(user_id)
+
+    counts = {'by_visibility': dict.fromkeys(VISIBILITIES, 0), 'created_by_user': 0}
+    for scope, key, count in rows:
+        if scope == VISIBILITY_SCOPE:
+            counts['by_visibility'][key] = count
+        else:
+            counts['created_by_user'] = count
+    return counts
+
+def aggregate_counts(user_id: Optional[int] = None) -> Dict:
+    """Count newsletters per visibility, plus one creator's total, in one GROUP BY"""
+    rows = db.session.query(
+        Newsletter.visibility,
+        func.count(Newsletter.id),
+        func.sum(case((Newsletter.creator_id == user_id, 1), else_=0))
+    ).group_by(Newsletter.visibility).all()
+
+    counts = {'by_visibility': dict.fromkeys(VISIBILITIES, 0), 'created_by_user': 0}
+    for visibility, count, created_by_user in rows:
+        counts['by_visibility'][visibility] = count
+        counts['created_by_user'] += created_by_user or 0
+    return counts
+
+def catalog_version() -> Tuple[Optional[datetime], int]:
+    """Get (latest updated_at, newsletter count), which moves on every newsletter write
+
+    The count catches deletes, which leave the latest updated_at unchanged.
+    Both halves are index reads: max() on ix_newsletter_updated_at and the
+    visibility counters.
+    """
+    last_updated = db.session.query(func.max(Newsletter.updated_at)).scalar_subquery()
+    total = db.session.query(func.coalesce(func.sum(ContentCounter.count), 0)).filter(
+        ContentCounter.scope == VISIBILITY_SCOPE, ContentCounter.key.in_(VISIBILITIES)
+    ).scalar_subquery()
+
+    return tuple(db.session.query(last_updated, total).one())
+
+def _counter_rows() -> List[Dict]:
+    """Every counter row, computed from the newsletter table"""
+    visibility_rows = db.session.query(
+        Newsletter.visibility, func.count(Newsletter.id)
+    ).group_by(Newsletter.visibility).all()
+    creator_rows = db.session.query(
+        Newsletter.creator_id, func.count(Newsletter.id)
+    ).group_by(Newsletter.creator_id).all()
+
+    by_visibility = dict.fromkeys(VISIBILITIES, 0)
+    by_visibility.update({visibility: count for visibility, count in visibility_rows if visibility is not None})
+
+    now = datetime.utcnow()
+    return [
+        {'scope': VISIBILITY_SCOPE, 'key': visibility, 'count': count, 'updated_at': now}
+        for visibility, count in by_visibility.items()
+    ] + [
+        {'scope': CREATOR_SCOPE, 'key': str(creator_id), 'count': count, 'updated_at': now}
+        for creator_id, count in creator_rows
+    ]
+
+def rebuild_counters() -> int:
+    """Recompute the counters table from the newsletter table
+
+    Rows are upserted, so a counter another writer creates in the meantime
+    is overwritten instead of failing the rebuild on the primary key.
+    """
+    counters = _counter_rows()
+    table = ContentCounter.__table__
+    statement = _upsert_dialect(db.session.connection())(table)
+
+    db.session.query(ContentCounter).delete()
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.key],
+        set_={'count': statement.excluded.count, 'updated_at': statement.excluded.updated_at}
+    ), counters)
+    db.session.commit()
+    return len(counters)
+
+def seed_counters() -> int:
+    """Fill in counters that do not exist yet, leaving existing ones alone
+
+    Safe for processes starting at the same time: whichever inserts a
+    counter first wins and the others skip it. Returns the rows inserted.
+    """
+    counters = _counter_rows()
+    table = ContentCounter.__table__
+    statement = _upsert_dialect(db.session.connection())(table)
+
+    inserted = db.session.execute(
+        statement.on_conflict_do_nothing(index_elements=[table.c.scope, table.c.key]), counters
+    ).rowcount
+    db.session.commit()
+    return inserted
+
+def _upsert_dialect(connection):
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def apply_deltas(connection, deltas: Counter):
+    """Add (scope, key) -> delta to the counters inside the caller's transaction
+
+    Each counter is one INSERT ... ON CONFLICT DO UPDATE, so two writers
+    creating the same counter at once both add to it instead of one of
+    them failing on the primary key.
+    """
+    table = ContentCounter.__table__
+    insert = _upsert_dialect(connection)
+    now = datetime.utcnow()
+
+    for (scope, key), delta in deltas.items():
+        if not delta or key is None:
+            continue
+
+        statement = insert(table).values(scope=scope, key=str(key), count=delta, updated_at=now)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.scope, table.c.key],
+            set_={'count': table.c.count + statement.excluded.count, 'updated_at': statement.excluded.updated_at}
+        ))
+
+def _row_deltas(visibility, creator_id, sign: int) -> Counter:
+    return Counter({
+        (VISIBILITY_SCOPE, visibility): sign,
+        (CREATOR_SCOPE, creator_id): sign
+    })
+
+@event.listens_for(Newsletter, 'after_insert')
+def _count_insert(mapper, connection, target):
+    apply_deltas(connection, _row_deltas(target.visibility, target.creator_id, 1))
+
+@event.listens_for(Newsletter, 'after_delete')
+def _count_delete(mapper, connection, target):
+    apply_deltas(connection, _row_deltas(target.visibility, target.creator_id, -1))
+
+@event.listens_for(Newsletter, 'after_update')
+def _count_update(mapper, connection, target):
+    state = inspect(target)
+    deltas = Counter()
+
+    for attr, scope in (('visibility', VISIBILITY_SCOPE), ('creator_id', CREATOR_SCOPE)):
+        history = state.attrs[attr].history
+        if not history.has_changes():
+            continue
+        for old_value in history.deleted or ():
+            deltas[(scope, old_value)] -= 1
+        for new_value in history.added or ():
+            deltas[(scope, new_value)] += 1
+
+    apply_deltas(connection, deltas)
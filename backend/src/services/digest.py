@@ -0,0 +1,185 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.newsletter import Newsletter
+from src.models.digest_artifact import DigestArtifact
+from src.services.cache import LRUTTLCache
+from src.services.email_templates import render_shared
+from src.services.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'digest'
+DIGEST_VISIBILITIES = ['public', 'premium']
+DIGEST_SIZE = 5
+EXCERPT_LENGTH = 200
+
+# Latest artifact per period; artifacts never change once stored, so a long TTL is safe
+_local = LRUTTLCache(maxsize=32, ttl=float(os.getenv('DIGEST_CACHE_TTL', 3600)))
+
+def digest_period(now: Optional[datetime] = None) -> str:
+    """The digest period a moment falls in: its UTC date"""
+    return (now or datetime.utcnow()).strftime('%Y-%m-%d')
+
+def last_complete_period(now: Optional[datetime] = None) -> str:
+    """The latest digest period that has ended: the UTC date before now"""
+    return digest_period((now or datetime.utcnow()) - timedelta(days=1))
+
+def period_window(period: str) -> Tuple[datetime, datetime]:
+    """The [start, end) UTC datetimes a digest period covers"""
+    start = datetime.strptime(period, '%Y-%m-%d')
+    return start, start + timedelta(days=1)
+
+def period_ended(period: str, now: Optional[datetime] = None) -> bool:
+    return period_window(period)[1] <= (now or datetime.utcnow())
+
+def digest_sections(newsletters) -> List[Dict]:
+    """Per-newsletter digest sections, the same teaser any reader is shown"""
+    return [
+        {
+            'newsletter_id': newsletter.id,
+            'title': newsletter.title,
+            'excerpt': newsletter.summary or newsletter.content[:EXCERPT_LENGTH] + '...'
+        }
+        for newsletter in newsletters
+    ]
+
+def render_digest(sections: List[Dict]) -> Dict:
+    """Subject and shared rendering of a digest, with the username slot left open"""
+    content = render_shared('digest', slots=['username'], sections=sections)
+    return {
+        'subject': f"Daily Newsletter Digest - {len(sections)} New Articles",
+        'html': content['html'],
+        'text': content['text']
+    }
+
+def _key(period: str) -> str:
+    return f'{KEY_PREFIX}:{period}'
+
+def _cache_get(period: str) -> Optional[Dict]:
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            raw = redis_client.get(_key(period))
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Digest cache read failed: {str(e)}")
+            reset_redis()
+    return _local.get(_key(period))
+
+def _cache_set(artifact: Dict):
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(_key(artifact['period']), json.dumps(artifact), ex=max(int(_local.ttl), 1))
+            return
+        except Exception as e:
+            logger.warning(f"Digest cache write failed: {str(e)}")
+            reset_redis()
+    _local.set(_key(artifact['period']), artifact)
+
+def _latest(period: str) -> Optional[DigestArtifact]:
+    return DigestArtifact.query.filter_by(period=period).order_by(DigestArtifact.version.desc()).first()
+
+def _period_newsletters(period: str) -> List[Newsletter]:
+    start, end = period_window(period)
+    return Newsletter.query.filter(
+        Newsletter.created_at >= start,
+        Newsletter.created_at < end,
+        Newsletter.visibility.in_(DIGEST_VISIBILITIES)
+    ).order_by(Newsletter.created_at.desc()).limit(DIGEST_SIZE).all()
+
+def draft_digest(period: Optional[str] = None) -> Optional[Dict]:
+    """Render the digest for a period as it stands now, without storing it
+
+    Shaped like a stored artifact with no id or version, for previewing a
+    period that has not ended yet. Returns None when the period has no
+    newsletters so far. Must run inside an app context.
+    """
+    period = period or digest_period()
+    newsletters = _period_newsletters(period)
+    if not newsletters:
+        return None
+
+    sections = digest_sections(newsletters)
+    return {
+        'id': None,
+        'period': period,
+        'version': None,
+        'newsletter_ids': [newsletter.id for newsletter in newsletters],
+        'sections': sections,
+        **render_digest(sections),
+        'created_at': None
+    }
+
+def build_digest(period: Optional[str] = None, force: bool = False) -> Optional[Dict]:
+    """Build and store the digest for a period, or return the one already stored
+
+    The digest covers the public and premium newsletters created during the
+    period's UTC day; the period defaults to the last one that has ended.
+    A stored artifact is final, so a period still in progress is refused
+    rather than stored without the newsletters still to come. With force
+    a new version is stored even if one exists (e.g. after editing a
+    newsletter). Returns None, storing nothing, when the period has no
+    newsletters. Must run inside an app context.
+    """
+    period = period or last_complete_period()
+    latest = _latest(period)
+    if latest is not None and not force:
+        artifact = latest.to_dict()
+        _cache_set(artifact)
+        return artifact
+
+    if not period_ended(period):
+        raise ValueError(f'Digest period {period} has not ended yet')
+
+    newsletters = _period_newsletters(period)
+    if not newsletters:
+        return None
+
+    sections = digest_sections(newsletters)
+    content = render_digest(sections)
+    entry = DigestArtifact(
+        period=period,
+        version=(latest.version if latest else 0) + 1,
+        newsletter_ids=json.dumps([newsletter.id for newsletter in newsletters]),
+        sections=json.dumps(sections),
+        **content
+    )
+    db.session.add(entry)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored this version first; use theirs
+        db.session.rollback()
+        entry = _latest(period)
+
+    artifact = entry.to_dict()
+    _cache_set(artifact)
+    logger.info(f"Built digest {period} v{artifact['version']} with {len(sections)} newsletter(s)")
+    return artifact
+
+def get_digest(period: Optional[str] = None, build: bool = True) -> Optional[Dict]:
+    """Get the latest digest artifact for a period, from the cache when possible
+
+    The period defaults to the last one that has ended. On a miss the
+    stored artifact is loaded (and cached); when the period has none yet
+    and build is set, it is built now. Must run inside an app context.
+    """
+    period = period or last_complete_period()
+    artifact = _cache_get(period)
+    if artifact is not None:
+        return artifact
+
+    latest = _latest(period)
+    if latest is not None:
+        artifact = latest.to_dict()
+        _cache_set(artifact)
+        return artifact
+
+    return build_digest(period) if build else None
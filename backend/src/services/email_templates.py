@@ -0,0 +1,79 @@
+import os
+from typing import Dict, Iterable, Optional
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+from markupsafe import escape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'email')
+
+# Templates are compiled on first use and kept for the life of the process
+_environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False,
+    cache_size=-1
+)
+
+def substitution_tag(name: str) -> str:
+    """Placeholder for a per-recipient value in bulk email content, e.g. -username-"""
+    return f'-{name}-'
+
+def html_slot(name: str) -> str:
+    """Name of the HTML-escaped variant of a per-recipient value"""
+    return f'{name}_html'
+
+def split_html_slots(html_content: Optional[str], names: Iterable[str]) -> Optional[str]:
+    """Point an HTML body's slots at the escaped variants of their values
+
+    Providers substitute the same value into every body of a message, so
+    the HTML body gets its own slots and the text body keeps the raw ones.
+    """
+    if not html_content:
+        return html_content
+    for name in names:
+        html_content = html_content.replace(substitution_tag(name), substitution_tag(html_slot(name)))
+    return html_content
+
+def substitution_values(substitutions: Dict) -> Dict[str, str]:
+    """Per-recipient values for both bodies: raw for text, HTML-escaped for split_html_slots"""
+    values = {}
+    for name, value in substitutions.items():
+        values[name] = str(value)
+        values[html_slot(name)] = str(escape(str(value)))
+    return values
+
+def _render(template_name: str, context: Dict) -> Optional[str]:
+    try:
+        template = _environment.get_template(template_name)
+    except TemplateNotFound:
+        return None
+    return template.render(**context)
+
+def render_email(name: str, **context) -> Dict[str, Optional[str]]:
+    """Render templates/email/<name>.html, and <name>.txt when there is one"""
+    html = _render(f'{name}.html', context)
+    if html is None:
+        raise TemplateNotFound(f'{name}.html')
+
+    return {'html': html, 'text': _render(f'{name}.txt', context)}
+
+def render_shared(name: str, slots: Iterable[str] = (), **context) -> Dict[str, Optional[str]]:
+    """Render an email once for a whole send run, leaving per-recipient slots open
+
+    Each slot is rendered as its substitution_tag, which the provider bulk
+    APIs (or personalize) fill in per recipient, so the shared sections are
+    never re-rendered.
+    """
+    context.update({slot: substitution_tag(slot) for slot in slots})
+    return render_email(name, **context)
+
+def personalize(content: Optional[str], substitutions: Dict, html: bool = True) -> Optional[str]:
+    """Fill a shared rendering's slots for one recipient
+
+    Values are HTML-escaped, as the template would have escaped them; pass
+    html=False to fill a text body with the raw values.
+    """
+    if not content:
+        return content
+    for name, value in substitutions.items():
+        content = content.replace(substitution_tag(name), str(escape(str(value))) if html else str(value))
+    return content
@@ -0,0 +1,170 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.models.user import db, User
+from src.models.subscription import Subscription
+from src.services.cache import LRUTTLCache
+from src.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'entitlements:invalidate'
+
+class EntitlementCache:
+    """LRU+TTL cache of per-user subscription entitlements
+
+    Entries hold whether the user exists plus the subscription's tier, status
+    and expiry, so hot premium checks skip the Subscription lookup. Commits
+    that touch a Subscription (or delete a User) invalidate the affected
+    user_ids; when Redis is available the invalidation is broadcast so other
+    web and worker processes drop their copies too. The TTL bounds staleness
+    when Redis is not available.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self._cache = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def get(self, user_id: int) -> Dict:
+        """Get a user's entitlement, loading it from the database on a miss"""
+        self._ensure_listener()
+
+        entitlement = self._cache.get(user_id)
+        if entitlement is None:
+            entitlement = self._load(user_id)
+            self._cache.set(user_id, entitlement)
+
+        return entitlement
+
+    def _load(self, user_id: int) -> Dict:
+        """Load a user's entitlement with a single query"""
+        row = db.session.query(
+            User.id,
+            Subscription.id.label('subscription_id'),
+            Subscription.tier,
+            Subscription.status,
+            Subscription.expires_at,
+            Subscription.stripe_subscription_id
+        ).outerjoin(
+            Subscription, Subscription.user_id == User.id
+        ).filter(User.id == user_id).first()
+
+        if row is None:
+            return {'user_exists': False, 'subscription': None, 'has_premium': False}
+
+        if row.subscription_id is None:
+            subscription = None
+        else:
+            subscription = {
+                'tier': row.tier,
+                'status': row.status,
+                'expires_at': row.expires_at,
+                'stripe_subscription_id': row.stripe_subscription_id
+            }
+
+        return {
+            'user_exists': True,
+            'subscription': subscription,
+            'has_premium': bool(
+                subscription and
+                subscription['tier'] == 'premium' and
+                subscription['status'] == 'active'
+            )
+        }
+
+    def invalidate(self, user_ids: Iterable[int], broadcast: bool = True):
+        """Drop cached entitlements, optionally telling other processes to do the same"""
+        user_ids = [int(user_id) for user_id in user_ids if user_id is not None]
+        if not user_ids:
+            return
+
+        for user_id in user_ids:
+            self._cache.delete(user_id)
+
+        if broadcast:
+            redis_client = get_redis()
+            if redis_client is not None:
+                try:
+                    redis_client.publish(INVALIDATION_CHANNEL, json.dumps(user_ids))
+                except Exception as e:
+                    logger.warning(f"Failed to broadcast entitlement invalidation: {str(e)}")
+
+    def clear(self):
+        """Drop every cached entitlement in this process"""
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for this process"""
+        return self._cache.stats()
+
+    def _ensure_listener(self):
+        """Start the Redis invalidation listener for this process once"""
+        if self._listener is not None:
+            return
+
+        with self._listener_lock:
+            if self._listener is not None:
+                return
+
+            redis_client = get_redis()
+            if redis_client is None:
+                return
+
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+                self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            except Exception as e:
+                logger.warning(f"Failed to subscribe to entitlement invalidations: {str(e)}")
+
+    def _on_invalidation(self, message):
+        """Apply an invalidation broadcast from another process"""
+        try:
+            self.invalidate(json.loads(message['data']), broadcast=False)
+        except Exception as e:
+            logger.warning(f"Ignoring malformed entitlement invalidation: {str(e)}")
+
+entitlement_cache = EntitlementCache(
+    maxsize=int(os.getenv('ENTITLEMENT_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('ENTITLEMENT_CACHE_TTL', 60))
+)
+
+def get_entitlement(user_id: int) -> Dict:
+    """Get the cached entitlement for a user (treat the result as read-only)"""
+    return entitlement_cache.get(user_id)
+
+def _mark_dirty(session: Optional[Session], *user_ids):
+    """Remember user_ids whose entitlement changes when the session commits"""
+    if session is None:
+        return
+    session.info.setdefault('dirty_entitlements', set()).update(
+        user_id for user_id in user_ids if user_id is not None
+    )
+
+@event.listens_for(Subscription, 'after_insert')
+@event.listens_for(Subscription, 'after_update')
+@event.listens_for(Subscription, 'after_delete')
+def _subscription_changed(mapper, connection, target):
+    # Also catch a subscription moving between users
+    history = inspect(target).attrs.user_id.history
+    _mark_dirty(inspect(target).session, target.user_id, *(history.deleted or ()))
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _mark_dirty(inspect(target).session, target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    # Invalidate only once the change is visible to other readers
+    user_ids = session.info.pop('dirty_entitlements', None)
+    if user_ids:
+        entitlement_cache.invalidate(user_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('dirty_entitlements', None)
@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Optional, Tuple
+
+# httpcore checks every pooled connection on each request, so one large
+# async pool spends more CPU per request the more connections it holds;
+# high send concurrency is spread over several small clients instead
+ASYNC_CONNECTIONS_PER_CLIENT = 4
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+def http_timeouts() -> Tuple[float, float]:
+    """Get the (connect, read) timeouts for outbound provider requests"""
+    return (
+        float(os.getenv('EMAIL_HTTP_CONNECT_TIMEOUT', 3.05)),
+        float(os.getenv('EMAIL_HTTP_READ_TIMEOUT', 30))
+    )
+
+def create_http_session(pool_size: Optional[int] = None):
+    """Create a requests.Session with a keep-alive connection pool of pool_size per host"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = pool_size or int(os.getenv('EMAIL_HTTP_POOL_SIZE', 10))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_http_session():
+    """Get this process's shared HTTP session, creating it on first use
+
+    Connections are reused across sends, so only the first request to a
+    provider pays the TCP and TLS handshake. A forked child (e.g. a Celery
+    prefork worker) gets its own session instead of sharing the parent's
+    sockets.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _lock:
+        if _session is None or _session_pid != pid:
+            _session = create_http_session()
+            _session_pid = pid
+
+    return _session
+
+def close_http_session():
+    """Close the shared session's pooled connections"""
+    global _session, _session_pid
+
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+def create_async_http_client(max_connections: int = ASYNC_CONNECTIONS_PER_CLIENT):
+    """Create an httpx.AsyncClient with a keep-alive pool of max_connections
+
+    Async clients belong to the event loop they are used on, so callers
+    create them per asyncio.run() instead of sharing one process-wide.
+    """
+    import httpx
+
+    connect_timeout, read_timeout = http_timeouts()
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    )
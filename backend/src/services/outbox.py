@@ -0,0 +1,255 @@
+import os
+import json
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.email_outbox import EmailOutbox
+from src.services.email_templates import render_email, substitution_tag
+
+logger = logging.getLogger(__name__)
+
+# Transactional emails the outbox can send: template name -> subject for its context
+OUTBOX_EMAILS = {
+    'welcome': lambda context: 'Welcome to Manus AI Newsletter Platform!',
+    'subscription_confirmation': lambda context: f"Subscription Confirmed - {context['subscription_tier'].title()} Plan",
+    'payment_failed': lambda context: 'Payment Failed - Action Required',
+    'subscription_cancelled': lambda context: 'Subscription Cancelled',
+}
+
+def outbox_settings() -> Dict:
+    return {
+        'claim_size': int(os.getenv('EMAIL_OUTBOX_CLAIM_SIZE', 1000)),
+        'max_attempts': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)),
+        'retry_delay': float(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 30)),
+        'claim_timeout': float(os.getenv('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300)),
+    }
+
+def enqueue_email(kind: str, user, dedupe_key: Optional[str] = None, **context) -> Optional[EmailOutbox]:
+    """Record a transactional email for a user in the current session
+
+    Nothing is committed: the row is written in the same transaction as the
+    event that caused it, so the email exists if and only if the event does.
+    With a dedupe_key (e.g. a Stripe event id) a second enqueue of the same
+    key is ignored and returns None, including one that races another
+    transaction past the lookup: the insert runs in a savepoint, so losing
+    on the unique key rolls back only the duplicate row.
+    """
+    if kind not in OUTBOX_EMAILS:
+        raise ValueError(f'Unknown outbox email: {kind}. Must be one of: {list(OUTBOX_EMAILS)}')
+
+    if dedupe_key and db.session.query(EmailOutbox.id).filter_by(dedupe_key=dedupe_key).first():
+        return None
+
+    entry = EmailOutbox(
+        kind=kind,
+        user_id=user.id,
+        to_email=user.email,
+        context=json.dumps(context, sort_keys=True) if context else None,
+        substitutions=json.dumps({'username': user.username}),
+        dedupe_key=dedupe_key
+    )
+    if not dedupe_key:
+        db.session.add(entry)
+        return entry
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(entry)
+    except IntegrityError:
+        if db.session.query(EmailOutbox.id).filter_by(dedupe_key=dedupe_key).first():
+            return None
+        raise
+    return entry
+
+def recover_stale_claims(claim_timeout: float) -> Tuple[int, int]:
+    """Release claims a drainer abandoned before sending; fail the ones it abandoned mid-send
+
+    Returns (released, abandoned).
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=claim_timeout)
+
+    released = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == 'claimed', EmailOutbox.claimed_at < cutoff)
+        .values(status='pending', claim_token=None)
+    ).rowcount
+
+    # The provider may have accepted these; sending them again could double-send
+    abandoned = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < cutoff)
+        .values(status='failed', claim_token=None, last_error='Delivery unknown: drainer stopped while sending')
+    ).rowcount
+
+    db.session.commit()
+    return released, abandoned
+
+def claim_batch(limit: int) -> Tuple[str, List]:
+    """Atomically claim up to limit due rows, oldest first
+
+    One UPDATE moves the rows from pending to claimed under a fresh token,
+    re-checking the status, so concurrent drainers never claim the same row.
+    Returns the token and plain rows (id, kind, to_email, context,
+    substitutions, attempts) that stay readable across the drainer's commits.
+    """
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+
+    due = select(EmailOutbox.id).where(
+        EmailOutbox.status == 'pending',
+        or_(EmailOutbox.next_attempt_at.is_(None), EmailOutbox.next_attempt_at <= now)
+    ).order_by(EmailOutbox.id).limit(limit)
+
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due), EmailOutbox.status == 'pending')
+        .values(status='claimed', claim_token=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return token, db.session.execute(
+        select(
+            EmailOutbox.id, EmailOutbox.kind, EmailOutbox.to_email,
+            EmailOutbox.context, EmailOutbox.substitutions, EmailOutbox.attempts
+        ).where(EmailOutbox.claim_token == token).order_by(EmailOutbox.id)
+    ).all()
+
+def _owned(entries: List, token: str):
+    # A claim held past claim_timeout may have been recovered and re-claimed
+    # by another drainer; rows are only updated while they still carry token
+    return update(EmailOutbox).where(
+        EmailOutbox.id.in_([entry.id for entry in entries]),
+        EmailOutbox.claim_token == token
+    ).execution_options(synchronize_session=False)
+
+def _mark(entries: List, token: str, **values) -> int:
+    """Update the rows still claimed under token; returns how many matched"""
+    if not entries:
+        return 0
+    return db.session.execute(_owned(entries, token).values(**values)).rowcount
+
+def _mark_sending(entries: List, token: str) -> List:
+    """Mark the rows still claimed under token as sending; returns those rows"""
+    owned = set(db.session.execute(
+        _owned(entries, token)
+        .values(status='sending', attempts=EmailOutbox.attempts + 1, claimed_at=datetime.utcnow())
+        .returning(EmailOutbox.id)
+    ).scalars())
+    return [entry for entry in entries if entry.id in owned]
+
+def _retry_or_fail(entries: List, token: str, error: str, settings: Dict):
+    """Put rows the provider did not accept back in the queue, or fail them after max_attempts"""
+    now = datetime.utcnow()
+    exhausted = [entry for entry in entries if entry.attempts + 1 >= settings['max_attempts']]
+    retrying = [entry for entry in entries if entry.attempts + 1 < settings['max_attempts']]
+
+    _mark(exhausted, token, status='failed', claim_token=None, last_error=error)
+    # Every row in a send shares its attempt count, so one backoff fits them all
+    if retrying:
+        delay = settings['retry_delay'] * 2 ** retrying[0].attempts
+        _mark(retrying, token, status='pending', claim_token=None, last_error=error,
+              next_attempt_at=now + timedelta(seconds=delay))
+    return len(exhausted), len(retrying)
+
+def _group(entries: List) -> Dict[Tuple[str, str, int], List]:
+    """Group claimed rows that share one rendering: same kind, context and attempt count"""
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry.kind, entry.context or '', entry.attempts), []).append(entry)
+    return groups
+
+def drain_outbox(service, settings: Optional[Dict] = None) -> Dict:
+    """Send every due outbox row through the bulk provider path
+
+    Rows are claimed in batches of claim_size. Each (kind, context) group is
+    rendered once, with the recipient's username as a substitution slot,
+    and sent in provider-sized bulk requests. A row is marked sending, and
+    committed, right before its request goes out. Every update is fenced
+    by the batch's claim token, so rows whose claim went stale and were
+    taken over by another drainer are skipped rather than sent twice:
+
+    - accepted by the provider: sent
+    - refused by the provider (error status, throttled, not configured):
+      back to pending with a backoff, until max_attempts
+    - no answer (timeout, dropped connection): failed as delivery unknown,
+      never retried, so no recipient gets the same email twice
+
+    Must run inside an app context. Returns counts of what happened.
+    """
+    settings = settings or outbox_settings()
+    stats = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'throttled': 0, 'lost': 0}
+
+    released, abandoned = recover_stale_claims(settings['claim_timeout'])
+    stats['failed'] += abandoned
+    if released or abandoned:
+        logger.warning(f"Outbox recovery: released {released} stale claim(s), failed {abandoned} interrupted send(s)")
+
+    throttled_until = None
+    while throttled_until is None:
+        token, claimed = claim_batch(settings['claim_size'])
+        stats['claimed'] += len(claimed)
+
+        for (kind, context, attempts), group in _group(claimed).items():
+            for batch in [group[i:i + service.batch_size] for i in range(0, len(group), service.batch_size)]:
+                if throttled_until is not None:
+                    _mark(batch, token, status='pending', claim_token=None, next_attempt_at=throttled_until)
+                    stats['throttled'] += len(batch)
+                    continue
+
+                try:
+                    context_dict = json.loads(context) if context else {}
+                    subject = OUTBOX_EMAILS[kind](context_dict)
+                    recipients = [
+                        {'email': entry.to_email, 'substitutions': json.loads(entry.substitutions or '{}')}
+                        for entry in batch
+                    ]
+                    slots = {name for recipient in recipients for name in recipient['substitutions']}
+                    content = render_email(kind, user={name: substitution_tag(name) for name in slots}, **context_dict)
+                except Exception as e:
+                    logger.error(f"Cannot render outbox email {kind}: {str(e)}")
+                    _mark(batch, token, status='failed', claim_token=None, last_error=f'Render error: {str(e)}')
+                    stats['failed'] += len(batch)
+                    continue
+
+                owned = _mark_sending(batch, token)
+                db.session.commit()
+                if len(owned) < len(batch):
+                    logger.warning(f"Outbox claim {token} lost {len(batch) - len(owned)} row(s) to stale-claim recovery")
+                    stats['lost'] += len(batch) - len(owned)
+                    if not owned:
+                        continue
+                    owned_ids = {entry.id for entry in owned}
+                    recipients = [recipient for entry, recipient in zip(batch, recipients) if entry.id in owned_ids]
+                    batch = owned
+
+                result = service.send_bulk(recipients, subject, content['html'], content['text'])
+                outcome = result['batches'][0] if result['batches'] else {'error': result.get('error'), 'retryable': True}
+
+                if result['success']:
+                    _mark(batch, token, status='sent', claim_token=None, sent_at=datetime.utcnow(), last_error=None)
+                    stats['sent'] += len(batch)
+                elif outcome.get('throttled'):
+                    throttled_until = datetime.utcnow() + timedelta(seconds=result['retry_after'])
+                    _mark(batch, token, status='pending', claim_token=None, attempts=EmailOutbox.attempts - 1,
+                          next_attempt_at=throttled_until)
+                    stats['throttled'] += len(batch)
+                elif outcome.get('retryable'):
+                    failed, retrying = _retry_or_fail(batch, token, outcome['error'], settings)
+                    stats['failed'] += failed
+                    stats['retrying'] += retrying
+                else:
+                    _mark(batch, token, status='failed', claim_token=None, last_error=f"Delivery unknown: {outcome['error']}")
+                    stats['failed'] += len(batch)
+
+                db.session.commit()
+
+        db.session.commit()
+        if len(claimed) < settings['claim_size']:
+            break
+
+    return stats
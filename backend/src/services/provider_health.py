@@ -0,0 +1,179 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional
+from src.services.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = 'email-provider-metrics'
+METRIC_FIELDS = ['requests', 'sent', 'failed', 'throttled', 'errors', 'latency_ms']
+ERROR_RATE_ALPHA = 0.2  # weight of the newest outcome in the error-rate average
+MIN_HEALTH = 0.05  # a provider that keeps failing still gets a trickle once available
+THROUGHPUT_WINDOW = 60.0
+
+class ProviderHealth:
+    """Live health and send metrics of one email provider account in this process
+
+    Each request outcome updates an exponentially weighted error rate that
+    scales the provider's share of traffic. failure_threshold consecutive
+    failures take it out of rotation for cooldown seconds, and a throttle
+    takes it out until the provider's Retry-After; afterwards it is tried
+    again, and one more failure takes it straight back out. Counters are
+    also added to Redis when available, so any process can report totals
+    for the whole fleet.
+    """
+
+    def __init__(self, name: str, weight: float = 1.0, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.name = name
+        self.weight = weight
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.unavailable_until = 0.0
+        self.unavailable_reason = None
+        self.counters = Counter()
+        self._recent = deque()  # (monotonic time, recipients sent)
+
+    def available(self, now: Optional[float] = None) -> bool:
+        return self.unavailable_until <= (now or time.monotonic())
+
+    def effective_weight(self) -> float:
+        return self.weight * max(MIN_HEALTH, 1.0 - self.error_rate)
+
+    def _outcome(self, failed: bool):
+        self.error_rate += ERROR_RATE_ALPHA * ((1.0 if failed else 0.0) - self.error_rate)
+
+    def _trim(self, now: float):
+        while self._recent and now - self._recent[0][0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def record_success(self, recipients: int, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            self._outcome(False)
+            self.consecutive_failures = 0
+            self._recent.append((now, recipients))
+            self._trim(now)
+        self._count(requests=1, sent=recipients, latency_ms=int(latency * 1000))
+
+    def record_failure(self, recipients: int, latency: float, error: str):
+        """Record a request the provider refused or never answered"""
+        with self._lock:
+            self._outcome(True)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.unavailable_until = time.monotonic() + self.cooldown
+                self.unavailable_reason = 'failing'
+                logger.warning(f"Email provider {self.name} failing ({self.consecutive_failures} in a row, "
+                               f"last: {error}); out of rotation for {self.cooldown:g}s")
+        self._count(requests=1, failed=recipients, errors=1, latency_ms=int(latency * 1000))
+
+    def record_throttle(self, retry_after: float):
+        with self._lock:
+            self.unavailable_until = max(self.unavailable_until, time.monotonic() + retry_after)
+            self.unavailable_reason = 'throttled'
+        self._count(requests=1, throttled=1)
+
+    def _count(self, **increments):
+        with self._lock:
+            self.counters.update(increments)
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                for field, amount in increments.items():
+                    pipeline.hincrby(f'{METRICS_KEY_PREFIX}:{self.name}', field, amount)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Email provider metrics write failed: {str(e)}")
+                reset_redis()
+
+    def stats(self) -> Dict:
+        """Get the provider's state and this process's counters"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            requests = self.counters['requests'] - self.counters['throttled']
+
+            return {
+                'name': self.name,
+                'weight': self.weight,
+                'effective_weight': round(self.effective_weight(), 3),
+                'state': 'available' if self.available(now) else self.unavailable_reason,
+                'available_in': round(max(0.0, self.unavailable_until - now), 1),
+                'error_rate': round(self.error_rate, 3),
+                'requests': self.counters['requests'],
+                'sent': self.counters['sent'],
+                'failed': self.counters['failed'],
+                'throttled': self.counters['throttled'],
+                'errors': self.counters['errors'],
+                'avg_latency_ms': round(self.counters['latency_ms'] / requests, 1) if requests else None,
+                'sent_per_second': round(sum(sent for _, sent in self._recent) / THROUGHPUT_WINDOW, 2)
+            }
+
+class ProviderBalancer:
+    """Pick a provider for each request by weight, skipping unhealthy ones"""
+
+    def __init__(self, providers: Iterable[ProviderHealth]):
+        self.providers = list(providers)
+
+    def choose(self, exclude: Iterable[str] = ()) -> Optional[ProviderHealth]:
+        """Weighted random choice among available providers not in exclude, or None
+
+        Providers with weight 0 are standbys: picked only when no weighted
+        provider is available, uniformly among themselves.
+        """
+        now = time.monotonic()
+        exclude = set(exclude)
+        candidates = [
+            provider for provider in self.providers
+            if provider.name not in exclude and provider.available(now)
+        ]
+        if not candidates:
+            return None
+        weights = [provider.effective_weight() for provider in candidates]
+        if not any(weights):
+            return random.choice(candidates)
+        return random.choices(candidates, weights=weights)[0]
+
+    def unavailable(self, exclude: Iterable[str] = ()) -> List[ProviderHealth]:
+        """Providers out of rotation right now, soonest back first"""
+        now = time.monotonic()
+        exclude = set(exclude)
+        return sorted(
+            (provider for provider in self.providers if provider.name not in exclude and not provider.available(now)),
+            key=lambda provider: provider.unavailable_until
+        )
+
+    def stats(self) -> List[Dict]:
+        """Per-provider stats for this process, plus fleet totals from Redis when available"""
+        stats = [provider.stats() for provider in self.providers]
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                for provider in self.providers:
+                    pipeline.hgetall(f'{METRICS_KEY_PREFIX}:{provider.name}')
+                for entry, totals in zip(stats, pipeline.execute()):
+                    totals = {field.decode(): int(value) for field, value in totals.items()}
+                    entry['totals'] = {field: totals.get(field, 0) for field in METRIC_FIELDS}
+            except Exception as e:
+                logger.warning(f"Email provider metrics read failed: {str(e)}")
+                reset_redis()
+
+        return stats
+
+def health_settings() -> Dict:
+    return {
+        'failure_threshold': int(os.getenv('EMAIL_PROVIDER_FAILURE_THRESHOLD', 3)),
+        'cooldown': float(os.getenv('EMAIL_PROVIDER_COOLDOWN', 30)),
+    }
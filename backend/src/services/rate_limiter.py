@@ -0,0 +1,239 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from src.services.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ratelimit'
+
+# After a 429 the rate is cut to this fraction, never below MIN_RATE_FRACTION
+# of the ceiling, and then recovers by RECOVERY_PER_SECOND of the ceiling
+# every second without another 429
+DECREASE_FACTOR = 0.5
+MIN_RATE_FRACTION = 0.05
+RECOVERY_PER_SECOND = 0.05
+
+# Token bucket shared by every process through Redis. The hash holds the
+# tokens left, the last refill time, the current (adapted) rate and the time
+# until which a Retry-After blocks all sends. Returns the milliseconds to wait
+# before the tokens are available (0 when they were taken).
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local ceiling = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+    return blocked_until - now
+end
+
+local ts = tonumber(state[2]) or now
+local elapsed = math.max(0, now - ts) / 1000
+local rate = math.min(ceiling, (tonumber(state[3]) or ceiling) + ceiling * recovery * elapsed)
+local tokens = math.min(burst, (tonumber(state[1]) or burst) + rate * elapsed)
+
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now, 'rate', tostring(rate))
+redis.call('PEXPIRE', KEYS[1], 3600000)
+return wait
+"""
+
+# Applies a 429: block every sender until Retry-After and cut the rate
+PENALIZE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local ceiling = tonumber(ARGV[1])
+local retry_after_ms = tonumber(ARGV[2])
+local decrease = tonumber(ARGV[3])
+local min_rate = tonumber(ARGV[4])
+
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or ceiling
+rate = math.max(min_rate, rate * decrease)
+local blocked_until = math.max(tonumber(redis.call('HGET', KEYS[1], 'blocked_until')) or 0, now + retry_after_ms)
+
+redis.call('HSET', KEYS[1], 'tokens', '0', 'ts', blocked_until, 'rate', tostring(rate), 'blocked_until', blocked_until)
+redis.call('PEXPIRE', KEYS[1], 3600000)
+return tostring(rate)
+"""
+
+class ProviderThrottled(Exception):
+    """A provider request was throttled, or would wait too long for the rate limiter"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Parse a Retry-After header (seconds or an HTTP date) into seconds"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+class TokenBucketLimiter:
+    """Token-bucket rate limiter that backs off on provider throttling
+
+    Runs at `rate` requests per second with bursts of up to `burst`. When
+    Redis is available the bucket is shared by every web and worker process
+    using the same name; otherwise each process keeps its own. A 429 blocks
+    all senders until its Retry-After and halves the rate, which then creeps
+    back up to `rate` while no further 429s arrive.
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.key = f'{KEY_PREFIX}:{name}'
+
+        # In-process fallback state
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._ts = time.monotonic()
+        self._current_rate = rate
+        self._blocked_until = 0.0
+
+        self.waited = 0.0
+        self.throttled = 0
+
+    def _reserve_local(self, tokens: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._blocked_until > now:
+                return self._blocked_until - now
+
+            elapsed = max(0.0, now - self._ts)
+            self._current_rate = min(self.rate, self._current_rate + self.rate * RECOVERY_PER_SECOND * elapsed)
+            self._tokens = min(self.burst, self._tokens + self._current_rate * elapsed)
+            self._ts = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self._current_rate
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens if available, else return the seconds to wait for them"""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                wait_ms = redis_client.eval(
+                    ACQUIRE_SCRIPT, 1, self.key, self.rate, self.burst, tokens, RECOVERY_PER_SECOND
+                )
+                return int(wait_ms) / 1000
+            except Exception as e:
+                logger.warning(f"Shared rate limiter unavailable, limiting per process: {str(e)}")
+                reset_redis()
+
+        return self._reserve_local(tokens)
+
+    def acquire(self, tokens: float = 1, max_wait: Optional[float] = None) -> bool:
+        """Block until tokens are available; False if that would take longer than max_wait"""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return True
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+
+            self.waited += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1, max_wait: Optional[float] = None) -> bool:
+        """Like acquire, but waits with asyncio.sleep so other sends keep running"""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return True
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: float):
+        """Record a 429: pause every sender for retry_after seconds and cut the rate"""
+        self.throttled += 1
+        min_rate = self.rate * MIN_RATE_FRACTION
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                new_rate = redis_client.eval(
+                    PENALIZE_SCRIPT, 1, self.key, self.rate, int(retry_after * 1000), DECREASE_FACTOR, min_rate
+                )
+                logger.warning(f"Provider throttled {self.name}: pausing {retry_after:.1f}s, rate now {float(new_rate):.2f}/s")
+                return
+            except Exception as e:
+                logger.warning(f"Shared rate limiter unavailable, limiting per process: {str(e)}")
+                reset_redis()
+
+        with self._lock:
+            now = time.monotonic()
+            self._current_rate = max(min_rate, self._current_rate * DECREASE_FACTOR)
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tokens = 0.0
+            self._ts = self._blocked_until
+        logger.warning(f"Provider throttled {self.name}: pausing {retry_after:.1f}s, rate now {self._current_rate:.2f}/s")
+
+    def stats(self) -> Dict:
+        """Get the configured rate and this process's wait/throttle counters"""
+        return {
+            'name': self.name,
+            'rate': self.rate,
+            'burst': self.burst,
+            'waited_seconds': round(self.waited, 3),
+            'throttled': self.throttled,
+            'backend': 'redis' if get_redis() is not None else 'memory'
+        }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider: str, api_key: Optional[str], ceiling: Optional[float] = None) -> TokenBucketLimiter:
+    """Get the process's limiter for a provider and API key
+
+    The provider ceiling is ceiling, or EMAIL_RATE_LIMIT, requests per second; the bucket
+    runs at EMAIL_RATE_HEADROOM of it so sustained sends stay just under. The
+    burst defaults to the headroom, so a full bucket plus a second of refill
+    still fits within one second's ceiling.
+    """
+    key_hash = hashlib.sha1((api_key or '').encode()).hexdigest()[:12]
+    name = f'{provider}:{key_hash}'
+
+    with _limiters_lock:
+        if name not in _limiters:
+            ceiling = float(ceiling or os.getenv('EMAIL_RATE_LIMIT', 10))
+            headroom = float(os.getenv('EMAIL_RATE_HEADROOM', 0.9))
+            rate = ceiling * headroom
+            burst = float(os.getenv('EMAIL_RATE_BURST') or max(1.0, ceiling - rate))
+            _limiters[name] = TokenBucketLimiter(name, rate=rate, burst=burst)
+        return _limiters[name]
@@ -0,0 +1,62 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.models.user import db, User
+from src.models.subscription import Subscription
+
+# Who a fan-out goes to
+AUDIENCES = ['all', 'premium']
+
+def audience_query(audience: str, *columns):
+    """Query the given columns for every user in an audience"""
+    query = db.session.query(*(columns or (User.id,)))
+
+    if audience == 'premium':
+        query = query.join(Subscription, Subscription.user_id == User.id).filter(
+            Subscription.tier == 'premium',
+            Subscription.status == 'active'
+        )
+    elif audience != 'all':
+        raise ValueError(f'Unknown audience: {audience}. Must be one of: {AUDIENCES}')
+
+    return query
+
+def keyset_ranges(audience: str, batch_size: int) -> Iterator[Tuple[int, int, int]]:
+    """Walk an audience in user id order, yielding (after_id, last_id, count) per batch
+
+    Each step reads only the next batch_size ids, so memory stays flat no
+    matter how large the audience is. A batch covers the users with
+    after_id < id <= last_id.
+    """
+    after_id = 0
+    while True:
+        ids = [row.id for row in audience_query(audience, User.id).filter(
+            User.id > after_id
+        ).order_by(User.id).limit(batch_size)]
+
+        if not ids:
+            return
+
+        yield after_id, ids[-1], len(ids)
+        after_id = ids[-1]
+
+def load_recipients(audience: str, after_id: int, last_id: int,
+                    substitutions: Optional[List[str]] = None) -> List[Dict]:
+    """Load one keyset batch as EmailService.send_bulk recipients
+
+    substitutions names the user columns (e.g. 'username') to pass along as
+    per-recipient values.
+    """
+    substitutions = substitutions or []
+    columns = [User.id, User.email] + [getattr(User, name) for name in substitutions]
+
+    rows = audience_query(audience, *columns).filter(
+        User.id > after_id,
+        User.id <= last_id
+    ).order_by(User.id).all()
+
+    return [
+        {
+            'email': row.email,
+            'substitutions': {name: getattr(row, name) for name in substitutions}
+        }
+        for row in rows
+    ]
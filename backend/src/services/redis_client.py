@@ -0,0 +1,56 @@
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before retrying after Redis was found unreachable
+RETRY_INTERVAL = 30.0
+
+_client = None
+_last_failure = 0.0
+_lock = threading.Lock()
+
+def get_redis():
+    """Get a shared Redis client, or None when REDIS_URL is unset or Redis is unreachable"""
+    global _client, _last_failure
+
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+
+    if _client is not None:
+        return _client
+
+    if time.monotonic() - _last_failure < RETRY_INTERVAL:
+        return None
+
+    with _lock:
+        if _client is not None:
+            return _client
+
+        try:
+            import redis
+
+            client = redis.Redis.from_url(
+                redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=1.0
+            )
+            client.ping()
+            _client = client
+        except Exception as e:
+            logger.warning(f"Redis unavailable, using in-process fallback: {str(e)}")
+            _last_failure = time.monotonic()
+            return None
+
+    return _client
+
+def reset_redis(client: Optional[object] = None):
+    """Drop the shared client, e.g. after a fork or a connection error"""
+    global _client, _last_failure
+    with _lock:
+        _client = client
+        _last_failure = time.monotonic() if client is None else 0.0
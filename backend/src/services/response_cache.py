@@ -0,0 +1,170 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.models.newsletter import Newsletter
+from src.services.cache import LRUTTLCache
+from src.services.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'newsletter-response'
+
+# Variants that are identical for every reader in the tier, so safe to share.
+# Full private and premium bodies are left to the regular read path.
+CACHEABLE_TIERS = {
+    'public': ('full',),
+    'premium': ('summary', 'summary-anonymous'),
+}
+ALL_TIERS = sorted({tier for tiers in CACHEABLE_TIERS.values() for tier in tiers})
+
+def is_cacheable(visibility: str, tier: str) -> bool:
+    """Whether a newsletter variant is the same for everyone served it"""
+    return tier in CACHEABLE_TIERS.get(visibility, ())
+
+class NewsletterResponseCache:
+    """Shared cache of rendered newsletter detail payloads
+
+    Entries hold the serialized JSON body keyed on (newsletter id, access
+    tier), along with the updated_at it was rendered from; callers pass the
+    current updated_at and an entry rendered from an older row is treated as
+    a miss. Redis is used when available, so every web process shares one
+    copy, with an in-process LRU+TTL cache as the fallback. Commits that
+    update or delete a newsletter drop its entries.
+    """
+
+    def __init__(self, maxsize: int = 2000, ttl: float = 300.0):
+        self.ttl = ttl
+        self._local = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, newsletter_id: int, tier: str) -> str:
+        return f'{KEY_PREFIX}:{newsletter_id}:{tier}'
+
+    def get(self, newsletter_id: int, tier: str, updated_at: Optional[str]) -> Optional[Dict]:
+        """Get a cached {'body', 'status', 'updated_at'} entry, or None on a miss"""
+        key = self._key(newsletter_id, tier)
+        entry = None
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                raw = redis_client.get(key)
+                entry = json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"Response cache read failed: {str(e)}")
+                reset_redis()
+        else:
+            entry = self._local.get(key)
+
+        if entry is None or entry['updated_at'] != updated_at:
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return entry
+
+    def set(self, newsletter_id: int, tier: str, updated_at: Optional[str], body: str, status: int = 200):
+        """Store a rendered payload for a newsletter variant"""
+        key = self._key(newsletter_id, tier)
+        entry = {'body': body, 'status': status, 'updated_at': updated_at}
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.set(key, json.dumps(entry), ex=max(int(self.ttl), 1))
+                return
+            except Exception as e:
+                logger.warning(f"Response cache write failed: {str(e)}")
+                reset_redis()
+
+        self._local.set(key, entry)
+
+    def invalidate(self, newsletter_ids: Iterable[int]):
+        """Drop every cached variant of the given newsletters"""
+        keys = [
+            self._key(int(newsletter_id), tier)
+            for newsletter_id in newsletter_ids if newsletter_id is not None
+            for tier in ALL_TIERS
+        ]
+        if not keys:
+            return
+
+        for key in keys:
+            self._local.delete(key)
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.delete(*keys)
+            except Exception as e:
+                # Entries still expire, and stale ones fail the updated_at check
+                logger.warning(f"Response cache invalidation failed: {str(e)}")
+                reset_redis()
+
+    def clear(self):
+        """Drop every entry held in this process and reset the counters"""
+        self._local.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for this process and the active backend"""
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+        local_stats = self._local.stats()
+        stats.update({
+            'backend': 'redis' if get_redis() is not None else 'memory',
+            'local_size': local_stats['size'],
+            'maxsize': local_stats['maxsize'],
+            'ttl': self.ttl
+        })
+        return stats
+
+response_cache = NewsletterResponseCache(
+    maxsize=int(os.getenv('NEWSLETTER_CACHE_SIZE', 2000)),
+    ttl=float(os.getenv('NEWSLETTER_CACHE_TTL', 300))
+)
+
+def invalidate_on_commit(session: Optional[Session], newsletter_ids: Iterable[int]):
+    """Drop the newsletters' cached payloads once the session commits
+
+    For writes that bypass the ORM (set-based UPDATEs); ORM updates and
+    deletes are tracked automatically. All ids are invalidated in one batch.
+    """
+    if session is None:
+        return
+    session.info.setdefault('dirty_newsletters', set()).update(
+        newsletter_id for newsletter_id in newsletter_ids if newsletter_id is not None
+    )
+
+@event.listens_for(Newsletter, 'after_update')
+@event.listens_for(Newsletter, 'after_delete')
+def _newsletter_changed(mapper, connection, target):
+    invalidate_on_commit(inspect(target).session, [target.id])
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    newsletter_ids = session.info.pop('dirty_newsletters', None)
+    if newsletter_ids:
+        response_cache.invalidate(newsletter_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('dirty_newsletters', None)
@@ -0,0 +1,144 @@
+import re
+import logging
+from typing import List, Optional
+from sqlalchemy import func, inspect, literal, literal_column, or_, select, table, text
+from src.models.user import db
+from src.models.newsletter import Newsletter
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'newsletter_fts'
+
+# Relative weight of a match in each column: title, summary, content
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+# SQLite: an external-content FTS5 table over the newsletter rows, kept in step
+# by triggers so raw SQL writes are indexed as well as ORM ones
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, summary, content,
+        content='newsletter', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON newsletter BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON newsletter BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, summary, content ON newsletter BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+]
+
+# Postgres: a generated, weighted tsvector column with a GIN index
+POSTGRES_DDL = [
+    """ALTER TABLE newsletter ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_newsletter_search_vector ON newsletter USING GIN (search_vector)",
+]
+
+def _dialect() -> str:
+    return db.engine.dialect.name
+
+def create_search_index() -> List[str]:
+    """Create the full-text index for the current database if it is missing"""
+    dialect = _dialect()
+
+    if dialect == 'sqlite':
+        created = not inspect(db.engine).has_table(FTS_TABLE)
+        for statement in SQLITE_DDL:
+            db.session.execute(text(statement))
+        if created:
+            # Index the rows written before the FTS table existed
+            db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+        return [f'created search index {FTS_TABLE}'] if created else []
+
+    if dialect == 'postgresql':
+        existing = {column['name'] for column in inspect(db.engine).get_columns('newsletter')}
+        for statement in POSTGRES_DDL:
+            db.session.execute(text(statement))
+        db.session.commit()
+        return [] if 'search_vector' in existing else ['created search index newsletter.search_vector']
+
+    logger.warning(f"No full-text index for {dialect}; search falls back to LIKE")
+    return []
+
+def rebuild_search_index():
+    """Re-index every newsletter from the newsletter table"""
+    if _dialect() == 'sqlite':
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+    # The Postgres column is generated, so it never needs rebuilding
+
+def _search_terms(query_text: str) -> List[str]:
+    return re.findall(r'\w+', query_text.lower())
+
+def _fts5_query(terms: List[str]) -> str:
+    """Quote each term so user input cannot use FTS5 syntax; the last one matches as a prefix"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def search_newsletters(query_text: str, visibilities: Optional[List[str]] = None):
+    """Build a query of (Newsletter, rank) rows matching query_text, best match first
+
+    Every term has to match (as a word in title, summary or content; the
+    last term also matches as a prefix, for search-as-you-type). Returns
+    None when the query has no searchable terms. Callers add projection
+    options and pagination.
+    """
+    terms = _search_terms(query_text)
+    if not terms:
+        return None
+
+    dialect = _dialect()
+
+    if dialect == 'sqlite':
+        fts = table(FTS_TABLE)
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        # bm25() is lower for better matches
+        matches = select(
+            literal_column('rowid').label('id'),
+            literal_column(f'bm25({FTS_TABLE}, {weights})').label('rank')
+        ).select_from(fts).where(
+            literal_column(FTS_TABLE).op('MATCH')(_fts5_query(terms))
+        ).subquery()
+
+        query = db.session.query(Newsletter, matches.c.rank).join(
+            matches, matches.c.id == Newsletter.id
+        ).order_by(matches.c.rank, Newsletter.id)
+
+    elif dialect == 'postgresql':
+        tsquery = func.to_tsquery('english', ' & '.join(terms[:-1] + [f'{terms[-1]}:*']))
+        search_vector = literal_column('newsletter.search_vector')
+        rank = func.ts_rank_cd(search_vector, tsquery).label('rank')
+
+        query = db.session.query(Newsletter, rank).filter(
+            search_vector.op('@@')(tsquery)
+        ).order_by(rank.desc(), Newsletter.id)
+
+    else:
+        # No full-text support: match every term anywhere, newest first
+        query = db.session.query(Newsletter, literal(0.0).label('rank'))
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(or_(
+                Newsletter.title.ilike(pattern),
+                Newsletter.summary.ilike(pattern),
+                Newsletter.content.ilike(pattern)
+            ))
+        query = query.order_by(Newsletter.created_at.desc(), Newsletter.id.desc())
+
+    if visibilities is not None:
+        query = query.filter(Newsletter.visibility.in_(visibilities))
+
+    return query
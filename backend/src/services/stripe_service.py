@@ -4,6 +4,7 @@ from typing import Dict, Optional
 from src.models.user import db
 from src.models.subscription import Subscription
 from src.models.payment import Payment
+from src.services.entitlements import get_entitlement
 
 class StripeService:
     def __init__(self):
@@ -177,7 +178,8 @@ class StripeService:
     
     def get_user_subscription_status(self, user_id: int) -> Dict:
         """Get user's current subscription status"""
-        subscription = Subscription.query.filter_by(user_id=user_id).first()
+        entitlement = get_entitlement(user_id)
+        subscription = entitlement['subscription']
         if not subscription:
             return {
                 'tier': 'free',
@@ -186,9 +188,9 @@ class StripeService:
             }
         
         return {
-            'tier': subscription.tier,
-            'status': subscription.status,
-            'has_premium': subscription.tier == 'premium' and subscription.status == 'active',
-            'stripe_subscription_id': subscription.stripe_subscription_id
+            'tier': subscription['tier'],
+            'status': subscription['status'],
+            'has_premium': entitlement['has_premium'],
+            'stripe_subscription_id': subscription['stripe_subscription_id']
         }
 
@@ -0,0 +1,84 @@
+import os
+import re
+from collections import Counter
+from typing import List
+
+SUMMARIZERS = ('extractive', 'llm')
+DEFAULT_SUMMARIZER = os.getenv('AI_SUMMARIZER', 'extractive').lower()
+SUMMARY_SENTENCES = 2
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 60
+FALLBACK_LENGTH = 200
+
+TITLE_BOOST = 2.0  # weight of terms that also appear in the title
+LEAD_BOOST = 0.3  # extra score for the earliest sentences, tapering to none at the end
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just let me more most my myself
+no nor not now of off on once only or other our ours ourselves out over own same she should so some such
+than that the their theirs them themselves then there these they this those through to too under until up
+us very was we were what when where which while who whom why will with would you your yours yourself
+yourselves get got make makes made one two three way ways thing things really
+""".split())
+
+_CODE_BLOCK = re.compile(r'```.*?```', re.S)
+_LINK = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_EMPHASIS = re.compile(r'[*_`~]+')
+_LIST_MARKER = re.compile(r'^\s*(?:[-*+>]|\d+[.)])\s+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])')
+_WORD = re.compile(r"[a-z][a-z'-]+")
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS]
+
+def _truncate(text: str) -> str:
+    return text[:FALLBACK_LENGTH] + '...' if len(text) > FALLBACK_LENGTH else text
+
+def _sentences(markdown: str):
+    """Title and prose sentences of markdown content, in order"""
+    title = ''
+    sentences = []
+    for line in _CODE_BLOCK.sub(' ', markdown).split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            title = title or line.lstrip('#').strip()
+            continue  # headings label sections; they are not summary sentences
+        line = _EMPHASIS.sub('', _LINK.sub(r'\1', _LIST_MARKER.sub('', line)))
+        sentences.extend(sentence.strip() for sentence in _SENTENCE_END.split(line) if sentence.strip())
+    return title, sentences
+
+def extractive_summary(markdown: str, sentences: int = SUMMARY_SENTENCES) -> str:
+    """Summarize markdown content by picking its most representative sentences
+
+    Each prose sentence is scored by how frequent its terms are across the
+    whole text, with terms from the title counting double and a slight
+    preference for earlier sentences. The best ones are returned in their
+    original order. Runs locally in well under a millisecond per newsletter.
+    """
+    title, candidates = _sentences(markdown or '')
+    frequencies = Counter(_terms(' '.join(candidates)))
+    if not frequencies:
+        return _truncate(' '.join(candidates) or title)
+
+    top = max(frequencies.values())
+    title_terms = set(_terms(title))
+    scored = []
+    for position, sentence in enumerate(candidates):
+        words = len(sentence.split())
+        terms = set(_terms(sentence))
+        if not terms or not MIN_SENTENCE_WORDS <= words <= MAX_SENTENCE_WORDS or sentence.endswith(':'):
+            continue
+        weight = sum(frequencies[term] / top * (TITLE_BOOST if term in title_terms else 1.0) for term in terms)
+        score = weight / len(terms) ** 0.5 * (1.0 + LEAD_BOOST * (1.0 - position / len(candidates)))
+        scored.append((score, position, sentence))
+
+    if not scored:
+        # Only fragments (bullets, short lines): fall back to a teaser
+        return _truncate(' '.join(candidates))
+
+    best = sorted(scored, reverse=True)[:sentences]
+    return ' '.join(sentence for _, _, sentence in sorted(best, key=lambda entry: entry[1]))
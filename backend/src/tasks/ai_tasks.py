@@ -2,9 +2,11 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+import asyncio
 from celery import current_task
 from src.celery_app import celery_app
 from src.services.ai_writer import AIWriter
+from src.services.content_manager import ContentVisibilityManager
 from src.models.user import db
 from src.models.newsletter import Newsletter
 import logging
@@ -12,7 +14,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True, name='src.tasks.ai_tasks.generate_newsletter_content')
-def generate_newsletter_content(self, topic, target_audience=None, creator_id=1, auto_save=True):
+def generate_newsletter_content(self, topic, target_audience=None, creator_id=1, auto_save=True, use_cache=True,
+                                summarizer=None):
     """
     Generate newsletter content asynchronously using AI
     """
@@ -26,7 +29,7 @@ def generate_newsletter_content(self, topic, target_audience=None, creator_id=1,
         self.update_state(state='PROGRESS', meta={'status': 'Generating content...'})
         
         # Generate newsletter content
-        newsletter_data = ai_writer.write_newsletter(topic, target_audience)
+        newsletter_data = ai_writer.write_newsletter(topic, target_audience, use_cache=use_cache, summarizer=summarizer)
         
         if auto_save:
             # Update task state
@@ -63,8 +66,80 @@ def generate_newsletter_content(self, topic, target_audience=None, creator_id=1,
         )
         raise exc
 
+@celery_app.task(bind=True, name='src.tasks.ai_tasks.generate_newsletters_bulk')
+def generate_newsletters_bulk(self, topics, target_audience=None, creator_id=1, auto_save=True, use_cache=True,
+                              summarizer=None, concurrency=None):
+    """
+    Generate a newsletter per topic concurrently, saving them in one batch
+    
+    Progress meta lists every topic as pending, done or failed as the
+    generations finish. Failed topics are reported in the result and do
+    not stop the rest.
+    """
+    try:
+        progress = [{'topic': topic, 'status': 'pending'} for topic in topics]
+        
+        def report(status):
+            completed = sum(1 for entry in progress if entry['status'] != 'pending')
+            self.update_state(state='PROGRESS', meta={
+                'status': status,
+                'progress': int(completed * 100 / len(topics)) if topics else 100,
+                'completed': completed,
+                'total': len(topics),
+                'topics': progress
+            })
+        
+        def on_result(index, entry):
+            progress[index]['status'] = 'done' if entry['success'] else 'failed'
+            if not entry['success']:
+                progress[index]['error'] = entry['error']
+            report('Generating content...')
+        
+        report('Generating content...')
+        
+        ai_writer = AIWriter()
+        results = asyncio.run(ai_writer.write_newsletters(
+            topics, target_audience, concurrency=concurrency, use_cache=use_cache, summarizer=summarizer,
+            on_result=on_result
+        ))
+        generated = [entry['newsletter'] for entry in results if entry['success']]
+        
+        if auto_save and generated:
+            # Update task state
+            report('Saving to database...')
+            
+            # Import Flask app context
+            from src.main import app
+            with app.app_context():
+                try:
+                    newsletter_ids = ContentVisibilityManager().bulk_create_newsletters(generated, creator_id)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                
+                for newsletter_data, newsletter_id in zip(generated, newsletter_ids):
+                    newsletter_data['id'] = newsletter_id
+                    newsletter_data['saved'] = True
+        
+        return {
+            'status': 'SUCCESS',
+            'results': results,
+            'generated': len(generated),
+            'failed': len(results) - len(generated),
+            'message': f'Generated {len(generated)} of {len(results)} newsletter(s)'
+        }
+        
+    except Exception as exc:
+        logger.error(f"Error generating newsletters in bulk: {str(exc)}")
+        self.update_state(
+            state='FAILURE',
+            meta={'error': str(exc), 'status': 'Failed to generate content'}
+        )
+        raise exc
+
 @celery_app.task(bind=True, name='src.tasks.ai_tasks.generate_newsletter_ideas')
-def generate_newsletter_ideas(self, niche=None, count=5):
+def generate_newsletter_ideas(self, niche=None, count=5, use_cache=True):
     """
     Generate newsletter ideas asynchronously using AI
     """
@@ -73,7 +148,7 @@ def generate_newsletter_ideas(self, niche=None, count=5):
         self.update_state(state='PROGRESS', meta={'status': 'Generating ideas...'})
         
         ai_writer = AIWriter()
-        ideas = ai_writer.generate_newsletter_ideas(niche, count)
+        ideas = ai_writer.generate_newsletter_ideas(niche, count, use_cache=use_cache)
         
         return {
             'status': 'SUCCESS',
@@ -92,7 +167,7 @@ def generate_newsletter_ideas(self, niche=None, count=5):
         raise exc
 
 @celery_app.task(bind=True, name='src.tasks.ai_tasks.enhance_newsletter_content')
-def enhance_newsletter_content(self, content, enhancement_type='improve'):
+def enhance_newsletter_content(self, content, enhancement_type='improve', use_cache=True):
     """
     Enhance existing newsletter content asynchronously
     """
@@ -101,25 +176,7 @@ def enhance_newsletter_content(self, content, enhancement_type='improve'):
         self.update_state(state='PROGRESS', meta={'status': 'Enhancing content...'})
         
         ai_writer = AIWriter()
-        
-        # Create enhancement prompt based on type
-        if enhancement_type == 'shorten':
-            prompt = f"Make this newsletter content more concise while keeping the key points:\n\n{content}"
-        elif enhancement_type == 'expand':
-            prompt = f"Expand this newsletter content with more details and examples:\n\n{content}"
-        else:  # improve
-            prompt = f"Improve this newsletter content to make it more engaging and valuable:\n\n{content}"
-        
-        response = ai_writer.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert content editor for newsletters. Enhance content while maintaining the original voice and message."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.6
-        )
-        
-        enhanced_content = response.choices[0].message.content
+        enhanced_content = ai_writer.enhance_content(content, enhancement_type, use_cache=use_cache)
         
         return {
             'status': 'SUCCESS',
@@ -2,40 +2,300 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from celery import current_task
+from celery import chord, current_task
 from src.celery_app import celery_app
 from src.models.user import db, User
 from src.models.subscription import Subscription
 from src.models.newsletter import Newsletter
+from src.services.recipients import keyset_ranges, load_recipients
+from src.services.http_client import (
+    ASYNC_CONNECTIONS_PER_CLIENT, get_http_session, http_timeouts, create_async_http_client
+)
+from src.services.rate_limiter import ProviderThrottled, get_limiter, parse_retry_after
+from src.services.email_templates import (
+    render_email, html_slot, split_html_slots, substitution_tag, substitution_values
+)
+from src.services.outbox import enqueue_email, drain_outbox
+from src.services.provider_health import ProviderBalancer, ProviderHealth, health_settings
+import json
+import time
+import asyncio
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
-class EmailService:
-    """Enhanced email service supporting both SendGrid and Mailgun"""
+# Most recipients one provider request can carry: SendGrid personalizations,
+# Mailgun batch sending with recipient-variables
+PROVIDER_BATCH_LIMITS = {
+    'sendgrid': 1000,
+    'mailgun': 1000,
+}
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def provider_setting(name, label=None, default=None, inherit=True):
+    """Read a provider setting, from NAME_<LABEL> for a labelled account
+    
+    A labelled account (a second API key, say) falls back to the unlabelled
+    setting when inherit is set; credentials are never inherited.
+    """
+    if label:
+        value = os.getenv(f'{name}_{label.upper()}')
+        if value is not None or not inherit:
+            return value if value is not None else default
+    return os.getenv(name, default)
+
+class BulkSender:
+    """Bulk send driver shared by a single provider and a provider pool
+    
+    Subclasses provide batch_size, has_provider and the per-batch
+    _send_batch / _send_batch_async, which return a result dict with
+    success plus either throttled/retry_after or error/retryable.
+    """
+    
+    @property
+    def send_concurrency(self):
+        """Provider requests a bulk send keeps in flight at once"""
+        return max(1, int(os.getenv('EMAIL_SEND_CONCURRENCY', 4)))
+    
+    def _unknown_provider_result(self, recipients):
+        logger.error(f"Unknown email provider: {self.provider}")
+        return {
+            'success': False,
+            'error': f'Unknown email provider: {self.provider}',
+            'sent_count': 0,
+            'failed_count': len(recipients),
+            'throttled_count': 0,
+            'throttled_recipients': [],
+            'retry_after': None,
+            'batches': []
+        }
+    
+    def _bulk_summary(self, outcomes):
+        """Add up a bulk send from its (batch, result) pairs, in batch order"""
+        sent_count = 0
+        failed_count = 0
+        throttled_recipients = []
+        retry_after = None
+        batches = []
+        
+        for index, (batch, result) in enumerate(outcomes):
+            if result['success']:
+                sent_count += len(batch)
+                entry = {'batch': index, 'recipients': len(batch), 'sent_count': len(batch), 'failed_count': 0}
+            elif result.get('throttled'):
+                retry_after = max(retry_after or 0, result['retry_after'])
+                throttled_recipients.extend(batch)
+                entry = {
+                    'batch': index,
+                    'recipients': len(batch),
+                    'sent_count': 0,
+                    'failed_count': 0,
+                    'throttled': True
+                }
+            else:
+                failed_count += len(batch)
+                entry = {
+                    'batch': index,
+                    'recipients': len(batch),
+                    'sent_count': 0,
+                    'failed_count': len(batch),
+                    'error': result['error'],
+                    # The provider answered and refused, so nothing went out
+                    'retryable': result.get('retryable', False)
+                }
+                logger.error(f"Failed to send batch {index} ({len(batch)} recipients): {result['error']}")
+            
+            if result.get('provider'):
+                entry['provider'] = result['provider']
+            batches.append(entry)
+        
+        return {
+            'success': failed_count == 0 and not throttled_recipients,
+            'sent_count': sent_count,
+            'failed_count': failed_count,
+            'throttled_count': len(throttled_recipients),
+            'throttled_recipients': throttled_recipients,
+            'retry_after': retry_after,
+            'batches': batches
+        }
     
-    def __init__(self):
-        self.provider = os.getenv('EMAIL_PROVIDER', 'sendgrid').lower()
-        self.from_email = os.getenv('FROM_EMAIL', 'noreply@manusai.com')
+    def send_bulk(self, recipients, subject, html_content, text_content=None):
+        """Send the same email to many recipients in provider-sized batches
+        
+        Each recipient is a dict with an 'email' and optional 'substitutions';
+        every substitution_tag(name) in the content is replaced with that
+        recipient's value. A failed batch counts all of its recipients as
+        failed. Once the provider throttles a batch the rest are not tried:
+        their recipients come back as throttled_recipients, to be sent again
+        after retry_after seconds. Returns sent/failed/throttled totals plus a
+        result per batch.
+        """
+        if not self.has_provider:
+            return self._unknown_provider_result(recipients)
+        
+        outcomes = []
+        retry_after = None
+        
+        for index, batch in enumerate(chunked(list(recipients), self.batch_size)):
+            if retry_after is None:
+                result = self._send_batch(batch, subject, html_content, text_content)
+                if result.get('throttled'):
+                    retry_after = result['retry_after']
+                    logger.warning(f"Batch {index} throttled, deferring the rest of the send by {retry_after:.1f}s")
+            else:
+                result = {'success': False, 'throttled': True, 'retry_after': retry_after}
+            outcomes.append((batch, result))
+        
+        return self._bulk_summary(outcomes)
+    
+    async def send_bulk_async(self, recipients, subject, html_content, text_content=None, concurrency=None):
+        """Like send_bulk, but with up to concurrency provider requests in flight
+        
+        concurrency sender coroutines take batches off a shared queue, each
+        on an httpx.AsyncClient it shares with at most
+        ASYNC_CONNECTIONS_PER_CLIENT - 1 others, so a single worker process
+        overlaps the provider's response time across requests instead of
+        waiting on each in turn. Once a batch is throttled, batches not yet
+        started are returned as throttled_recipients too.
+        """
+        if not self.has_provider:
+            return self._unknown_provider_result(recipients)
         
-        if self.provider == 'sendgrid':
-            self.api_key = os.getenv('SENDGRID_API_KEY')
-            self.base_url = 'https://api.sendgrid.com/v3/mail/send'
+        batches = chunked(list(recipients), self.batch_size)
+        concurrency = max(1, min(concurrency or self.send_concurrency, len(batches)))
+        pending = deque(enumerate(batches))
+        results = [None] * len(batches)
+        throttle = {'retry_after': None}
+        
+        async def sender(client):
+            while pending:
+                index, batch = pending.popleft()
+                if throttle['retry_after'] is not None:
+                    results[index] = {'success': False, 'throttled': True, 'retry_after': throttle['retry_after']}
+                    continue
+                
+                result = await self._send_batch_async(client, batch, subject, html_content, text_content)
+                if result.get('throttled') and throttle['retry_after'] is None:
+                    throttle['retry_after'] = result['retry_after']
+                    logger.warning(f"Batch {index} throttled, deferring the rest of the send by {result['retry_after']:.1f}s")
+                results[index] = result
+        
+        clients = [create_async_http_client() for _ in range(0, concurrency, ASYNC_CONNECTIONS_PER_CLIENT)]
+        try:
+            await asyncio.gather(*(
+                sender(clients[index // ASYNC_CONNECTIONS_PER_CLIENT]) for index in range(concurrency)
+            ))
+        finally:
+            for client in clients:
+                await client.aclose()
+        
+        return self._bulk_summary(list(zip(batches, results)))
+    
+    def send_bulk_concurrent(self, recipients, subject, html_content, text_content=None, concurrency=None):
+        """Run send_bulk_async from synchronous code such as a Celery task"""
+        concurrency = concurrency or self.send_concurrency
+        if concurrency == 1 or len(recipients) <= self.batch_size:
+            return self.send_bulk(recipients, subject, html_content, text_content)
+        return asyncio.run(self.send_bulk_async(recipients, subject, html_content, text_content, concurrency))
+
+class EmailService(BulkSender):
+    """Enhanced email service supporting both SendGrid and Mailgun
+    
+    One instance sends through one provider account: EMAIL_PROVIDER by
+    default, or the given provider with settings read for label (see
+    provider_setting).
+    """
+    
+    def __init__(self, session=None, provider=None, label=None):
+        self.provider = (provider or os.getenv('EMAIL_PROVIDER', 'sendgrid')).lower()
+        self.label = label
+        self.from_email = provider_setting('FROM_EMAIL', label, 'noreply@manusai.com')
+        self._session = session
+        
+        # Wire format of the provider's API; the local sink can speak either
+        self.api = self.provider
+        
+        if self.provider in ('local', 'stub'):
+            # scripts/email_sink.py, for development and load tests without credentials
+            self.provider = 'local'
+            self.api = provider_setting('LOCAL_EMAIL_API', label, 'sendgrid').lower()
+            self.api_key = f'local-{label}' if label else 'local'
+            self.domain = 'local.test'
+            api_url = provider_setting('LOCAL_EMAIL_URL', label, 'http://127.0.0.1:8025').rstrip('/')
+            self.base_url = f'{api_url}/v3/mail/send' if self.api == 'sendgrid' else f'{api_url}/v3/{self.domain}/messages'
+        elif self.provider == 'sendgrid':
+            self.api_key = provider_setting('SENDGRID_API_KEY', label, inherit=False)
+            api_url = provider_setting('SENDGRID_API_URL', label, 'https://api.sendgrid.com').rstrip('/')
+            self.base_url = f'{api_url}/v3/mail/send'
         elif self.provider == 'mailgun':
-            self.api_key = os.getenv('MAILGUN_API_KEY')
-            self.domain = os.getenv('MAILGUN_DOMAIN')
-            self.base_url = f'https://api.mailgun.net/v3/{self.domain}/messages'
+            self.api_key = provider_setting('MAILGUN_API_KEY', label, inherit=False)
+            self.domain = provider_setting('MAILGUN_DOMAIN', label, inherit=False)
+            api_url = provider_setting('MAILGUN_API_URL', label, 'https://api.mailgun.net').rstrip('/')
+            self.base_url = f'{api_url}/v3/{self.domain}/messages'
+        
+        self.name = f'{self.provider}@{label}' if label else self.provider
+    
+    @property
+    def has_provider(self):
+        return self.api in PROVIDER_BATCH_LIMITS
+    
+    @property
+    def session(self):
+        """HTTP session for provider requests: the process-wide keep-alive pool by default"""
+        return self._session or get_http_session()
+    
+    @property
+    def limiter(self):
+        """Rate limiter shared by every sender using this provider and API key"""
+        return get_limiter(self.provider, self.api_key, ceiling=provider_setting('EMAIL_RATE_LIMIT', self.label))
+    
+    def _throttled_post(self, **kwargs):
+        """POST to the provider once the rate limiter allows it
+        
+        Raises ProviderThrottled when the limiter would make the send wait
+        longer than EMAIL_RATE_MAX_WAIT, or when the provider answers 429
+        anyway; the 429's Retry-After pauses every sender sharing the limiter.
+        """
+        max_wait = float(os.getenv('EMAIL_RATE_MAX_WAIT', 30))
+        if not self.limiter.acquire(max_wait=max_wait):
+            raise ProviderThrottled(f'Rate limited locally for over {max_wait:g}s', retry_after=max_wait)
+        
+        response = self.session.post(self.base_url, timeout=http_timeouts(), **kwargs)
+        
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.limiter.penalize(retry_after)
+            raise ProviderThrottled(f'{self.provider} rate limit exceeded (429)', retry_after=retry_after)
+        
+        return response
+    
+    def _post_sendgrid(self, payload):
+        """POST a v3 mail/send payload over the pooled session"""
+        return self._throttled_post(
+            json=payload,
+            headers={'Authorization': f'Bearer {self.api_key}'}
+        )
+    
+    def _post_mailgun(self, data):
+        """POST a messages form over the pooled session"""
+        return self._throttled_post(
+            auth=('api', self.api_key),
+            data=data
+        )
     
     def send_email_sendgrid(self, to_email, subject, html_content, text_content=None):
         """Send email using SendGrid API"""
         try:
-            from sendgrid import SendGridAPIClient
             from sendgrid.helpers.mail import Mail
             
             if not self.api_key:
                 logger.warning("SendGrid API key not configured")
-                return {'success': False, 'error': 'SendGrid API key not configured'}
+                return {'success': False, 'error': 'SendGrid API key not configured', 'retryable': True}
             
             message = Mail(
                 from_email=self.from_email,
@@ -47,14 +307,16 @@ class EmailService:
             if text_content:
                 message.plain_text_content = text_content
             
-            sg = SendGridAPIClient(api_key=self.api_key)
-            response = sg.send(message)
+            response = self._post_sendgrid(message.get())
             
             if response.status_code in [200, 202]:
                 return {'success': True, 'message': 'Email sent successfully'}
             else:
-                return {'success': False, 'error': f'SendGrid API error: {response.status_code}'}
+                return {'success': False, 'error': f'SendGrid API error: {response.status_code}', 'retryable': True}
                 
+        except ProviderThrottled as e:
+            logger.warning(f"SendGrid throttled: {str(e)}")
+            return {'success': False, 'throttled': True, 'retry_after': e.retry_after, 'error': str(e)}
         except Exception as e:
             logger.error(f"SendGrid error: {str(e)}")
             return {'success': False, 'error': str(e)}
@@ -62,11 +324,9 @@ class EmailService:
     def send_email_mailgun(self, to_email, subject, html_content, text_content=None):
         """Send email using Mailgun API"""
         try:
-            import requests
-            
             if not self.api_key or not self.domain:
                 logger.warning("Mailgun API key or domain not configured")
-                return {'success': False, 'error': 'Mailgun API key or domain not configured'}
+                return {'success': False, 'error': 'Mailgun API key or domain not configured', 'retryable': True}
             
             data = {
                 'from': self.from_email,
@@ -78,369 +338,548 @@ class EmailService:
             if text_content:
                 data['text'] = text_content
             
-            response = requests.post(
-                self.base_url,
-                auth=('api', self.api_key),
-                data=data
-            )
+            response = self._post_mailgun(data)
             
             if response.status_code == 200:
                 return {'success': True, 'message': 'Email sent successfully'}
             else:
-                return {'success': False, 'error': f'Mailgun API error: {response.status_code}'}
+                return {'success': False, 'error': f'Mailgun API error: {response.status_code}', 'retryable': True}
                 
+        except ProviderThrottled as e:
+            logger.warning(f"Mailgun throttled: {str(e)}")
+            return {'success': False, 'throttled': True, 'retry_after': e.retry_after, 'error': str(e)}
         except Exception as e:
             logger.error(f"Mailgun error: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    @property
+    def batch_size(self):
+        """Recipients per provider request, capped at the provider's limit"""
+        limit = PROVIDER_BATCH_LIMITS.get(self.api, 1)
+        return max(1, min(int(os.getenv('EMAIL_BATCH_SIZE', limit)), limit))
+    
+    def _sendgrid_bulk_payload(self, recipients, subject, html_content, text_content=None):
+        """Build a mail/send payload with a personalization per recipient"""
+        names = {name for recipient in recipients for name in (recipient.get('substitutions') or {})}
+        html_content = split_html_slots(html_content, names)
+        
+        personalizations = []
+        for recipient in recipients:
+            personalization = {'to': [{'email': recipient['email']}]}
+            substitutions = recipient.get('substitutions')
+            if substitutions:
+                personalization['substitutions'] = {
+                    substitution_tag(name): value for name, value in substitution_values(substitutions).items()
+                }
+            personalizations.append(personalization)
+        
+        # SendGrid requires text/plain to come before text/html
+        content = []
+        if text_content:
+            content.append({'type': 'text/plain', 'value': text_content})
+        content.append({'type': 'text/html', 'value': html_content})
+        
+        return {
+            'personalizations': personalizations,
+            'from': {'email': self.from_email},
+            'subject': subject,
+            'content': content
+        }
+    
+    def _mailgun_bulk_data(self, recipients, subject, html_content, text_content=None):
+        """Build a batch messages form personalized through recipient-variables"""
+        # Mailgun spells placeholders %recipient.name%; the HTML body reads the escaped variants
+        names = {name for recipient in recipients for name in (recipient.get('substitutions') or {})}
+        html_content = split_html_slots(html_content, names)
+        slots = set(names) | {html_slot(name) for name in names}
+        for name in slots:
+            html_content = html_content.replace(substitution_tag(name), f'%recipient.{name}%')
+            if text_content:
+                text_content = text_content.replace(substitution_tag(name), f'%recipient.{name}%')
+        
+        # recipient-variables also makes Mailgun send each recipient a separate message
+        data = {
+            'from': self.from_email,
+            'to': [recipient['email'] for recipient in recipients],
+            'subject': subject,
+            'html': html_content,
+            'recipient-variables': json.dumps({
+                recipient['email']: substitution_values(recipient.get('substitutions') or {})
+                for recipient in recipients
+            })
+        }
+        
+        if text_content:
+            data['text'] = text_content
+        
+        return data
+    
+    def send_bulk_sendgrid(self, recipients, subject, html_content, text_content=None):
+        """Send one SendGrid request with a personalization per recipient"""
+        try:
+            if not self.api_key:
+                logger.warning("SendGrid API key not configured")
+                return {'success': False, 'error': 'SendGrid API key not configured', 'retryable': True}
+            
+            response = self._post_sendgrid(self._sendgrid_bulk_payload(recipients, subject, html_content, text_content))
+            
+            if response.status_code in [200, 202]:
+                return {'success': True, 'message': f'Email sent to {len(recipients)} recipients'}
+            else:
+                return {'success': False, 'error': f'SendGrid API error: {response.status_code}', 'retryable': True}
+                
+        except ProviderThrottled as e:
+            logger.warning(f"SendGrid bulk throttled: {str(e)}")
+            return {'success': False, 'throttled': True, 'retry_after': e.retry_after, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"SendGrid bulk error: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def send_bulk_mailgun(self, recipients, subject, html_content, text_content=None):
+        """Send one Mailgun batch request, personalized through recipient-variables"""
+        try:
+            if not self.api_key or not self.domain:
+                logger.warning("Mailgun API key or domain not configured")
+                return {'success': False, 'error': 'Mailgun API key or domain not configured', 'retryable': True}
+            
+            response = self._post_mailgun(self._mailgun_bulk_data(recipients, subject, html_content, text_content))
+            
+            if response.status_code == 200:
+                return {'success': True, 'message': f'Email sent to {len(recipients)} recipients'}
+            else:
+                return {'success': False, 'error': f'Mailgun API error: {response.status_code}', 'retryable': True}
+                
+        except ProviderThrottled as e:
+            logger.warning(f"Mailgun bulk throttled: {str(e)}")
+            return {'success': False, 'throttled': True, 'retry_after': e.retry_after, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"Mailgun bulk error: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def _send_batch(self, recipients, subject, html_content, text_content=None):
+        """Send one provider batch request"""
+        if self.api == 'sendgrid':
+            return self.send_bulk_sendgrid(recipients, subject, html_content, text_content)
+        return self.send_bulk_mailgun(recipients, subject, html_content, text_content)
+    
+    async def _throttled_post_async(self, client, **kwargs):
+        """Async counterpart of _throttled_post on an httpx.AsyncClient"""
+        max_wait = float(os.getenv('EMAIL_RATE_MAX_WAIT', 30))
+        if not await self.limiter.acquire_async(max_wait=max_wait):
+            raise ProviderThrottled(f'Rate limited locally for over {max_wait:g}s', retry_after=max_wait)
+        
+        response = await client.post(self.base_url, **kwargs)
+        
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.limiter.penalize(retry_after)
+            raise ProviderThrottled(f'{self.provider} rate limit exceeded (429)', retry_after=retry_after)
+        
+        return response
+    
+    async def _send_batch_async(self, client, recipients, subject, html_content, text_content=None):
+        """Send one provider batch request without blocking the event loop"""
+        name = 'SendGrid' if self.api == 'sendgrid' else 'Mailgun'
+        try:
+            if self.api == 'sendgrid':
+                if not self.api_key:
+                    logger.warning("SendGrid API key not configured")
+                    return {'success': False, 'error': 'SendGrid API key not configured', 'retryable': True}
+                
+                ok_statuses = [200, 202]
+                response = await self._throttled_post_async(
+                    client,
+                    json=self._sendgrid_bulk_payload(recipients, subject, html_content, text_content),
+                    headers={'Authorization': f'Bearer {self.api_key}'}
+                )
+            else:
+                if not self.api_key or not self.domain:
+                    logger.warning("Mailgun API key or domain not configured")
+                    return {'success': False, 'error': 'Mailgun API key or domain not configured', 'retryable': True}
+                
+                ok_statuses = [200]
+                response = await self._throttled_post_async(
+                    client,
+                    auth=('api', self.api_key),
+                    data=self._mailgun_bulk_data(recipients, subject, html_content, text_content)
+                )
+            
+            if response.status_code in ok_statuses:
+                return {'success': True, 'message': f'Email sent to {len(recipients)} recipients'}
+            else:
+                return {'success': False, 'error': f'{name} API error: {response.status_code}', 'retryable': True}
+                
+        except ProviderThrottled as e:
+            logger.warning(f"{name} bulk throttled: {str(e)}")
+            return {'success': False, 'throttled': True, 'retry_after': e.retry_after, 'error': str(e)}
+        except Exception as e:
+            # httpx transport errors often carry no message
+            error = str(e) or e.__class__.__name__
+            logger.error(f"{name} bulk error: {error}")
+            return {'success': False, 'error': error}
+    
     def send_email(self, to_email, subject, html_content, text_content=None):
         """Send email using configured provider"""
-        if self.provider == 'sendgrid':
+        if self.api == 'sendgrid':
             return self.send_email_sendgrid(to_email, subject, html_content, text_content)
-        elif self.provider == 'mailgun':
+        elif self.api == 'mailgun':
             return self.send_email_mailgun(to_email, subject, html_content, text_content)
         else:
             logger.error(f"Unknown email provider: {self.provider}")
             return {'success': False, 'error': f'Unknown email provider: {self.provider}'}
 
-email_service = EmailService()
+class EmailProviderPool(BulkSender):
+    """Send through several provider accounts, balanced by weight and live health
+    
+    EMAIL_PROVIDERS lists the accounts as provider[@label][:weight], e.g.
+    "sendgrid:3,mailgun:1" or "sendgrid,sendgrid@backup"; without it the
+    pool holds just EMAIL_PROVIDER. Each request goes to a provider picked
+    in proportion to its weight, scaled down by its recent error rate, and
+    providers that are failing or throttled sit out until they recover (see
+    ProviderHealth). A batch one provider refuses or throttles is tried on
+    the next right away; one that got no answer is not, since the provider
+    may have accepted it.
+    """
+    
+    def __init__(self, members):
+        """members: (EmailService, weight) pairs"""
+        names = [service.name for service, _ in members]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f'Email providers listed more than once: {duplicates}. Use provider@label for extra accounts')
+        
+        self.provider = ','.join(names)
+        self.services = {}
+        healths = []
+        for service, weight in members:
+            if not service.has_provider:
+                logger.error(f"Unknown email provider: {service.provider}, left out of the pool")
+                continue
+            self.services[service.name] = service
+            healths.append(ProviderHealth(service.name, weight, **health_settings()))
+        self.balancer = ProviderBalancer(healths)
+    
+    @classmethod
+    def from_env(cls, session=None):
+        spec = os.getenv('EMAIL_PROVIDERS') or os.getenv('EMAIL_PROVIDER', 'sendgrid')
+        members = []
+        for entry in filter(None, (entry.strip() for entry in spec.split(','))):
+            name, _, weight = entry.partition(':')
+            provider, _, label = name.partition('@')
+            try:
+                weight = float(weight or 1)
+            except ValueError:
+                raise ValueError(f'Invalid EMAIL_PROVIDERS entry: {entry}. Expected provider[@label][:weight]')
+            if not 0 <= weight < float('inf'):
+                raise ValueError(f'Invalid EMAIL_PROVIDERS entry: {entry}. Weight must be 0 (standby) or more')
+            members.append((EmailService(session=session, provider=provider, label=label or None), weight))
+        return cls(members)
+    
+    @property
+    def has_provider(self):
+        return bool(self.services)
+    
+    @property
+    def batch_size(self):
+        return min((service.batch_size for service in self.services.values()), default=1)
+    
+    def _record(self, health, result, recipients, latency):
+        """Update a provider's health from a result; True if another provider should be tried"""
+        result['provider'] = health.name
+        if result['success']:
+            health.record_success(recipients, latency)
+            return False
+        if result.get('throttled'):
+            health.record_throttle(result['retry_after'])
+            return True
+        health.record_failure(recipients, latency, result['error'])
+        return bool(result.get('retryable'))
+    
+    def _exhausted(self, results):
+        """Result for a request no provider accepted"""
+        now = time.monotonic()
+        waits = [result['retry_after'] for result in results if result.get('throttled')]
+        waits += [
+            health.unavailable_until - now for health in self.balancer.unavailable()
+            if health.unavailable_reason == 'throttled'
+        ]
+        if waits:
+            retry_after = min(waits)
+            return {'success': False, 'throttled': True, 'retry_after': retry_after,
+                    'error': f'Every email provider is throttled, retry in {retry_after:.1f}s'}
+        if results:
+            return results[-1]
+        return {'success': False, 'error': 'No email provider available', 'retryable': True}
+    
+    def _failover(self, send, recipients):
+        tried = set()
+        results = []
+        while True:
+            health = self.balancer.choose(exclude=tried)
+            if health is None:
+                return self._exhausted(results)
+            tried.add(health.name)
+            
+            start = time.perf_counter()
+            result = send(self.services[health.name])
+            if not self._record(health, result, recipients, time.perf_counter() - start):
+                return result
+            results.append(result)
+    
+    async def _failover_async(self, send, recipients):
+        tried = set()
+        results = []
+        while True:
+            health = self.balancer.choose(exclude=tried)
+            if health is None:
+                return self._exhausted(results)
+            tried.add(health.name)
+            
+            start = time.perf_counter()
+            result = await send(self.services[health.name])
+            if not self._record(health, result, recipients, time.perf_counter() - start):
+                return result
+            results.append(result)
+    
+    def _send_batch(self, recipients, subject, html_content, text_content=None):
+        return self._failover(
+            lambda service: service._send_batch(recipients, subject, html_content, text_content),
+            len(recipients)
+        )
+    
+    async def _send_batch_async(self, client, recipients, subject, html_content, text_content=None):
+        return await self._failover_async(
+            lambda service: service._send_batch_async(client, recipients, subject, html_content, text_content),
+            len(recipients)
+        )
+    
+    def send_email(self, to_email, subject, html_content, text_content=None):
+        """Send one email through the pool"""
+        if not self.has_provider:
+            logger.error(f"Unknown email provider: {self.provider}")
+            return {'success': False, 'error': f'Unknown email provider: {self.provider}'}
+        return self._failover(lambda service: service.send_email(to_email, subject, html_content, text_content), 1)
+    
+    def provider_stats(self):
+        """Per-provider health, throughput and error counters"""
+        return self.balancer.stats()
+
+email_service = EmailProviderPool.from_env()
+
+def queue_user_email(kind, user_id, dedupe_key=None, **context):
+    """Write one outbox email for a user and commit; drain_email_outbox sends it"""
+    from src.main import app
+    with app.app_context():
+        user = User.query.get(user_id)
+        if not user:
+            raise ValueError(f"User with ID {user_id} not found")
+        
+        entry = enqueue_email(kind, user, dedupe_key=dedupe_key, **context)
+        db.session.commit()
+        return user.email, entry.id if entry else None
 
 @celery_app.task(bind=True, name='src.tasks.email_tasks.send_welcome_email')
 def send_welcome_email(self, user_id):
     """
-    Send welcome email to new user
+    Queue the welcome email for a new user (sent once per user)
     """
     try:
-        # Update task state
-        self.update_state(state='PROGRESS', meta={'status': 'Preparing welcome email...'})
+        email, outbox_id = queue_user_email('welcome', user_id, dedupe_key=f'welcome:{user_id}')
         
-        # Import Flask app context
-        from src.main import app
-        with app.app_context():
-            user = User.query.get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found")
-            
-            # Update task state
-            self.update_state(state='PROGRESS', meta={'status': 'Sending email...'})
-            
-            subject = "Welcome to Manus AI Newsletter Platform!"
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Welcome to Manus AI</title>
-            </head>
-            <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f8f9fa;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: white;">
-                    <!-- Header -->
-                    <div style="background: linear-gradient(135deg, #FF5A5F, #7843E6); padding: 40px 20px; text-align: center;">
-                        <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 600;">Welcome to Manus AI!</h1>
-                        <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Your AI-powered newsletter platform</p>
-                    </div>
-                    
-                    <!-- Content -->
-                    <div style="padding: 40px 30px; background-color: white;">
-                        <h2 style="color: #1A1A1A; margin: 0 0 20px 0; font-size: 24px;">Hello {user.username}!</h2>
-                        
-                        <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 20px 0; font-size: 16px;">
-                            Welcome to the Manus AI Newsletter Platform! We're excited to have you join our community of creators and entrepreneurs.
-                        </p>
-                        
-                        <div style="background-color: #f8f9fa; padding: 25px; border-radius: 8px; margin: 25px 0;">
-                            <h3 style="color: #1A1A1A; margin: 0 0 15px 0; font-size: 18px;">What you can do with Manus AI:</h3>
-                            <ul style="color: #4D4D4D; line-height: 1.8; margin: 0; padding-left: 20px;">
-                                <li>🤖 Generate AI-powered newsletter content</li>
-                                <li>📰 Access premium newsletters from top creators</li>
-                                <li>👥 Build and grow your audience</li>
-                                <li>💰 Monetize your content with subscriptions</li>
-                                <li>📊 Track performance with advanced analytics</li>
-                            </ul>
-                        </div>
-                        
-                        <div style="text-align: center; margin: 35px 0;">
-                            <a href="https://manusai.com/dashboard" 
-                               style="background-color: #FF5A5F; color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
-                                Get Started Now
-                            </a>
-                        </div>
-                        
-                        <div style="border-top: 1px solid #eee; padding-top: 25px; margin-top: 35px;">
-                            <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 15px 0; font-size: 14px;">
-                                Need help getting started? Check out our <a href="https://manusai.com/docs" style="color: #7843E6;">documentation</a> 
-                                or reach out to our support team.
-                            </p>
-                            
-                            <p style="color: #4D4D4D; margin: 0; font-size: 16px;">
-                                Best regards,<br>
-                                <strong>The Manus AI Team</strong>
-                            </p>
-                        </div>
-                    </div>
-                    
-                    <!-- Footer -->
-                    <div style="background-color: #f8f9fa; padding: 20px 30px; text-align: center; border-top: 1px solid #eee;">
-                        <p style="color: #6c757d; margin: 0; font-size: 12px;">
-                            © 2024 Manus AI. All rights reserved.<br>
-                            <a href="https://manusai.com/unsubscribe" style="color: #6c757d;">Unsubscribe</a> | 
-                            <a href="https://manusai.com/privacy" style="color: #6c757d;">Privacy Policy</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-            Welcome to Manus AI Newsletter Platform!
-            
-            Hello {user.username}!
-            
-            Welcome to the Manus AI Newsletter Platform! We're excited to have you join our community of creators and entrepreneurs.
-            
-            What you can do with Manus AI:
-            • Generate AI-powered newsletter content
-            • Access premium newsletters from top creators
-            • Build and grow your audience
-            • Monetize your content with subscriptions
-            • Track performance with advanced analytics
-            
-            Get started at: https://manusai.com/dashboard
-            
-            Need help? Check out our documentation at https://manusai.com/docs or reach out to our support team.
-            
-            Best regards,
-            The Manus AI Team
-            
-            © 2024 Manus AI. All rights reserved.
-            Unsubscribe: https://manusai.com/unsubscribe
-            """
-            
-            result = email_service.send_email(user.email, subject, html_content, text_content)
-            
-            if result['success']:
-                return {
-                    'status': 'SUCCESS',
-                    'message': f'Welcome email sent to {user.email}',
-                    'user_id': user_id
-                }
-            else:
-                raise Exception(result['error'])
+        return {
+            'status': 'SUCCESS',
+            'message': f'Welcome email queued for {email}' if outbox_id else f'Welcome email already queued for {email}',
+            'user_id': user_id,
+            'outbox_id': outbox_id
+        }
         
     except Exception as exc:
-        logger.error(f"Error sending welcome email: {str(exc)}")
+        logger.error(f"Error queuing welcome email: {str(exc)}")
         self.update_state(
             state='FAILURE',
-            meta={'error': str(exc), 'status': 'Failed to send welcome email'}
+            meta={'error': str(exc), 'status': 'Failed to queue welcome email'}
         )
         raise exc
 
 @celery_app.task(bind=True, name='src.tasks.email_tasks.send_subscription_confirmation')
 def send_subscription_confirmation(self, user_id, subscription_tier):
     """
-    Send subscription confirmation email
+    Queue a subscription confirmation email
     """
     try:
-        # Update task state
-        self.update_state(state='PROGRESS', meta={'status': 'Preparing subscription confirmation...'})
+        email, outbox_id = queue_user_email('subscription_confirmation', user_id, subscription_tier=subscription_tier)
         
-        # Import Flask app context
-        from src.main import app
-        with app.app_context():
-            user = User.query.get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found")
-            
-            subject = f"Subscription Confirmed - {subscription_tier.title()} Plan"
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Subscription Confirmed</title>
-            </head>
-            <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f8f9fa;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: white;">
-                    <!-- Header -->
-                    <div style="background: linear-gradient(135deg, #3ECF8E, #7843E6); padding: 40px 20px; text-align: center;">
-                        <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 600;">Subscription Confirmed!</h1>
-                        <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Welcome to {subscription_tier.title()}</p>
-                    </div>
-                    
-                    <!-- Content -->
-                    <div style="padding: 40px 30px; background-color: white;">
-                        <h2 style="color: #1A1A1A; margin: 0 0 20px 0; font-size: 24px;">Thank you, {user.username}!</h2>
-                        
-                        <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 25px 0; font-size: 16px;">
-                            Your {subscription_tier.title()} subscription has been confirmed and is now active. You now have access to all premium features!
-                        </p>
-                        
-                        <div style="background-color: #f8f9fa; padding: 25px; border-radius: 8px; margin: 25px 0;">
-                            <h3 style="color: #1A1A1A; margin: 0 0 15px 0; font-size: 18px;">🎉 Your Premium Benefits:</h3>
-                            <ul style="color: #4D4D4D; line-height: 1.8; margin: 0; padding-left: 20px;">
-                                <li>🔓 Access to all premium newsletters</li>
-                                <li>🤖 Unlimited AI-powered content generation</li>
-                                <li>⚡ Priority customer support</li>
-                                <li>📊 Advanced analytics and insights</li>
-                                <li>🎨 Custom newsletter templates</li>
-                                <li>📈 Audience growth tools</li>
-                            </ul>
-                        </div>
-                        
-                        <div style="text-align: center; margin: 35px 0;">
-                            <a href="https://manusai.com/premium" 
-                               style="background-color: #3ECF8E; color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px; margin-right: 10px;">
-                                Explore Premium Content
-                            </a>
-                            <a href="https://manusai.com/dashboard" 
-                               style="background-color: #7843E6; color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
-                                Go to Dashboard
-                            </a>
-                        </div>
-                        
-                        <div style="border-top: 1px solid #eee; padding-top: 25px; margin-top: 35px;">
-                            <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 15px 0; font-size: 14px;">
-                                Questions about your subscription? Visit our <a href="https://manusai.com/billing" style="color: #7843E6;">billing page</a> 
-                                or contact our support team.
-                            </p>
-                            
-                            <p style="color: #4D4D4D; margin: 0; font-size: 16px;">
-                                Best regards,<br>
-                                <strong>The Manus AI Team</strong>
-                            </p>
-                        </div>
-                    </div>
-                    
-                    <!-- Footer -->
-                    <div style="background-color: #f8f9fa; padding: 20px 30px; text-align: center; border-top: 1px solid #eee;">
-                        <p style="color: #6c757d; margin: 0; font-size: 12px;">
-                            © 2024 Manus AI. All rights reserved.<br>
-                            <a href="https://manusai.com/billing" style="color: #6c757d;">Manage Subscription</a> | 
-                            <a href="https://manusai.com/privacy" style="color: #6c757d;">Privacy Policy</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            result = email_service.send_email(user.email, subject, html_content)
-            
-            if result['success']:
-                return {
-                    'status': 'SUCCESS',
-                    'message': f'Subscription confirmation sent to {user.email}',
-                    'user_id': user_id,
-                    'subscription_tier': subscription_tier
-                }
-            else:
-                raise Exception(result['error'])
+        return {
+            'status': 'SUCCESS',
+            'message': f'Subscription confirmation queued for {email}',
+            'user_id': user_id,
+            'subscription_tier': subscription_tier,
+            'outbox_id': outbox_id
+        }
         
     except Exception as exc:
-        logger.error(f"Error sending subscription confirmation: {str(exc)}")
+        logger.error(f"Error queuing subscription confirmation: {str(exc)}")
         self.update_state(
             state='FAILURE',
-            meta={'error': str(exc), 'status': 'Failed to send subscription confirmation'}
+            meta={'error': str(exc), 'status': 'Failed to queue subscription confirmation'}
         )
         raise exc
 
 @celery_app.task(bind=True, name='src.tasks.email_tasks.send_payment_failed_notification')
 def send_payment_failed_notification(self, user_id):
     """
-    Send payment failed notification email
+    Queue a payment failed notification email
+    """
+    try:
+        email, outbox_id = queue_user_email('payment_failed', user_id)
+        
+        return {
+            'status': 'SUCCESS',
+            'message': f'Payment failed notification queued for {email}',
+            'user_id': user_id,
+            'outbox_id': outbox_id
+        }
+        
+    except Exception as exc:
+        logger.error(f"Error queuing payment failed notification: {str(exc)}")
+        raise exc
+
+@celery_app.task(bind=True, name='src.tasks.email_tasks.drain_email_outbox')
+def drain_email_outbox(self):
+    """
+    Send every due outbox email through the bulk provider path
     """
     try:
-        # Import Flask app context
         from src.main import app
         with app.app_context():
-            user = User.query.get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found")
-            
-            subject = "Payment Failed - Action Required"
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Payment Failed</title>
-            </head>
-            <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f8f9fa;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: white;">
-                    <!-- Header -->
-                    <div style="background-color: #FF5A5F; padding: 40px 20px; text-align: center;">
-                        <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 600;">Payment Failed</h1>
-                        <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Action required to continue your subscription</p>
-                    </div>
-                    
-                    <!-- Content -->
-                    <div style="padding: 40px 30px; background-color: white;">
-                        <h2 style="color: #1A1A1A; margin: 0 0 20px 0; font-size: 24px;">Hello {user.username},</h2>
-                        
-                        <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 25px 0; font-size: 16px;">
-                            We were unable to process your subscription payment. Your premium access will be suspended until payment is updated.
-                        </p>
-                        
-                        <div style="background-color: #fff3cd; border: 1px solid #ffeaa7; padding: 20px; border-radius: 6px; margin: 25px 0;">
-                            <h3 style="color: #856404; margin: 0 0 10px 0; font-size: 16px;">⚠️ What happens next:</h3>
-                            <ul style="color: #856404; margin: 0; padding-left: 20px; line-height: 1.6;">
-                                <li>Your premium features will be suspended in 3 days</li>
-                                <li>You'll still have access to free features</li>
-                                <li>Update your payment method to restore full access</li>
-                            </ul>
-                        </div>
-                        
-                        <div style="text-align: center; margin: 35px 0;">
-                            <a href="https://manusai.com/billing" 
-                               style="background-color: #FF5A5F; color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
-                                Update Payment Method
-                            </a>
-                        </div>
-                        
-                        <div style="border-top: 1px solid #eee; padding-top: 25px; margin-top: 35px;">
-                            <p style="color: #4D4D4D; line-height: 1.6; margin: 0 0 15px 0; font-size: 14px;">
-                                Need help? Contact our support team at <a href="mailto:support@manusai.com" style="color: #7843E6;">support@manusai.com</a>
-                            </p>
-                            
-                            <p style="color: #4D4D4D; margin: 0; font-size: 16px;">
-                                Best regards,<br>
-                                <strong>The Manus AI Team</strong>
-                            </p>
-                        </div>
-                    </div>
-                    
-                    <!-- Footer -->
-                    <div style="background-color: #f8f9fa; padding: 20px 30px; text-align: center; border-top: 1px solid #eee;">
-                        <p style="color: #6c757d; margin: 0; font-size: 12px;">
-                            © 2024 Manus AI. All rights reserved.<br>
-                            <a href="https://manusai.com/billing" style="color: #6c757d;">Manage Subscription</a> | 
-                            <a href="https://manusai.com/privacy" style="color: #6c757d;">Privacy Policy</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            result = email_service.send_email(user.email, subject, html_content)
-            
-            if result['success']:
-                return {
-                    'status': 'SUCCESS',
-                    'message': f'Payment failed notification sent to {user.email}',
-                    'user_id': user_id
-                }
-            else:
-                raise Exception(result['error'])
+            stats = drain_outbox(email_service)
+        
+        if stats['claimed']:
+            logger.info(f"Outbox drained: {stats}")
+        return dict(stats, status='SUCCESS')
         
     except Exception as exc:
-        logger.error(f"Error sending payment failed notification: {str(exc)}")
+        logger.error(f"Error draining email outbox: {str(exc)}")
         raise exc
 
+def dispatch_bulk_send(audience, subject, html_content, text_content=None, substitutions=None, summary=None):
+    """Fan a bulk email out to an audience as one email-queue subtask per keyset batch
+    
+    Recipients are never loaded here: the audience is walked by user id and
+    each subtask loads and sends its own batch, so the dispatcher's memory
+    stays flat and throughput scales with the email workers. A chord
+    callback adds up the sent/failed counts. Must run inside an app context.
+    Returns (AsyncResult of the aggregate or None, recipients, batches).
+    """
+    batch_signatures = []
+    recipients_count = 0
+    
+    # Each subtask covers enough provider batches to keep the worker's
+    # send_concurrency requests in flight
+    range_size = email_service.batch_size * email_service.send_concurrency
+    for after_id, last_id, count in keyset_ranges(audience, range_size):
+        batch_signatures.append(send_bulk_batch.si(
+            audience, after_id, last_id, count, subject, html_content, text_content, substitutions
+        ))
+        recipients_count += count
+    
+    if not batch_signatures:
+        return None, 0, 0
+    
+    summary = dict(summary or {}, recipients_count=recipients_count, batches_count=len(batch_signatures))
+    result = chord(batch_signatures)(aggregate_bulk_results.s(summary))
+    return result, recipients_count, len(batch_signatures)
+
+@celery_app.task(bind=True, name='src.tasks.email_tasks.send_bulk_batch')
+def send_bulk_batch(self, audience, after_id, last_id, count, subject, html_content,
+                    text_content=None, substitutions=None, only_emails=None, sent_count=0, failed_count=0):
+    """
+    Send one keyset batch of a fan-out (users with after_id < id <= last_id)
+    
+    Recipients the provider throttles are re-queued: the task retries after
+    the provider's Retry-After with only_emails set to them, carrying the
+    counts so far, until EMAIL_THROTTLE_MAX_RETRIES runs out.
+    """
+    try:
+        # Import Flask app context
+        from src.main import app
+        with app.app_context():
+            recipients = load_recipients(audience, after_id, last_id, substitutions)
+        
+        if only_emails is not None:
+            wanted = set(only_emails)
+            recipients = [recipient for recipient in recipients if recipient['email'] in wanted]
+        
+        result = email_service.send_bulk_concurrent(recipients, subject, html_content, text_content)
+        
+    except Exception as exc:
+        # Report the batch as failed rather than failing the whole chord
+        logger.error(f"Error sending bulk batch {after_id}-{last_id}: {str(exc)}")
+        return {
+            'after_id': after_id,
+            'last_id': last_id,
+            'recipients': count,
+            'sent_count': sent_count,
+            'failed_count': count - sent_count,
+            'errors': [str(exc)]
+        }
+    
+    sent_count += result['sent_count']
+    failed_count += result['failed_count']
+    errors = [batch['error'] for batch in result['batches'] if 'error' in batch]
+    throttled = result['throttled_recipients']
+    
+    if throttled:
+        max_retries = int(os.getenv('EMAIL_THROTTLE_MAX_RETRIES', 5))
+        if self.request.retries < max_retries:
+            logger.warning(f"Re-queuing {len(throttled)} throttled recipient(s) of batch {after_id}-{last_id} "
+                           f"in {result['retry_after']:.1f}s")
+            raise self.retry(
+                countdown=result['retry_after'],
+                max_retries=max_retries,
+                kwargs={
+                    'only_emails': [recipient['email'] for recipient in throttled],
+                    'sent_count': sent_count,
+                    'failed_count': failed_count
+                }
+            )
+        
+        failed_count += len(throttled)
+        errors.append(f'Provider throttling persisted after {max_retries} retries')
+    
+    return {
+        'after_id': after_id,
+        'last_id': last_id,
+        'recipients': count,
+        'sent_count': sent_count,
+        'failed_count': failed_count,
+        'errors': errors
+    }
+
+@celery_app.task(bind=True, name='src.tasks.email_tasks.aggregate_bulk_results')
+def aggregate_bulk_results(self, results, summary=None):
+    """
+    Add up the sent/failed counts of a fan-out's batches
+    """
+    sent_count = sum(result['sent_count'] for result in results)
+    failed_count = sum(result['failed_count'] for result in results)
+    errors = sorted({error for result in results for error in result['errors']})
+    
+    if failed_count:
+        logger.error(f"Bulk send finished with {failed_count} failed recipient(s): {errors}")
+    
+    return dict(
+        summary or {},
+        status='SUCCESS',
+        sent_count=sent_count,
+        failed_count=failed_count,
+        failed_batches=[
+            {'after_id': result['after_id'], 'last_id': result['last_id'], 'failed_count': result['failed_count']}
+            for result in results if result['failed_count']
+        ],
+        errors=errors
+    )
+
 @celery_app.task(bind=True, name='src.tasks.email_tasks.test_email_service')
 def test_email_service(self, to_email):
     """
@@ -448,14 +887,9 @@ def test_email_service(self, to_email):
     """
     try:
         subject = "Manus AI Email Service Test"
-        html_content = """
-        <h1>Email Service Test</h1>
-        <p>This is a test email to verify that the email service is working correctly.</p>
-        <p>If you received this email, the service is functioning properly!</p>
-        """
-        text_content = "Email Service Test\n\nThis is a test email to verify that the email service is working correctly.\n\nIf you received this email, the service is functioning properly!"
+        content = render_email('test')
         
-        result = email_service.send_email(to_email, subject, html_content, text_content)
+        result = email_service.send_email(to_email, subject, content['html'], content['text'])
         
         if result['success']:
             return {
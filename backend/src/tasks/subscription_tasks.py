@@ -6,7 +6,8 @@ from celery import current_task
 from src.celery_app import celery_app
 from src.models.user import db, User
 from src.models.subscription import Subscription
-from src.tasks.email_tasks import send_welcome_email, send_subscription_confirmation, send_payment_failed_notification
+from src.services.outbox import enqueue_email
+from sqlalchemy.orm import joinedload
 import logging
 from datetime import datetime, timedelta
 
@@ -15,17 +16,23 @@ logger = logging.getLogger(__name__)
 @celery_app.task(bind=True, name='src.tasks.subscription_tasks.process_new_subscription')
 def process_new_subscription(self, user_id, subscription_tier='premium'):
     """
-    Process new subscription and send welcome emails
+    Process new subscription and queue welcome emails
     """
     try:
         # Update task state
         self.update_state(state='PROGRESS', meta={'status': 'Processing new subscription...'})
         
-        # Send welcome email if this is a new user
-        send_welcome_email.delay(user_id)
-        
-        # Send subscription confirmation
-        send_subscription_confirmation.delay(user_id, subscription_tier)
+        # Import Flask app context
+        from src.main import app
+        with app.app_context():
+            user = User.query.get(user_id)
+            if not user:
+                raise ValueError(f"User with ID {user_id} not found")
+            
+            # Welcome email only the first time, subscription confirmation every time
+            enqueue_email('welcome', user, dedupe_key=f'welcome:{user_id}')
+            enqueue_email('subscription_confirmation', user, subscription_tier=subscription_tier)
+            db.session.commit()
         
         return {
             'status': 'SUCCESS',
@@ -56,7 +63,7 @@ def cleanup_expired_subscriptions(self):
         with app.app_context():
             # Find expired subscriptions
             now = datetime.utcnow()
-            expired_subscriptions = Subscription.query.filter(
+            expired_subscriptions = Subscription.query.options(joinedload(Subscription.user)).filter(
                 Subscription.expires_at < now,
                 Subscription.status == 'active'
             ).all()
@@ -79,8 +86,8 @@ def cleanup_expired_subscriptions(self):
                     db.session.add(subscription)
                     updated_count += 1
                     
-                    # Send notification email about expiration
-                    send_payment_failed_notification.delay(subscription.user_id)
+                    # Notify about the expiration, committed together with it
+                    enqueue_email('payment_failed', subscription.user)
                     
                 except Exception as e:
                     logger.error(f"Error updating subscription {subscription.id}: {str(e)}")
@@ -122,10 +129,10 @@ def process_subscription_renewal(self, user_id, stripe_subscription_id):
             # Update subscription status and extend expiration
             subscription.status = 'active'
             subscription.expires_at = datetime.utcnow() + timedelta(days=30)  # Extend by 30 days
-            db.session.commit()
             
-            # Send renewal confirmation
-            send_subscription_confirmation.delay(user_id, subscription.tier)
+            # Queue renewal confirmation with the renewal itself
+            enqueue_email('subscription_confirmation', subscription.user, subscription_tier=subscription.tier)
+            db.session.commit()
             
             return {
                 'status': 'SUCCESS',
@@ -158,43 +165,10 @@ def process_subscription_cancellation(self, user_id, stripe_subscription_id):
             # Update subscription status
             subscription.status = 'cancelled'
             subscription.tier = 'free'
-            db.session.commit()
             
-            # Send cancellation confirmation email
-            user = User.query.get(user_id)
-            if user:
-                from src.tasks.email_tasks import email_service
-                subject = "Subscription Cancelled"
-                html_content = f"""
-                <html>
-                <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <div style="background-color: #4D4D4D; padding: 40px; text-align: center;">
-                        <h1 style="color: white; margin: 0;">Subscription Cancelled</h1>
-                    </div>
-                    <div style="padding: 30px; background-color: #FAF9F8;">
-                        <h2 style="color: #1A1A1A;">Hello {user.username},</h2>
-                        <p style="color: #4D4D4D; line-height: 1.6;">
-                            Your premium subscription has been cancelled. You'll continue to have access to premium features until the end of your current billing period.
-                        </p>
-                        <p style="color: #4D4D4D; line-height: 1.6;">
-                            We're sorry to see you go! If you change your mind, you can resubscribe at any time.
-                        </p>
-                        <div style="text-align: center; margin: 30px 0;">
-                            <a href="https://manusai.com/subscribe" 
-                               style="background-color: #7843E6; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; display: inline-block;">
-                                Resubscribe
-                            </a>
-                        </div>
-                        <p style="color: #4D4D4D;">
-                            Best regards,<br>
-                            The Manus AI Team
-                        </p>
-                    </div>
-                </body>
-                </html>
-                """
-                
-                email_service.send_email(user.email, subject, html_content)
+            # Queue cancellation confirmation with the cancellation itself
+            enqueue_email('subscription_cancelled', subscription.user)
+            db.session.commit()
             
             return {
                 'status': 'SUCCESS',